@@ -0,0 +1,83 @@
+"""
+Compares the GML3 geometry decoder in utils.helpers.gml with the previous path
+(ET.tostring + ogr.CreateGeometryFromGML) on recorded WFS GetFeature responses.
+
+Usage (from the pygeoapi directory):
+    python -m benchmarks.gml_geometry <geom_field> <response.xml> [<response.xml> ...] [--repeat N]
+"""
+import sys
+import time
+import argparse
+from typing import List, Callable
+from lxml import etree as ET
+from osgeo import ogr
+from pygeoapi.process.dokanalyse.utils.helpers.gml import geometry_from_gml_element
+from pygeoapi.process.dokanalyse.utils.helpers.geometry import geometry_from_gml
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('geom_field')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--repeat', type=int, default=5)
+    parsed = parser.parse_args(args)
+
+    for file_path in parsed.files:
+        elements = _get_geometry_elements(file_path, parsed.geom_field)
+
+        ogr_time, ogr_geoms = _run(elements, _from_ogr, parsed.repeat)
+        fast_time, fast_geoms = _run(elements, geometry_from_gml_element, parsed.repeat)
+        mismatches = _count_mismatches(ogr_geoms, fast_geoms)
+
+        print(f'{file_path}: {len(elements)} geometries')
+        print(f'  OGR (tostring + CreateGeometryFromGML): {round(ogr_time * 1000, 1)} ms')
+        print(f'  GML3 decoder: {round(fast_time * 1000, 1)} ms ({round(ogr_time / fast_time, 1)}x)')
+        print(f'  Mismatches: {mismatches}')
+
+
+def _get_geometry_elements(file_path: str, geom_field: str) -> List[ET._Element]:
+    root = ET.parse(file_path, ET.XMLParser(huge_tree=True)).getroot()
+
+    return root.xpath(f'//*[local-name() = "{geom_field}"]/*')
+
+
+def _from_ogr(element: ET._Element) -> ogr.Geometry:
+    gml_str = ET.tostring(element, encoding='unicode')
+
+    return geometry_from_gml(gml_str)
+
+
+def _run(elements: List[ET._Element], create_geometry: Callable[[ET._Element], ogr.Geometry], repeat: int):
+    best = None
+    geometries = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        geometries = [create_geometry(element) for element in elements]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, geometries
+
+
+def _count_mismatches(expected: List[ogr.Geometry], actual: List[ogr.Geometry]) -> int:
+    mismatches = 0
+
+    for geom_a, geom_b in zip(expected, actual):
+        if geom_a is None or geom_b is None:
+            mismatches += int(geom_a is not geom_b)
+            continue
+
+        geom_a = geom_a.Clone()
+        geom_a.FlattenTo2D()
+        geom_b = geom_b.Clone()
+        geom_b.FlattenTo2D()
+
+        if not geom_a.Equals(geom_b):
+            mismatches += 1
+
+    return mismatches
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
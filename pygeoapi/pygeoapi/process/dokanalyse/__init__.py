@@ -1,10 +1,14 @@
+import time
 from typing import Dict, Tuple
-import asyncio
+import atexit
 from osgeo import ogr, osr
 from pygeoapi.process.base import BaseProcessor, ProcessorExecuteError
 from .services import analyses
+from .http_clients.session import close_session
 from .utils.helpers.request import request_is_valid
 from .utils.socket_io import get_client
+from .utils.event_loop import run_coroutine, stop_event_loop
+from .utils.constants import REQUEST_TIMEOUT
 from .utils import logger
 
 logger.setup()
@@ -97,6 +101,15 @@ PROCESS_METADATA = {
             },
             'minOccurs': 0,
             'maxOccurs': 1
+        },
+        'timeout': {
+            'title': 'Tidsavbrudd',
+            'description': 'Maksimalt antall sekunder analysen kan bruke. Datasett som ikke blir ferdige innen fristen får status TIMEOUT.',
+            'schema': {
+                'type': 'integer'
+            },
+            'minOccurs': 0,
+            'maxOccurs': 1
         }
     },
     'outputs': {
@@ -186,9 +199,11 @@ class DokanalyseProcessor(BaseProcessor):
             raise ProcessorExecuteError('Invalid payload')
 
         sio_client = get_client()
+        timeout = min(data.get('timeout', REQUEST_TIMEOUT), REQUEST_TIMEOUT)
+        deadline = time.monotonic() + timeout
 
         try:
-            outputs = asyncio.run(analyses.run(data, sio_client))
+            outputs = run_coroutine(analyses.run(data, sio_client, deadline))
         finally:
             if sio_client:
                 sio_client.disconnect()
@@ -197,3 +212,10 @@ class DokanalyseProcessor(BaseProcessor):
 
     def __repr__(self) -> str:
         return f'<DokanalyseProcessor> {self.name}'
+
+
+def _shutdown() -> None:
+    stop_event_loop(close_session())
+
+
+atexit.register(_shutdown)
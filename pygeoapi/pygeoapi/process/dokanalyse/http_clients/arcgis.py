@@ -1,17 +1,34 @@
+import json
 import logging
-from typing import Tuple, Dict
-import aiohttp
+from typing import List, Tuple, Dict, Callable, Any
 import asyncio
 from pydantic import HttpUrl
 from osgeo import ogr
-from ..utils.helpers.geometry import geometry_to_arcgis_geom
+from ..utils.helpers.geometry_context import GeometryContext, to_arcgis_geom
+from .resilience import send_request, mark_response_received
+from .pagination import Page, fetch_pages
+from .session import get_session
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def query_arcgis(url: HttpUrl, layer: str, filter: str, geometry: ogr.Geometry, epsg: int, timeout: int = 30) -> Tuple[int, Dict]:
+async def query_arcgis(url: HttpUrl, layer: str, filter: str, geometry: ogr.Geometry, epsg: int, out_fields: List[str] = None, timeout: int = 30, context: GeometryContext = None) -> Tuple[int, Dict]:
+    status_code, pages = await query_arcgis_features(
+        url, layer, filter, geometry, epsg, lambda json: [json], out_fields, timeout, context)
+
+    if status_code != 200 or not pages:
+        return status_code, None
+
+    response = pages[0]
+    response['features'] = [feature for page in pages for feature in page.get('features', [])]
+
+    return 200, response
+
+
+async def query_arcgis_features(url: HttpUrl, layer: str, filter: str, geometry: ogr.Geometry, epsg: int, map_page: Callable[[Dict], List[Any]], out_fields: List[str] = None, timeout: int = 30, context: GeometryContext = None) -> Tuple[int, List[Any]]:
     api_url = f'{url}/{layer}/query'
-    arcgis_geom = geometry_to_arcgis_geom(geometry, epsg)
+    arcgis_geom = to_arcgis_geom(geometry, epsg, context)
+    page_size: int = None
 
     data = {
         'geometry': arcgis_geom,
@@ -21,27 +38,112 @@ async def query_arcgis(url: HttpUrl, layer: str, filter: str, geometry: ogr.Geom
         'inSR': epsg,
         'outSR': epsg,
         'units': 'esriSRUnit_Meter',
-        'outFields': '*',
+        'outFields': ','.join(out_fields) if out_fields else '*',
         'returnGeometry': True,
         'f': 'geojson'
     }
 
+    # Layers without supportsPagination reject resultOffset, so the first request is sent without
+    # paging and later pages use the record count the server chose for it
+    async def fetch_page(offset: int) -> Tuple[int, Page]:
+        nonlocal page_size
+
+        if offset is None:
+            status_code, json = await _query_arcgis(api_url, data, timeout)
+            offset = 0
+        else:
+            paging = {'resultOffset': offset, 'resultRecordCount': page_size}
+            status_code, json = await _query_arcgis(api_url, {**data, **paging}, timeout)
+
+        if status_code != 200:
+            return status_code, None
+
+        features = json.get('features', [])
+
+        if page_size is None:
+            page_size = len(features)
+
+        next_offset = offset + len(features) if _exceeded_transfer_limit(json) else None
+
+        return 200, Page(map_page(json), len(features), next=next_offset)
+
+    async def count_matched() -> Tuple[int, int]:
+        return await query_arcgis_count(url, layer, filter, geometry, epsg, timeout, context)
+
+    return await fetch_pages(fetch_page, count_matched)
+
+
+async def query_arcgis_layers(url: HttpUrl, layer_defs: List[Dict], geometry: ogr.Geometry, epsg: int, timeout: int = 30, context: GeometryContext = None) -> Tuple[int, Dict]:
+    api_url = f'{url}/query'
+    arcgis_geom = to_arcgis_geom(geometry, epsg, context)
+
+    data = {
+        'layerDefs': json.dumps(layer_defs),
+        'geometry': arcgis_geom,
+        'geometryType': 'esriGeometryPolygon',
+        'spatialRel': 'esriSpatialRelIntersects',
+        'inSR': epsg,
+        'outSR': epsg,
+        'returnGeometry': True,
+        'f': 'json'
+    }
+
     return await _query_arcgis(api_url, data, timeout)
 
 
+async def query_arcgis_count(url: HttpUrl, layer: str, filter: str, geometry: ogr.Geometry, epsg: int, timeout: int = 30, context: GeometryContext = None) -> Tuple[int, int]:
+    api_url = f'{url}/{layer}/query'
+    arcgis_geom = to_arcgis_geom(geometry, epsg, context)
+
+    data = {
+        'geometry': arcgis_geom,
+        'geometryType': 'esriGeometryPolygon',
+        'spatialRel': 'esriSpatialRelIntersects',
+        'where': filter if filter is not None else '1=1',
+        'inSR': epsg,
+        'returnCountOnly': True,
+        'f': 'json'
+    }
+
+    status_code, json = await _query_arcgis(api_url, data, timeout)
+
+    if status_code != 200:
+        return status_code, None
+
+    count = json.get('count')
+
+    return 200, count if isinstance(count, int) else None
+
+
+def _exceeded_transfer_limit(json: Dict) -> bool:
+    properties = json.get('properties')
+
+    if isinstance(properties, dict) and properties.get('exceededTransferLimit'):
+        return True
+
+    return bool(json.get('exceededTransferLimit'))
+
+
 async def _query_arcgis(url: HttpUrl, data: Dict, timeout: int) -> Tuple[int, Dict]:
+    return await send_request(url, timeout, lambda timeout: _post_arcgis(url, data, timeout))
+
+
+async def _post_arcgis(url: HttpUrl, data: Dict, timeout: int) -> Tuple[int, Dict]:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=data, timeout=timeout) as response:
-                if response.status != 200:
-                    return response.status, None
+        session = get_session()
+
+        async with session.post(url, data=data, timeout=timeout) as response:
+            mark_response_received()
+
+            if response.status != 200:
+                return response.status, None
 
-                json = await response.json()
+            json = await response.json()
 
-                if 'error' in json:
-                    return 400, None
+            if 'error' in json:
+                return 400, None
 
-                return 200, json
+            return 200, json
     except asyncio.TimeoutError:
         return 408, None
     except Exception as err:
@@ -49,4 +151,4 @@ async def _query_arcgis(url: HttpUrl, data: Dict, timeout: int) -> Tuple[int, Di
         return 500, None
 
 
-__all__ = ['query_arcgis']
+__all__ = ['query_arcgis', 'query_arcgis_features', 'query_arcgis_layers', 'query_arcgis_count']
@@ -0,0 +1,104 @@
+import time
+import logging
+from typing import List, Dict, Set, Tuple, Callable, Awaitable, Any
+
+_LOGGER = logging.getLogger(__name__)
+
+FILTER_PUSHDOWN = 'filter_pushdown'
+PROPERTY_PROJECTION = 'property_projection'
+OUTPUT_CRS = 'output_crs'
+MULTI_QUERY = 'multi_query'
+MULTI_LAYER_QUERY = 'multi_layer_query'
+
+_TTL = 3600
+
+_unsupported: Dict[Tuple[str, str], float] = {}
+_suspected: Dict[Tuple[str, str], float] = {}
+_confirmed: Set[Tuple[str, str]] = set()
+
+
+def is_supported(url: str, capability: str) -> bool:
+    key = (str(url), capability)
+    expires = _unsupported.get(key)
+
+    if expires is None:
+        return True
+
+    if expires <= time.monotonic():
+        del _unsupported[key]
+        _LOGGER.info(f'Re-enabling {capability} for {url}')
+        return True
+
+    return False
+
+
+def set_unsupported(url: str, capability: str) -> None:
+    key = (str(url), capability)
+
+    if not is_supported(url, capability):
+        return
+
+    _unsupported[key] = time.monotonic() + _TTL
+    _suspected.pop(key, None)
+    _LOGGER.warning(f'Disabling {capability} for {url} for {_TTL} sec.')
+
+
+def is_confirmed(url: str, capability: str) -> bool:
+    return (str(url), capability) in _confirmed and is_supported(url, capability)
+
+
+def set_confirmed(url: str, capability: str) -> None:
+    _confirmed.add((str(url), capability))
+
+
+def _confirm_unsupported(url: str, capability: str) -> None:
+    key = (str(url), capability)
+    now = time.monotonic()
+    suspected = _suspected.get(key)
+
+    # A single 400 may have another cause, so the capability is only disabled when the full request fails again
+    if suspected is not None and suspected > now:
+        set_unsupported(url, capability)
+        return
+
+    _suspected[key] = now + _TTL
+    _LOGGER.info(f'Request to {url} succeeded without {capability}')
+
+
+def _clear_suspected(url: str, capabilities: List[str]) -> None:
+    for capability in capabilities:
+        _suspected.pop((str(url), capability), None)
+
+
+async def query_with_fallback(url: str, capabilities: List[str], query: Callable[[List[str]], Awaitable[Tuple[int, Any]]]) -> Tuple[int, Any]:
+    enabled = [capability for capability in capabilities if is_supported(url, capability)]
+    status_code, response = await query(enabled)
+
+    if status_code == 200:
+        _clear_suspected(url, enabled)
+
+    if status_code != 400 or len(enabled) == 0:
+        return status_code, response
+
+    for capability in enabled:
+        reduced = [other for other in enabled if other != capability]
+        status_code, response = await query(reduced)
+
+        if status_code != 400:
+            if status_code == 200:
+                _confirm_unsupported(url, capability)
+
+            return status_code, response
+
+    if len(enabled) > 1:
+        status_code, response = await query([])
+
+        if status_code == 200:
+            for capability in enabled:
+                _confirm_unsupported(url, capability)
+
+    return status_code, response
+
+
+__all__ = ['FILTER_PUSHDOWN', 'PROPERTY_PROJECTION', 'OUTPUT_CRS', 'MULTI_QUERY', 'MULTI_LAYER_QUERY',
+           'is_supported', 'set_unsupported', 'is_confirmed', 'set_confirmed', 'query_with_fallback']
@@ -1,34 +1,146 @@
 import logging
-from typing import Tuple, Dict
-import aiohttp
+from urllib.parse import quote, urljoin, urlparse, parse_qsl, urlencode
+from typing import List, Tuple, Dict, Callable, Any
 import asyncio
 from pydantic import HttpUrl
 from osgeo import ogr
-from ..utils.helpers.geometry import geometry_to_wkt
+from ..utils.helpers.geometry import get_epsg, add_geojson_crs
+from ..utils.helpers.geometry_context import GeometryContext, to_wkt
+from ..utils.helpers.filter import Filter
 from ..utils.constants import WGS84_EPSG
+from .session import get_session
+from .resilience import send_request, mark_response_received
+from .pagination import Page, get_page_size, fetch_pages
+from .capabilities import OUTPUT_CRS, is_confirmed, set_confirmed
 
 _LOGGER = logging.getLogger(__name__)
 
+_OFFSET_PARAMS = ['offset', 'startindex']
+
+
+async def query_ogc_api(base_url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, out_epsg: int = 4326, filter: Filter = None, properties: List[str] = None, timeout: int = 30, context: GeometryContext = None, page_size: int = None) -> Tuple[int, Dict]:
+    status_code, pages = await query_ogc_api_features(
+        base_url, layer, geom_field, geometry, epsg, lambda json: [json], out_epsg, filter, properties, timeout, context, page_size)
+
+    if status_code != 200 or not pages:
+        return status_code, None
+
+    response = pages[0]
+    response['features'] = [feature for page in pages for feature in page.get('features', [])]
+
+    return 200, response
+
+
+async def query_ogc_api_features(base_url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, map_page: Callable[[Dict], List[Any]], out_epsg: int = 4326, filter: Filter = None, properties: List[str] = None, timeout: int = 30, context: GeometryContext = None, page_size: int = None) -> Tuple[int, List[Any]]:
+    url = _create_items_url(
+        base_url, layer, geom_field, geometry, epsg, out_epsg, filter, properties, context)
+    first_url = f'{url}&limit={get_page_size(page_size)}'
+    next_url: str = None
+
+    async def fetch_page(cursor: Any) -> Tuple[int, Page]:
+        nonlocal next_url
+
+        if cursor is None:
+            page_url = first_url
+        elif isinstance(cursor, int):
+            page_url = _set_offset(next_url, cursor)
+        else:
+            page_url = cursor
+
+        status_code, json = await _query_ogc_api(page_url, base_url, out_epsg, timeout)
+
+        if status_code != 200 or not isinstance(json, dict):
+            return status_code, None
+
+        href = _get_next_href(page_url, json)
+
+        if cursor is None:
+            next_url = href
+
+        number_matched = json.get('numberMatched')
+
+        return 200, Page(
+            map_page(json), len(json.get('features', [])),
+            number_matched if isinstance(number_matched, int) else None,
+            href, href is not None and _get_offset_param(href) is not None)
+
+    return await fetch_pages(fetch_page)
+
+
+async def query_ogc_api_hits(base_url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, filter: Filter = None, timeout: int = 30, context: GeometryContext = None) -> Tuple[int, int]:
+    url = _create_items_url(
+        base_url, layer, geom_field, geometry, epsg, WGS84_EPSG, filter, None, context)
+
+    status_code, json = await _query_ogc_api(f'{url}&limit=1', base_url, WGS84_EPSG, timeout)
+
+    if status_code != 200 or not isinstance(json, dict):
+        return status_code, None
+
+    number_matched = json.get('numberMatched')
+
+    if isinstance(number_matched, int):
+        return 200, number_matched
+
+    return 200, len(json.get('features', []))
+
+
+def _create_items_url(base_url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, out_epsg: int, filter: Filter, properties: List[str], context: GeometryContext) -> str:
+    wkt_str = to_wkt(geometry, epsg, context)
+    cql2_filter = f'S_INTERSECTS({geom_field},{wkt_str})'
+
+    if filter is not None:
+        cql2_filter = f'{cql2_filter} AND ({filter.to_cql2()})'
 
-async def query_ogc_api(base_url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, out_epsg: int = 4326, timeout: int = 30) -> Tuple[int, Dict]:
-    wkt_str = geometry_to_wkt(geometry, epsg)
     # autopep8: off
     filter_crs = f'&filter-crs=http://www.opengis.net/def/crs/EPSG/0/{epsg}' if epsg != WGS84_EPSG else ''
     crs = f'&crs=http://www.opengis.net/def/crs/EPSG/0/{out_epsg}' if out_epsg != WGS84_EPSG else ''
-    url = f'{base_url}/{layer}/items?filter-lang=cql2-text{filter_crs}{crs}&filter=S_INTERSECTS({geom_field},{wkt_str})'
+    props = f'&properties={quote(",".join(properties))}' if properties else ''
     # autopep8: on
 
-    return await _query_ogc_api(url, timeout)
+    return f'{base_url}/{layer}/items?filter-lang=cql2-text{filter_crs}{crs}{props}&filter={quote(cql2_filter)}'
+
+
+def _get_next_href(url: str, json: Dict) -> str:
+    for link in json.get('links', []):
+        if isinstance(link, dict) and link.get('rel') == 'next' and link.get('href'):
+            return urljoin(url, link['href'])
+
+    return None
+
+
+def _get_offset_param(url: str) -> str:
+    params = parse_qsl(urlparse(url).query, keep_blank_values=True)
+
+    return next((key for key, _ in params if key.lower() in _OFFSET_PARAMS), None)
+
+
+def _set_offset(url: str, offset: int) -> str:
+    parsed = urlparse(url)
+    offset_param = _get_offset_param(url)
+    params = [(key, str(offset) if key == offset_param else value)
+              for key, value in parse_qsl(parsed.query, keep_blank_values=True)]
 
+    return parsed._replace(query=urlencode(params)).geturl()
 
-async def _query_ogc_api(url: str, timeout: int) -> Tuple[int, Dict]:
+
+async def _query_ogc_api(url: str, base_url: HttpUrl, out_epsg: int, timeout: int) -> Tuple[int, Dict]:
+    return await send_request(url, timeout, lambda timeout: _get_ogc_api(url, base_url, out_epsg, timeout))
+
+
+async def _get_ogc_api(url: str, base_url: HttpUrl, out_epsg: int, timeout: int) -> Tuple[int, Dict]:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=timeout) as response:
-                if response.status != 200:
-                    return response.status, None
+        session = get_session()
+
+        async with session.get(url, timeout=timeout) as response:
+            mark_response_received()
+
+            if response.status != 200:
+                return response.status, None
+
+            json = await response.json()
+            _add_content_crs(json, response.headers.get('Content-Crs'), base_url, out_epsg)
 
-                return 200, await response.json()
+            return 200, json
     except asyncio.TimeoutError:
         return 408, None
     except Exception as err:
@@ -36,4 +148,25 @@ async def _query_ogc_api(url: str, timeout: int) -> Tuple[int, Dict]:
         return 500, None
 
 
-__all__ = ['query_ogc_api']
+def _add_content_crs(json: Dict, content_crs: str, base_url: HttpUrl, out_epsg: int) -> None:
+    if not isinstance(json, dict):
+        return
+
+    if content_crs:
+        epsg = get_epsg({'crs': {'properties': {'name': content_crs.strip('<> ')}}})
+        json.pop('crs', None)
+
+        if epsg == out_epsg and out_epsg != WGS84_EPSG:
+            set_confirmed(base_url, OUTPUT_CRS)
+    elif 'crs' in json:
+        return
+    elif is_confirmed(base_url, OUTPUT_CRS):
+        epsg = out_epsg
+    else:
+        # Servers that do not implement crs= return CRS84, as OGC API - Features requires
+        epsg = WGS84_EPSG
+
+    add_geojson_crs(json, epsg)
+
+
+__all__ = ['query_ogc_api', 'query_ogc_api_features', 'query_ogc_api_hits']
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import List, Tuple, Callable, Awaitable, Any
+from ..utils.constants import PAGE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+_MAX_PAGES = 100
+
+
+class Page:
+    def __init__(self, items: List[Any], size: int = None, number_matched: int = None, next: Any = None, seekable: bool = True, key: Any = None):
+        self.items = items
+        self.size = size if size is not None else len(items)
+        self.number_matched = number_matched
+        self.next = next
+        self.seekable = seekable
+        self.key = key
+
+
+_FetchPage = Callable[[Any], Awaitable[Tuple[int, Page]]]
+_CountMatched = Callable[[], Awaitable[Tuple[int, int]]]
+
+
+def get_page_size(page_size: int = None) -> int:
+    return page_size if page_size else PAGE_SIZE
+
+
+async def fetch_pages(fetch_page: _FetchPage, count_matched: _CountMatched = None) -> Tuple[int, List[Any]]:
+    status_code, page = await fetch_page(None)
+
+    if status_code != 200:
+        return status_code, None
+
+    items = list(page.items)
+
+    if page.next is None or page.size == 0:
+        return 200, items
+
+    number_matched = page.number_matched
+
+    if number_matched is None and page.seekable and count_matched is not None:
+        status_code, number_matched = await count_matched()
+
+        if status_code != 200:
+            number_matched = None
+
+    if page.seekable and number_matched is not None:
+        offsets = range(page.size, number_matched, page.size)
+
+        if len(offsets) >= _MAX_PAGES:
+            _LOGGER.warning(f'{number_matched} features exceed the limit of {_MAX_PAGES} pages')
+            return 206, None
+
+        status_code, pages = await _fetch_concurrently(fetch_page, offsets)
+
+        if status_code == 200 and any(_is_repeated(page, other) for other in pages):
+            _LOGGER.warning(f'Paging ignored by the server, {number_matched} features cannot be fetched')
+            return 206, None
+    else:
+        status_code, pages = await _fetch_sequentially(fetch_page, page, number_matched)
+
+    # A rejected page leaves the result incomplete
+    if status_code == 400:
+        _LOGGER.warning(f'Paging rejected by the server after {len(items)} features')
+        return 206, None
+
+    if status_code != 200:
+        return status_code, None
+
+    for page in pages:
+        items.extend(page.items)
+
+    return 200, items
+
+
+async def _fetch_concurrently(fetch_page: _FetchPage, offsets: List[int]) -> Tuple[int, List[Page]]:
+    tasks = [asyncio.create_task(fetch_page(offset)) for offset in offsets]
+    pages: List[Page] = []
+
+    try:
+        for task in tasks:
+            status_code, page = await task
+
+            if status_code != 200:
+                return status_code, None
+
+            pages.append(page)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return 200, pages
+
+
+async def _fetch_sequentially(fetch_page: _FetchPage, page: Page, number_matched: int = None) -> Tuple[int, List[Page]]:
+    pages: List[Page] = []
+
+    while page.next is not None and page.size > 0 and len(pages) + 1 < _MAX_PAGES:
+        status_code, next_page = await fetch_page(page.next)
+
+        if status_code != 200:
+            return status_code, None
+
+        # A server that ignores the offset returns the same page again
+        if _is_repeated(page, next_page):
+            _LOGGER.warning(f'Paging ignored by the server, stopped after {len(pages) + 1} pages')
+            return (206 if number_matched is not None else 200), pages
+
+        pages.append(next_page)
+        page = next_page
+
+    if page.next is not None and page.size > 0:
+        _LOGGER.warning(f'Stopped paging after {_MAX_PAGES} pages')
+        return 206, None
+
+    return 200, pages
+
+
+def _is_repeated(page: Page, other: Page) -> bool:
+    return page.key is not None and page.key == other.key
+
+
+__all__ = ['Page', 'get_page_size', 'fetch_pages']
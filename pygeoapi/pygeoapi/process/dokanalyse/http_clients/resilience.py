@@ -0,0 +1,189 @@
+import time
+import asyncio
+import logging
+from enum import Enum
+from contextvars import ContextVar
+from urllib.parse import urlparse
+from typing import List, Tuple, Dict, Callable, Awaitable, Any
+from ..utils.helpers.deadline import get_timeout
+
+_LOGGER = logging.getLogger(__name__)
+
+_INITIAL_LIMIT = 8
+_MIN_LIMIT = 1
+_MAX_LIMIT = 20
+_BACKOFF_RATIO = 0.5
+_LATENCY_BACKOFF_RATIO = 0.9
+_LATENCY_TOLERANCE = 2.0
+_LATENCY_SMOOTHING = 0.1
+_FAILURE_THRESHOLD = 5
+_COOL_DOWN = 30
+
+_responded_ctx_var: ContextVar[List[float]] = ContextVar(
+    'responded', default=None)
+
+
+class CircuitState(str, Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class _HostState:
+    def __init__(self, host: str):
+        self.host = host
+        self.limit: float = _INITIAL_LIMIT
+        self.in_flight = 0
+        self.latency: float = None
+        self.circuit = CircuitState.CLOSED
+        self.opened_at: float = None
+        self.failures = 0
+        self.last_failure: int = None
+        self.requests = 0
+        self.rejected = 0
+        self.__waiters: List[asyncio.Future] = []
+
+    def reject(self) -> int:
+        if self.circuit == CircuitState.CLOSED:
+            return None
+
+        now = time.monotonic()
+
+        if now - self.opened_at >= _COOL_DOWN:
+            self.circuit = CircuitState.HALF_OPEN
+            self.opened_at = now
+            return None
+
+        self.rejected += 1
+
+        return self.last_failure
+
+    async def acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self.__waiters.append(waiter)
+            await waiter
+
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        waiters, self.__waiters = self.__waiters, []
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def record(self, status_code: int, latency: float) -> None:
+        self.requests += 1
+
+        if status_code == 408 or status_code >= 500:
+            self.__record_failure(status_code)
+        else:
+            self.__record_success(latency)
+
+    def to_dict(self) -> Dict:
+        return {
+            'circuit': self.circuit.value,
+            'limit': int(self.limit),
+            'inFlight': self.in_flight,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'failures': self.failures,
+            'requests': self.requests,
+            'rejected': self.rejected
+        }
+
+    def __record_success(self, latency: float) -> None:
+        self.failures = 0
+
+        if self.circuit != CircuitState.CLOSED:
+            _LOGGER.info(f'Circuit closed for {self.host}')
+            self.circuit = CircuitState.CLOSED
+
+        if self.latency is None:
+            self.latency = latency
+        elif latency > self.latency * _LATENCY_TOLERANCE:
+            self.limit = max(self.limit * _LATENCY_BACKOFF_RATIO, _MIN_LIMIT)
+        else:
+            self.limit = min(self.limit + 1 / self.limit, _MAX_LIMIT)
+
+        self.latency += (latency - self.latency) * _LATENCY_SMOOTHING
+
+    def __record_failure(self, status_code: int) -> None:
+        self.failures += 1
+        self.last_failure = status_code
+        self.limit = max(self.limit * _BACKOFF_RATIO, _MIN_LIMIT)
+
+        if self.circuit == CircuitState.HALF_OPEN or self.failures >= _FAILURE_THRESHOLD:
+            if self.circuit != CircuitState.OPEN:
+                _LOGGER.warning(
+                    f'Circuit opened for {self.host} after {self.failures} failures')
+
+            self.circuit = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+
+_hosts: Dict[str, _HostState] = {}
+
+
+async def send_request(url: str, timeout: float, request: Callable[[float], Awaitable[Tuple[int, Any]]]) -> Tuple[int, Any]:
+    budget = get_timeout(timeout)
+
+    if budget <= 0:
+        return 408, None
+
+    host = _get_host_state(url)
+    status_code = host.reject()
+
+    if status_code is not None:
+        return status_code, None
+
+    start = time.monotonic()
+
+    try:
+        async with asyncio.timeout(budget):
+            await host.acquire()
+    except TimeoutError:
+        return 408, None
+
+    responded: List[float] = []
+    token = _responded_ctx_var.set(responded)
+
+    try:
+        sent = time.monotonic()
+        status_code, response = await request(budget - (sent - start))
+        latency = (responded[0] if responded else time.monotonic()) - sent
+
+        # A timeout caused by the request deadline says nothing about the host
+        if status_code != 408 or budget == timeout:
+            host.record(status_code, latency)
+
+        return status_code, response
+    finally:
+        _responded_ctx_var.reset(token)
+        host.release()
+
+
+def mark_response_received() -> None:
+    # Latency is measured to the response headers, so reading and parsing large bodies does not count as slowness
+    responded = _responded_ctx_var.get()
+
+    if responded is not None and not responded:
+        responded.append(time.monotonic())
+
+
+def get_host_health() -> Dict[str, Dict]:
+    return {name: host.to_dict() for name, host in _hosts.items()}
+
+
+def _get_host_state(url: str) -> _HostState:
+    name = urlparse(str(url)).netloc
+    host = _hosts.get(name)
+
+    if host is None:
+        host = _hosts[name] = _HostState(name)
+
+    return host
+
+
+__all__ = ['CircuitState', 'send_request', 'mark_response_received', 'get_host_health']
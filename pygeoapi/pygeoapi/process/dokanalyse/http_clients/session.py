@@ -0,0 +1,43 @@
+import asyncio
+from typing import Dict
+import aiohttp
+
+_LIMIT = 100
+_LIMIT_PER_HOST = 20
+_DNS_CACHE_TTL = 300
+_KEEPALIVE_TIMEOUT = 30
+
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def get_session() -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+
+    if session is None or session.closed:
+        session = _create_session()
+        _sessions[loop] = session
+
+    return session
+
+
+async def close_session() -> None:
+    loop = asyncio.get_running_loop()
+    session = _sessions.pop(loop, None)
+
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=_LIMIT,
+        limit_per_host=_LIMIT_PER_HOST,
+        ttl_dns_cache=_DNS_CACHE_TTL,
+        keepalive_timeout=_KEEPALIVE_TIMEOUT
+    )
+
+    return aiohttp.ClientSession(connector=connector)
+
+
+__all__ = ['get_session', 'close_session']
@@ -1,47 +1,265 @@
 from os import path
+from functools import lru_cache
+from xml.sax.saxutils import escape
 import logging
-from typing import Tuple
+from typing import Tuple, List, Callable, Any
 from pydantic import HttpUrl
-import aiohttp
 import asyncio
+from lxml import etree as ET
 from osgeo import ogr
+from .session import get_session
+from ..utils.helpers.filter import Filter
+from ..utils.helpers.geometry_context import GeometryContext, to_gml
+from .resilience import send_request, mark_response_received
+from .wfs_planner import get_wfs_query_planner
+from .pagination import Page, get_page_size, fetch_pages
 
 _LOGGER = logging.getLogger(__name__)
 
+_MEMBER_TAG = '{http://www.opengis.net/wfs/2.0}member'
+_FEATURE_COLLECTION_TAG = '{http://www.opengis.net/wfs/2.0}FeatureCollection'
+_CHUNK_SIZE = 65536
 
-async def query_wfs(url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, timeout: int = 30) -> Tuple[int, str]:
-    gml_str = geometry.ExportToGML(['FORMAT=GML3'])
-    request_xml = _create_wfs_request_xml(layer, geom_field, gml_str, epsg)
 
-    return await _query_wfs(url, request_xml, timeout)
+async def query_wfs(url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, timeout: int = 30, context: GeometryContext = None) -> Tuple[int, str]:
+    gml_str = to_gml(geometry, context)
+    query_xml = _create_query_xml(
+        layer, geom_field, gml_str, epsg, None, None)
 
+    return await _query_wfs(url, _create_request_xml([query_xml]), timeout)
 
-def _create_wfs_request_xml(layer: str, geom_field: str, gml_str: str, epsg: int) -> str:
+
+async def query_wfs_members(url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, map_member: Callable[[ET._Element], Any], filter: Filter = None, property_names: List[str] = None, timeout: int = 30, context: GeometryContext = None, page_size: int = None, sort_by: str = None) -> Tuple[int, List[Any]]:
+    gml_str = to_gml(geometry, context)
+    query_xml = _create_query_xml(
+        layer, geom_field, gml_str, epsg, filter, property_names, sort_by)
+
+    async def send(queries: List[str], map_member: Callable[[ET._Element], Any]) -> Tuple[int, List[Any]]:
+        if len(queries) == 1:
+            return await _stream_wfs_pages(url, queries[0], map_member, get_page_size(page_size), sort_by is not None, timeout)
+
+        status_code, page = await _stream_wfs(url, _create_request_xml(queries), map_member, timeout)
+
+        if status_code != 200:
+            return status_code, None
+
+        # The server capped the combined response, the queries must be paged separately
+        if page.number_matched is not None and page.number_matched > page.size:
+            return 206, None
+
+        return 200, page.items
+
+    planner = get_wfs_query_planner()
+
+    if planner is None:
+        return await send([query_xml], map_member)
+
+    return await planner.submit(url, layer, query_xml, map_member, send)
+
+
+async def query_wfs_hits(url: HttpUrl, layer: str, geom_field: str, geometry: ogr.Geometry, epsg: int, filter: Filter = None, timeout: int = 30, context: GeometryContext = None) -> Tuple[int, int]:
+    gml_str = to_gml(geometry, context)
+    query_xml = _create_query_xml(
+        layer, geom_field, gml_str, epsg, filter, None)
+
+    status_code, response = await _query_wfs(url, _create_request_xml([query_xml], 'hits'), timeout)
+
+    if status_code != 200:
+        return status_code, None
+
+    return _parse_number_matched(response)
+
+
+def _create_request_xml(queries: List[str], result_type: str = 'results', count: int = None, start_index: int = None) -> bytes:
+    file_text = _read_template('wfs_request.xml.txt')
+    paging = ''
+
+    if count is not None:
+        paging += f' count="{count}"'
+
+    if start_index:
+        paging += f' startIndex="{start_index}"'
+
+    return file_text.format(queries='\n   '.join(queries), result_type=result_type, paging=paging).encode('utf-8')
+
+
+def _create_query_xml(layer: str, geom_field: str, gml_str: str, epsg: int, filter: Filter, property_names: List[str], sort_by: str = None) -> str:
+    file_text = _read_template('wfs_query.xml.txt')
+
+    intersects = f'<fes:Intersects><fes:ValueReference>{geom_field}</fes:ValueReference>{gml_str}</fes:Intersects>'
+    fes_filter = f'<fes:And>{intersects}{filter.to_fes()}</fes:And>' if filter is not None else intersects
+
+    projection = ''.join(
+        f'<wfs:PropertyName>{escape(name)}</wfs:PropertyName>' for name in property_names or [])
+
+    sorting = f'<fes:SortBy><fes:SortProperty><fes:ValueReference>{escape(sort_by)}</fes:ValueReference></fes:SortProperty></fes:SortBy>' if sort_by else ''
+
+    return file_text.format(layer=layer, projection=projection, filter=fes_filter, sort_by=sorting, epsg=epsg)
+
+
+@lru_cache(maxsize=2)
+def _read_template(filename: str) -> str:
     dir_path = path.dirname(path.realpath(__file__))
-    file_path = path.join(dir_path, 'wfs_request.xml.txt')
+    file_path = path.join(dir_path, filename)
 
     with open(file_path, 'r') as file:
-        file_text = file.read()
+        return file.read()
+
+
+def _parse_number_matched(response: str) -> Tuple[int, int]:
+    try:
+        root = ET.fromstring(response.encode('utf-8'), ET.XMLParser(huge_tree=True))
+    except ET.XMLSyntaxError as err:
+        _LOGGER.error(err)
+        return 500, None
+
+    if ET.QName(root).localname == 'ExceptionReport':
+        return 400, None
 
-    return file_text.format(layer=layer,  geom_field=geom_field, geometry=gml_str, epsg=epsg).encode('utf-8')
+    return 200, _get_number_matched(root)
+
+
+def _get_number_matched(root: ET._Element) -> int:
+    number_matched = root.get('numberMatched')
+
+    if number_matched is None or not number_matched.isdigit():
+        return None
+
+    return int(number_matched)
 
 
 async def _query_wfs(url: HttpUrl, xml_body: str, timeout: int) -> Tuple[int, str]:
+    return await send_request(url, timeout, lambda timeout: _post_wfs(url, xml_body, timeout))
+
+
+async def _post_wfs(url: HttpUrl, xml_body: str, timeout: int) -> Tuple[int, str]:
     url = f'{url}?service=WFS&version=2.0.0'
     headers = {'Content-Type': 'application/xml'}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=xml_body, headers=headers, timeout=timeout) as response:
-                if response.status != 200:
-                    return response.status, None
+        session = get_session()
+
+        async with session.post(url, data=xml_body, headers=headers, timeout=timeout) as response:
+            mark_response_received()
+
+            if response.status != 200:
+                return response.status, None
 
-                return 200, await response.text()
+            return 200, await response.text()
     except asyncio.TimeoutError:
         return 408, None
     except Exception as err:
-        _LOGGER.error(err)        
+        _LOGGER.error(err)
         return 500, None
 
 
-__all__ = ['query_wfs']
+async def _stream_wfs_pages(url: HttpUrl, query_xml: str, map_member: Callable[[ET._Element], Any], page_size: int, seekable: bool, timeout: int) -> Tuple[int, List[Any]]:
+    count: int = None
+
+    async def fetch_page(start_index: int) -> Tuple[int, Page]:
+        nonlocal count
+
+        # Paging parameters are only sent once the server has capped the first page
+        if start_index is None:
+            xml_body = _create_request_xml([query_xml])
+        else:
+            xml_body = _create_request_xml(
+                [query_xml], count=count, start_index=start_index)
+
+        status_code, page = await _stream_wfs(url, xml_body, map_member, timeout)
+
+        if status_code != 200:
+            return status_code, None
+
+        # Without a stable sort order, concurrent pages may overlap or skip features
+        page.seekable = seekable
+        start_index = start_index or 0
+
+        if _has_more(page, start_index, count or page_size):
+            count = count or page.size
+            page.next = start_index + page.size
+
+        return status_code, page
+
+    return await fetch_pages(fetch_page)
+
+
+def _has_more(page: Page, start_index: int, page_size: int) -> bool:
+    if page.number_matched is not None:
+        return start_index + page.size < page.number_matched
+
+    return page.size >= page_size
+
+
+async def _stream_wfs(url: HttpUrl, xml_body: str, map_member: Callable[[ET._Element], Any], timeout: int) -> Tuple[int, Page]:
+    return await send_request(url, timeout, lambda timeout: _post_wfs_stream(url, xml_body, map_member, timeout))
+
+
+async def _post_wfs_stream(url: HttpUrl, xml_body: str, map_member: Callable[[ET._Element], Any], timeout: int) -> Tuple[int, Page]:
+    url = f'{url}?service=WFS&version=2.0.0'
+    headers = {'Content-Type': 'application/xml'}
+
+    try:
+        session = get_session()
+
+        async with session.post(url, data=xml_body, headers=headers, timeout=timeout) as response:
+            mark_response_received()
+
+            if response.status != 200:
+                return response.status, None
+
+            parser = ET.XMLPullParser(
+                events=('end',), tag=_MEMBER_TAG, huge_tree=True)
+            members: List[Any] = []
+            keys: List[bytes] = []
+            size = 0
+
+            async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                parser.feed(chunk)
+                size += _read_members(parser, map_member, members, keys)
+
+            root = parser.close()
+            size += _read_members(parser, map_member, members, keys)
+
+            if root is not None and ET.QName(root).localname == 'ExceptionReport':
+                _LOGGER.error(f'WFS exception report from {url}')
+                return 400, None
+
+            number_matched = _get_number_matched(root) if root is not None else None
+
+            return 200, Page(members, size, number_matched, key=keys[0] if keys else None)
+    except asyncio.TimeoutError:
+        return 408, None
+    except Exception as err:
+        _LOGGER.error(err)
+        return 500, None
+
+
+def _read_members(parser: ET.XMLPullParser, map_member: Callable[[ET._Element], Any], members: List[Any], keys: List[bytes] = None) -> int:
+    count = 0
+
+    for _, elem in parser.read_events():
+        feature = next((child for child in elem if isinstance(child.tag, str)), None)
+
+        # Multi-query responses wrap each query's members in an outer wfs:member
+        if feature is not None and feature.tag != _FEATURE_COLLECTION_TAG:
+            count += 1
+
+            # The first feature identifies the page when checking that the server honours startIndex
+            if keys is not None and not keys:
+                keys.append(ET.tostring(feature))
+
+            result = map_member(elem)
+
+            if result is not None:
+                members.append(result)
+
+        elem.clear(keep_tail=True)
+
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+    return count
+
+
+__all__ = ['query_wfs', 'query_wfs_members', 'query_wfs_hits']
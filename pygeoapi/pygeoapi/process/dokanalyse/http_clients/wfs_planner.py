@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import List, Dict, Set, Tuple, Callable, Awaitable, Any
+from lxml import etree as ET
+from .capabilities import MULTI_QUERY, is_supported, set_unsupported
+
+_LOGGER = logging.getLogger(__name__)
+
+_BATCH_WINDOW = 0.02
+_MAX_QUERIES = 20
+
+_planner_ctx_var: ContextVar['WfsQueryPlanner'] = ContextVar(
+    'wfs_query_planner', default=None)
+
+_SendQueries = Callable[[List[str], Callable[[ET._Element], Any]], Awaitable[Tuple[int, List[Any]]]]
+
+
+class _PlannedQuery:
+    def __init__(self, type_name: str, query_xml: str, map_member: Callable[[ET._Element], Any], send: _SendQueries):
+        self.type_name = type_name.split(':')[-1]
+        self.query_xml = query_xml
+        self.map_member = map_member
+        self.send = send
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class WfsQueryPlanner:
+    def __init__(self):
+        self.__pending: Dict[str, List[_PlannedQuery]] = {}
+        self.__tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.queries = 0
+
+    async def submit(self, url: str, type_name: str, query_xml: str, map_member: Callable[[ET._Element], Any], send: _SendQueries) -> Tuple[int, List[Any]]:
+        if not is_supported(url, MULTI_QUERY):
+            return await send([query_xml], map_member)
+
+        key = str(url)
+        query = _PlannedQuery(type_name, query_xml, map_member, send)
+        pending = self.__pending.setdefault(key, [])
+        pending.append(query)
+
+        if len(pending) == 1:
+            asyncio.get_running_loop().call_later(
+                _BATCH_WINDOW, self.__flush, key)
+        elif len(pending) >= _MAX_QUERIES:
+            self.__flush(key)
+
+        return await query.future
+
+    def __flush(self, key: str) -> None:
+        queries = [query for query in self.__pending.pop(key, [])
+                   if not query.future.done()]
+
+        for batch in _plan_batches(queries):
+            task = asyncio.create_task(self.__send_batch(key, batch))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def __send_batch(self, url: str, batch: List[_PlannedQuery]) -> None:
+        self.requests += 1
+        self.queries += len(batch)
+
+        try:
+            if len(batch) == 1:
+                query = batch[0]
+                _set_result(query, await query.send([query.query_xml], query.map_member))
+                return
+
+            status_code, members = await batch[0].send(
+                [query.query_xml for query in batch], _create_member_mapper(batch))
+
+            if status_code == 200:
+                _set_batch_results(batch, members)
+            elif status_code in [400, 206]:
+                await self.__send_separately(url, batch, status_code == 400)
+            else:
+                for query in batch:
+                    _set_result(query, (status_code, None))
+        except Exception as err:
+            for query in batch:
+                if not query.future.done():
+                    query.future.set_exception(err)
+
+    async def __send_separately(self, url: str, batch: List[_PlannedQuery], rejected: bool) -> None:
+        if rejected:
+            _LOGGER.warning(
+                f'Multi-query GetFeature rejected by {url}, sending {len(batch)} queries separately')
+        else:
+            _LOGGER.info(
+                f'Multi-query GetFeature truncated by {url}, sending {len(batch)} queries separately')
+
+        results = await asyncio.gather(*[query.send([query.query_xml], query.map_member) for query in batch])
+        self.requests += len(batch)
+
+        if rejected and all(status_code != 400 for status_code, _ in results):
+            set_unsupported(url, MULTI_QUERY)
+
+        for query, result in zip(batch, results):
+            _set_result(query, result)
+
+
+def set_wfs_query_planner(planner: WfsQueryPlanner) -> None:
+    _planner_ctx_var.set(planner)
+
+
+def get_wfs_query_planner() -> WfsQueryPlanner:
+    return _planner_ctx_var.get()
+
+
+def _plan_batches(queries: List[_PlannedQuery]) -> List[List[_PlannedQuery]]:
+    batches: List[List[_PlannedQuery]] = []
+
+    for query in queries:
+        batch = next((batch for batch in batches if len(batch) < _MAX_QUERIES and all(
+            other.type_name != query.type_name for other in batch)), None)
+
+        if batch is None:
+            batches.append([query])
+        else:
+            batch.append(query)
+
+    return batches
+
+
+def _create_member_mapper(batch: List[_PlannedQuery]) -> Callable[[ET._Element], Any]:
+    queries = {query.type_name: query for query in batch}
+
+    def map_member(member: ET._Element) -> Tuple[_PlannedQuery, Any]:
+        feature = next((child for child in member if isinstance(child.tag, str)), None)
+
+        if feature is None:
+            return None
+
+        query = queries.get(ET.QName(feature).localname)
+
+        if query is None or query.future.done():
+            return None
+
+        result = query.map_member(member)
+
+        return (query, result) if result is not None else None
+
+    return map_member
+
+
+def _set_batch_results(batch: List[_PlannedQuery], members: List[Tuple[_PlannedQuery, Any]]) -> None:
+    results: Dict[int, List[Any]] = {id(query): [] for query in batch}
+
+    for query, result in members:
+        results[id(query)].append(result)
+
+    for query in batch:
+        _set_result(query, (200, results[id(query)]))
+
+
+def _set_result(query: _PlannedQuery, result: Tuple[int, List[Any]]) -> None:
+    if not query.future.done():
+        query.future.set_result(result)
+
+
+__all__ = ['WfsQueryPlanner', 'set_wfs_query_planner', 'get_wfs_query_planner']
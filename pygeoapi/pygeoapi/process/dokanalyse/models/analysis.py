@@ -1,22 +1,39 @@
+import time
+import logging
+import asyncio
+from sys import maxsize
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from uuid import UUID
 from osgeo import ogr
+from cachetools import TTLCache
 from .quality_measurement import QualityMeasurement
 from .metadata import Metadata
 from .exceptions import DokAnalysisException
 from .result_status import ResultStatus
 from .config.dataset_config import DatasetConfig
+from .config.layer import Layer
+from .config.hit_area_method import HitAreaMethod
 from .config.quality_indicator_type import QualityIndicatorType
 from ..utils.helpers.common import keys_to_camel_case
-from ..utils.helpers.geometry import create_buffered_geometry, create_run_on_input_geometry_json
+from ..utils.helpers.geometry_context import GeometryContext
+from ..utils.helpers.hit_area import get_hit_area
+from ..utils.helpers.nearest import get_distance_to_nearest
 from ..utils.helpers.map_image import create_payload_for_analysis
-from ..services.config import get_quality_indicator_configs
+from ..services.config import get_quality_indicator_configs, get_quality_indicator_configs_by_type
 from ..services.kartkatalog import get_kartkatalog_metadata
 from ..services.quality.coverage_quality import get_coverage_quality
 from ..services.quality.dataset_quality import get_dataset_quality
 from ..services.quality.object_quality import get_object_quality
 from ..services.map_image import create_map_image
+from ..services.geolett import get_geolett_data
+from ..services.raster_result import get_wms_url, get_cartography_url
+from ..services.result_cache import create_cache_key, get_cached_result, set_cached_result
+
+_LOGGER = logging.getLogger(__name__)
+
+_DISTANCE_RINGS = [500, 2000, 20000]
+_DISTANCE_CACHE = TTLCache(maxsize=1024, ttl=3600)
 
 _QMS_SORT_ORDER = [
     'fullstendighet_dekning',
@@ -28,10 +45,12 @@ _QMS_SORT_ORDER = [
 
 
 class Analysis(ABC):
-    def __init__(self, dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int):
+    def __init__(self, dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int, geometry_context: GeometryContext = None):
         self.dataset_id = dataset_id
         self.config = config
         self.geometry = geometry
+        self.geometry_context = geometry_context or (GeometryContext(
+            geometry, epsg, buffer) if geometry is not None else None)
         self.run_on_input_geometry: ogr.Geometry = None
         self.epsg = epsg
         self.orig_epsg = orig_epsg
@@ -60,6 +79,7 @@ class Analysis(ABC):
         self.result_status: ResultStatus = ResultStatus.NO_HIT_GREEN
         self.coverage_statuses: List[str] = []
         self.has_coverage: bool = True
+        self.__probe_results: Dict[int, Tuple[int, int, float]] = {}
 
     async def run(self, context, include_guidance, include_quality_measurement) -> None:
         self.__set_input_geometry()
@@ -82,8 +102,8 @@ class Analysis(ABC):
 
         self._add_run_algorithm('deliver result')
 
-        self.run_on_input_geometry_json = create_run_on_input_geometry_json(
-            self.run_on_input_geometry, self.epsg, self.orig_epsg)
+        self.run_on_input_geometry_json = self.geometry_context.to_geojson(
+            self.run_on_input_geometry, self.orig_epsg)
 
         await self.set_default_data()
 
@@ -95,13 +115,226 @@ class Analysis(ABC):
 
         if self.raster_result_map:
             payload = create_payload_for_analysis(
-                self.geometry, self.buffer, self.raster_result_map)
+                self.geometry_context, self.raster_result_map)
             _, result = await create_map_image(payload)
             self.raster_result_image_bytes = result
 
     def _add_run_algorithm(self, algorithm) -> None:
         self.run_algorithm.append(algorithm)
 
+    async def _run_layer_queries(self, service_url: str) -> None:
+        first_layer = self.config.layers[0]
+        geolett_data = await get_geolett_data(first_layer.geolett_id)
+        self._add_run_algorithm(f'query {service_url}')
+
+        if self.config.speculative_queries:
+            hit = await self.__run_speculative_queries()
+        else:
+            hit = await self.__run_sequential_queries()
+
+        if hit is not None:
+            layer, response = hit
+            geolett_data = await get_geolett_data(layer.geolett_id)
+
+            self.data = response['properties']
+            self.geometries = response['geometries']
+            self.raster_result_map = get_wms_url(self.config.wms, layer.wms)
+            self.cartography = await get_cartography_url(self.config.wms, layer.wms)
+            self.result_status = layer.result_status
+
+        self.geolett = geolett_data
+
+    async def __run_sequential_queries(self) -> Tuple[Layer, Dict[str, List]]:
+        start = time.time()
+        queried = 0
+        hit = None
+
+        for layer in self.config.layers:
+            status_code, response = await self.__query_layer(layer, self.run_on_input_geometry)
+            queried += 1
+
+            should_stop, hit = self.__evaluate_layer_response(layer, status_code, response)
+
+            if should_stop:
+                break
+
+        end = time.time()
+
+        # autopep8: off
+        _LOGGER.info(f'Sequential queries: {self.config.name}: {queried} of {len(self.config.layers)} layers queried, {round(end - start, 2)} sec.')
+        # autopep8: on
+
+        return hit
+
+    async def __run_speculative_queries(self) -> Tuple[Layer, Dict[str, List]]:
+        start = time.time()
+        layers = self.config.layers
+        tasks = [asyncio.create_task(self.__query_layer(layer, self.run_on_input_geometry)) for layer in layers]
+        hit = None
+        resolved = 0
+
+        try:
+            for layer, task in zip(layers, tasks):
+                status_code, response = await task
+                resolved += 1
+
+                should_stop, hit = self.__evaluate_layer_response(layer, status_code, response)
+
+                if should_stop:
+                    break
+        finally:
+            wasted, cancelled = self.__cancel_queries(tasks[resolved:])
+
+        end = time.time()
+
+        # autopep8: off
+        _LOGGER.info(f'Speculative queries: {self.config.name}: {resolved} of {len(layers)} layers used, {wasted} wasted, {cancelled} cancelled, {round(end - start, 2)} sec.')
+        # autopep8: on
+
+        return hit
+
+    def __evaluate_layer_response(self, layer: Layer, status_code: int, response: Dict[str, List]) -> Tuple[bool, Tuple[Layer, Dict[str, List]]]:
+        layer_name = self._get_layer_name(layer)
+        probe_result = self.__probe_results.pop(id(layer), None)
+
+        if probe_result is not None:
+            self._add_run_algorithm(
+                self.__format_probe_result(layer_name, *probe_result))
+
+        if layer.filter is not None:
+            self._add_run_algorithm(f'add filter {layer.filter}')
+
+        if status_code == 408:
+            self.result_status = ResultStatus.TIMEOUT
+            self._add_run_algorithm(f'intersects layer {layer_name} (Timeout)')
+            return True, None
+        elif status_code == 206:
+            self.result_status = ResultStatus.ERROR
+            self._add_run_algorithm(f'intersects layer {layer_name} (Incomplete)')
+            return True, None
+        elif status_code != 200:
+            self.result_status = ResultStatus.ERROR
+            self._add_run_algorithm(f'intersects layer {layer_name} (Error)')
+            return True, None
+
+        if response is not None and len(response['properties']) > 0:
+            self._add_run_algorithm(f'intersects layer {layer_name} (True)')
+            return True, (layer, response)
+
+        self._add_run_algorithm(f'intersects layer {layer_name} (False)')
+
+        return False, None
+
+    async def _set_distance_to_object(self) -> None:
+        layer = self.config.layers[0]
+        cache_key = self.__get_distance_cache_key(layer)
+        distance = _DISTANCE_CACHE.get(cache_key)
+
+        if distance is None:
+            distance = await self.__get_distance_to_nearest_object(layer)
+
+            # A failed ring query says nothing about the distance, so it is neither set nor cached
+            if distance is None:
+                _LOGGER.error(f'Could not get the distance to the nearest object: {self.config.name}')
+                return
+
+            _DISTANCE_CACHE[cache_key] = distance
+
+        self._add_run_algorithm('get distance to nearest object')
+        self.distance_to_object = distance
+
+    async def __get_distance_to_nearest_object(self, layer: Layer) -> int:
+        for ring in _DISTANCE_RINGS:
+            buffered_geom = self.geometry_context.get_buffered(self.buffer + ring)
+
+            # Only the resulting distance is cached, the ring responses can be large
+            status_code, response = await self.__query_layer(layer, buffered_geom, False)
+
+            if status_code != 200:
+                return None
+
+            if response is None:
+                continue
+
+            distance = get_distance_to_nearest(
+                self.run_on_input_geometry, response['geometries'], self.geometry_context)
+
+            if distance is None:
+                continue
+
+            self._add_run_algorithm(f'search for nearest object within {ring} m')
+
+            return round(distance)
+
+        return maxsize
+
+    def __get_distance_cache_key(self, layer: Layer) -> Tuple:
+        geometry_wkb = self.geometry_context.to_wkb(self.run_on_input_geometry)
+
+        return (self.__get_service_url(), self._get_layer_name(layer), layer.filter, geometry_wkb, self.epsg)
+
+    async def __query_layer(self, layer: Layer, geometry: ogr.Geometry, use_cache: bool = True) -> Tuple[int, Dict[str, List]]:
+        ttl = self.config.result_cache_ttl if use_cache else None
+        cache_key = None
+
+        if ttl:
+            cache_key = create_cache_key(
+                self.__get_service_url(), self._get_layer_name(layer), layer.filter, geometry, self.epsg, self.geometry_context)
+            response = get_cached_result(cache_key)
+
+            if response is not None:
+                return 200, response
+
+        if self.config.probe_queries and await self.__probe_layer(layer, geometry) == 0:
+            status_code, response = 200, {'properties': [], 'geometries': []}
+        else:
+            status_code, response = await self._query_layer(layer, geometry)
+
+        if cache_key is not None and status_code == 200 and response is not None:
+            set_cached_result(cache_key, response, ttl)
+
+        return status_code, response
+
+    async def __probe_layer(self, layer: Layer, geometry: ogr.Geometry) -> int:
+        start = time.time()
+        status_code, count = await self._probe_layer(layer, geometry)
+        end = time.time()
+
+        if geometry is self.run_on_input_geometry:
+            # Several layers may share a service layer with different filters
+            self.__probe_results[id(layer)] = (
+                status_code, count, round(end - start, 2))
+
+        return count if status_code == 200 else None
+
+    def __format_probe_result(self, layer_name: str, status_code: int, count: int, secs: float) -> str:
+        if status_code != 200:
+            return f'probe layer {layer_name} (Error {status_code}, {secs} sec.)'
+
+        if count is None:
+            return f'probe layer {layer_name} (unknown hit count, {secs} sec.)'
+
+        return f'probe layer {layer_name} ({count} hits, {secs} sec.)'
+
+    def __get_service_url(self) -> str:
+        return str(self.config.wfs or self.config.arcgis or self.config.ogc_api)
+
+    def __cancel_queries(self, tasks: List[asyncio.Task]) -> Tuple[int, int]:
+        wasted = 0
+        cancelled = 0
+
+        for task in tasks:
+            if task.done():
+                wasted += 1
+
+                if not task.cancelled():
+                    task.exception()
+            else:
+                task.cancel()
+                cancelled += 1
+
+        return wasted, cancelled
+
     async def set_default_data(self) -> None:
         self.title = self.geolett.get(
             'tittel') if self.geolett else self.config.title
@@ -109,13 +342,8 @@ class Analysis(ABC):
         self.run_on_dataset = await get_kartkatalog_metadata(self.config.metadata_id)
 
     async def __run_coverage_analysis(self) -> None:
-        quality_indicators = get_quality_indicator_configs(self.dataset_id)
-
-        if len(quality_indicators) == 0:
-            return
-
-        coverage_indicators = [
-            indicator for indicator in quality_indicators if indicator.type == QualityIndicatorType.COVERAGE]
+        coverage_indicators = get_quality_indicator_configs_by_type(
+            self.dataset_id, QualityIndicatorType.COVERAGE)
 
         if len(coverage_indicators) == 0:
             return
@@ -126,7 +354,7 @@ class Analysis(ABC):
         ci = coverage_indicators[0]
 
         self._add_run_algorithm(f'check coverage {ci.wfs.url}')
-        measurements, warning, has_coverage = await get_coverage_quality(ci, self.run_on_input_geometry, self.epsg)
+        measurements, warning, has_coverage = await get_coverage_quality(ci, self.run_on_input_geometry, self.epsg, self.geometry_context)
         self._add_run_algorithm(f'intersects layer {ci.wfs.layer} ({has_coverage})')
 
         self.quality_measurement.extend(measurements)
@@ -139,38 +367,25 @@ class Analysis(ABC):
         self._add_run_algorithm('set input_geometry')
 
         if self.buffer > 0:
-            buffered_geom = create_buffered_geometry(
-                self.geometry, self.buffer, self.epsg)
             self._add_run_algorithm(f'add buffer ({self.buffer})')
-            self.run_on_input_geometry = buffered_geom
-        else:
-            self.run_on_input_geometry = self.geometry.Clone()
+
+        self.run_on_input_geometry = self.geometry_context.input_geometry
 
     def __set_geometry_areas(self) -> None:
         self.input_geometry_area = round(
-            self.run_on_input_geometry.GetArea(), 2)
+            self.geometry_context.get_area(self.run_on_input_geometry), 2)
 
         if len(self.geometries) == 0:
             return
 
-        hit_area: float = 0
-
-        for geometry in self.geometries:
-            if geometry is None:
-                continue
-
-            intersection: ogr.Geometry = self.run_on_input_geometry.Intersection(
-                geometry)
+        method = self.config.hit_area_method or HitAreaMethod.OGR
+        start = time.time()
+        hit_area = get_hit_area(
+            self.run_on_input_geometry, self.geometries, method, self.geometry_context)
+        end = time.time()
 
-            if intersection is None:
-                continue
-
-            geom_type = intersection.GetGeometryType()
-
-            if geom_type == ogr.wkbPolygon or geom_type == ogr.wkbMultiPolygon:
-                hit_area += intersection.GetArea()
-
-        self._add_run_algorithm('calculate hit area')
+        self._add_run_algorithm(
+            f'calculate hit area ({method.value}, {round(end - start, 3)} sec.)')
         self.hit_area = round(hit_area, 2)
 
     def __set_guidance_data(self) -> None:
@@ -249,5 +464,13 @@ class Analysis(ABC):
         pass
 
     @abstractmethod
-    def _set_distance_to_object(self) -> None:
+    async def _query_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, Dict[str, List]]:
+        pass
+
+    @abstractmethod
+    async def _probe_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, int]:
+        pass
+
+    @abstractmethod
+    def _get_layer_name(self, layer: Layer) -> str:
         pass
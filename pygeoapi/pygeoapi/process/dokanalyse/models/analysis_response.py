@@ -1,8 +1,8 @@
 from typing import List, Dict
-from osgeo import ogr
 from .analysis import Analysis
 from .fact_sheet import FactSheet
-from ..utils.helpers.geometry import add_geojson_crs, create_buffered_geometry
+from ..utils.helpers.geometry import add_geojson_crs
+from ..utils.helpers.geometry_context import GeometryContext
 
 
 class AnalysisResponse():
@@ -35,13 +35,8 @@ class AnalysisResponse():
         return data
 
     @classmethod
-    def create(cls, geo_json: Dict, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int, fact_sheet: FactSheet, municipality_number: str, municipality_name: str):
+    def create(cls, geo_json: Dict, context: GeometryContext, orig_epsg: int, fact_sheet: FactSheet, municipality_number: str, municipality_name: str):
         add_geojson_crs(geo_json, orig_epsg)
-
-        if buffer > 0:
-            buffered_geom = create_buffered_geometry(geometry, buffer, epsg)
-            geometry_area = round(buffered_geom.GetArea(), 2)
-        else:
-            geometry_area = round(geometry.GetArea(), 2)
+        geometry_area = round(context.get_area(context.input_geometry), 2)
 
         return AnalysisResponse(geo_json, geometry_area, fact_sheet, municipality_number, municipality_name)
@@ -1,117 +1,190 @@
-from sys import maxsize
 import json
+import time
+import logging
 from uuid import UUID
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from osgeo import ogr
 from .analysis import Analysis
-from .result_status import ResultStatus
 from .config.dataset_config import DatasetConfig
-from ..services.geolett import get_geolett_data
-from ..services.raster_result import get_wms_url, get_cartography_url
-from ..utils.helpers.geometry import create_buffered_geometry, geometry_from_json
-from ..http_clients.arcgis import query_arcgis
+from .config.layer import Layer
+from ..utils.helpers.geometry_context import GeometryContext
+from ..utils.helpers.geometry import geometry_from_json, geometry_from_esri_json
+from ..utils.helpers.filter import compile_filter
+from ..http_clients.arcgis import query_arcgis_features, query_arcgis_layers, query_arcgis_count
+from ..http_clients.capabilities import PROPERTY_PROJECTION, MULTI_LAYER_QUERY, query_with_fallback, is_supported, set_unsupported
+from ..services.result_cache import create_cache_key, get_cached_result
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class ArcGisAnalysis(Analysis):
-    def __init__(self, dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int):
-        super().__init__(dataset_id, config, geometry, epsg, orig_epsg, buffer)
+    def __init__(self, dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int, geometry_context: GeometryContext = None):
+        super().__init__(dataset_id, config, geometry, epsg, orig_epsg, buffer, geometry_context)
+        self.__layer_responses: Dict[int, Dict[str, List]] = {}
 
     async def _run_queries(self) -> None:
-        first_layer = self.config.layers[0]
-        geolett_data = await get_geolett_data(first_layer.geolett_id)
-        self._add_run_algorithm(f'query {self.config.arcgis}')             
+        layers = self.__get_layers_to_query_together()
+
+        if layers:
+            self.__layer_responses = await self.__query_all_layers(layers)
+
+        await self._run_layer_queries(self.config.arcgis)
+
+    async def _query_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, Dict[str, List]]:
+        if geometry is self.run_on_input_geometry and id(layer) in self.__layer_responses:
+            return 200, self.__layer_responses[id(layer)]
+
+        async def query(enabled: List[str]) -> Tuple[int, Dict[str, List]]:
+            out_fields = self.config.properties if PROPERTY_PROJECTION in enabled else None
+
+            status_code, features = await query_arcgis_features(
+                self.config.arcgis, layer.arcgis, layer.filter, geometry, self.epsg,
+                lambda page: self.__parse_features(page.get('features', []), False), out_fields,
+                context=self.geometry_context)
+
+            return self.__create_response(status_code, features)
+
+        return await query_with_fallback(self.config.arcgis, [PROPERTY_PROJECTION], query)
+
+    async def _probe_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, int]:
+        return await query_arcgis_count(
+            self.config.arcgis, layer.arcgis, layer.filter, geometry, self.epsg, context=self.geometry_context)
+
+    def _get_layer_name(self, layer: Layer) -> str:
+        return layer.arcgis
+
+    def __get_layers_to_query_together(self) -> List[Layer]:
+        layers = self.config.layers
+
+        # Probing fetches features only for the layers that are hit, a combined query would fetch them for all layers
+        if len(layers) < 2 or self.config.probe_queries or not is_supported(self.config.arcgis, MULTI_LAYER_QUERY):
+            return []
+
+        if self.config.result_cache_ttl:
+            layers = [layer for layer in layers if get_cached_result(self.__create_cache_key(layer)) is None]
 
-        for layer in self.config.layers:
-            if layer.filter is not None:
-                self._add_run_algorithm(f'add filter {layer.filter}')
+        return layers if len(layers) > 1 else []
 
-            status_code, api_response = await query_arcgis(
-                self.config.arcgis, layer.arcgis, layer.filter, self.run_on_input_geometry, self.epsg)
+    def __create_cache_key(self, layer: Layer) -> str:
+        return create_cache_key(
+            str(self.config.arcgis), layer.arcgis, layer.filter, self.run_on_input_geometry, self.epsg, self.geometry_context)
 
-            if status_code == 408:
-                self.result_status = ResultStatus.TIMEOUT
-                self._add_run_algorithm(f'intersects layer {layer.arcgis} (Timeout)')     
-                break
-            elif status_code != 200:
-                self.result_status = ResultStatus.ERROR
-                self._add_run_algorithm(f'intersects layer {layer.arcgis} (Error)')
-                break
+    async def __query_all_layers(self, layers: List[Layer]) -> Dict[int, Dict[str, List]]:
+        url = self.config.arcgis
+        groups: Dict[str, List[Layer]] = {}
 
-            if api_response:
-                response = self.__parse_response(api_response)
+        for layer in layers:
+            groups.setdefault(layer.arcgis, []).append(layer)
 
-                if len(response['properties']) > 0:
-                    self._add_run_algorithm(f'intersects layer {layer.arcgis} (True)')
-                    geolett_data = await get_geolett_data(layer.geolett_id)
+        projection = is_supported(url, PROPERTY_PROJECTION)
+        layer_defs = [self.__create_layer_def(layer_id, group, projection) for layer_id, group in groups.items()]
 
-                    self.data = response['properties']
-                    self.geometries = response['geometries']
-                    self.raster_result_map = get_wms_url(
-                        self.config.wms, layer.wms)
-                    self.cartography = await get_cartography_url(
-                        self.config.wms, layer.wms)
-                    self.result_status = layer.result_status
-                    break
+        start = time.time()
+        status_code, api_response = await query_arcgis_layers(
+            url, layer_defs, self.run_on_input_geometry, self.epsg, context=self.geometry_context)
+        end = time.time()
 
-                self._add_run_algorithm(f'intersects layer {layer.arcgis} (False)')
+        if status_code in [400, 404]:
+            _LOGGER.warning(f'Multi-layer query rejected by {url}, querying layers separately')
+            set_unsupported(url, MULTI_LAYER_QUERY)
 
-        self.geolett = geolett_data
+        if status_code != 200:
+            return {}
 
-    async def _set_distance_to_object(self) -> None:
-        buffered_geom = create_buffered_geometry(
-            self.geometry, 20000, self.epsg)
-        layer = self.config.layers[0]
+        # Layers capped by the server are left to the paged per-layer queries
+        features_by_layer = {
+            str(entry.get('id')): entry.get('features', []) for entry in api_response.get('layers', [])
+            if not entry.get('exceededTransferLimit')}
+        responses: Dict[int, Dict[str, List]] = {}
 
-        _, response = await query_arcgis(self.config.arcgis, layer.arcgis, layer.filter, buffered_geom, self.epsg)
+        for layer_id, group in groups.items():
+            features = features_by_layer.get(layer_id)
 
-        if response is None:
-            self.distance_to_object = maxsize
-            return
+            if features is None:
+                continue
 
-        distances = []
+            for layer in group:
+                selected = features if len(group) == 1 else self.__select_features(layer, features)
+                responses[id(layer)] = self.__create_data(self.__parse_features(selected, True))
 
-        for feature in response['features']:
-            feature_geom = self.__get_geometry_from_response(feature)
+        # autopep8: off
+        _LOGGER.info(f'Multi-layer query: {self.config.name}: {len(responses)} of {len(layers)} layers in 1 request, {round(end - start, 2)} sec.')
+        # autopep8: on
 
-            if feature_geom is not None:
-                distance = round(
-                    self.run_on_input_geometry.Distance(feature_geom))
-                distances.append(distance)
+        return responses
 
-        distances.sort()
-        self._add_run_algorithm('get distance to nearest object')
+    def __create_layer_def(self, layer_id: str, layers: List[Layer], projection: bool) -> Dict:
+        filters = [layer.filter for layer in layers]
 
-        if len(distances) == 0:
-            self.distance_to_object = maxsize
+        if None in filters:
+            where = '1=1'
+        elif len(filters) == 1:
+            where = filters[0]
         else:
-            self.distance_to_object = distances[0]
+            where = ' OR '.join(f'({filter})' for filter in filters)
 
-    def __parse_response(self, arcgis_response: Dict) -> Dict[str, List]:
-        data = {
-            'properties': [],
-            'geometries': []
+        out_fields = '*'
+
+        if projection:
+            fields = list(self.config.properties)
+
+            if len(layers) > 1:
+                for filter in filters:
+                    if filter is not None:
+                        fields += [field for field in compile_filter(filter).properties if field not in fields]
+
+            out_fields = ','.join(fields) if fields else '*'
+
+        return {
+            'layerId': int(layer_id) if layer_id.isdigit() else layer_id,
+            'where': where,
+            'outFields': out_fields
         }
 
-        features: List[Dict] = arcgis_response.get('features', [])
+    def __select_features(self, layer: Layer, features: List[Dict]) -> List[Dict]:
+        if layer.filter is None:
+            return features
+
+        filter = compile_filter(layer.filter)
+
+        return [feature for feature in features if filter.evaluate(feature.get('attributes') or {})]
+
+    def __create_response(self, status_code: int, features: List[Tuple[Dict, ogr.Geometry]]) -> Tuple[int, Dict[str, List]]:
+        if status_code != 200 or features is None:
+            return status_code, None
+
+        return status_code, self.__create_data(features)
+
+    def __create_data(self, features: List[Tuple[Dict, ogr.Geometry]]) -> Dict[str, List]:
+        return {
+            'properties': [props for props, _ in features],
+            'geometries': [geometry for _, geometry in features]
+        }
+
+    def __parse_features(self, features: List[Dict], esri_json: bool) -> List[Tuple[Dict, ogr.Geometry]]:
+        parsed = []
 
         for feature in features:
-            data['properties'].append(
-                self.__map_properties(feature, self.config.properties))
-            data['geometries'].append(
-                self.__get_geometry_from_response(feature))
+            feature_props = feature.get('attributes' if esri_json else 'properties') or {}
+
+            parsed.append((
+                self.__map_properties(feature_props, self.config.properties),
+                self.__get_geometry_from_response(feature, esri_json)))
 
-        return data
+        return parsed
 
-    def __map_properties(self, feature: Dict, mappings: List[str]) -> Dict:
+    def __map_properties(self, feature_props: Dict, mappings: List[str]) -> Dict:
         props = {}
-        feature_props: Dict = feature['properties']
 
         for mapping in mappings:
             props[mapping] = feature_props.get(mapping)
 
         return props
 
-    def __get_geometry_from_response(self, feature) -> ogr.Geometry:
+    def __get_geometry_from_response(self, feature: Dict, esri_json: bool) -> ogr.Geometry:
+        if esri_json:
+            return geometry_from_esri_json(feature.get('geometry'))
+
         json_str = json.dumps(feature['geometry'])
 
         return geometry_from_json(json_str)
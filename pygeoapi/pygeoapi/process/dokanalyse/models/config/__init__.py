@@ -1,5 +1,6 @@
 from .coverage_wfs import CoverageWfs
 from .dataset_config import DatasetConfig
+from .hit_area_method import HitAreaMethod
 from .layer import Layer
 from .quality_config import QualityConfig
 from .quality_indicator import QualityIndicator
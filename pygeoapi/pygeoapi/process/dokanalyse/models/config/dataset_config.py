@@ -2,6 +2,7 @@ import uuid
 from typing import Optional, List, Dict
 from pydantic import BaseModel, HttpUrl, root_validator
 from .layer import Layer
+from .hit_area_method import HitAreaMethod
 
 
 class DatasetConfig(BaseModel):
@@ -18,6 +19,12 @@ class DatasetConfig(BaseModel):
     geom_field: Optional[str] = None
     properties: Optional[List[str]]
     themes: List[str]
+    speculative_queries: Optional[bool] = False
+    probe_queries: Optional[bool] = False
+    hit_area_method: Optional[HitAreaMethod] = HitAreaMethod.OGR
+    result_cache_ttl: Optional[int] = None
+    page_size: Optional[int] = None
+    sort_by: Optional[str] = None
 
     @root_validator(pre=True)
     def check_service_type(cls, values: Dict) -> Dict:
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class HitAreaMethod(str, Enum):
+    OGR = 'ogr'
+    BATCHED = 'batched'
+    UNION = 'union'
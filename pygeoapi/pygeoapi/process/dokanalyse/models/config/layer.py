@@ -1,6 +1,7 @@
 from pydantic import BaseModel, root_validator, validator
 from typing import List, Optional, Dict
 from ..result_status import ResultStatus
+from ...utils.helpers.filter import compile_filter
 import uuid
 
 
@@ -28,6 +29,13 @@ class Layer(BaseModel):
 
         return value
 
+    @validator('filter')
+    def check_filter(cls, value: str) -> str:
+        if value:
+            compile_filter(value)
+
+        return value
+
     @root_validator(pre=True)
     def check_layer_type(cls, values: Dict) -> Dict:
         if not 'wfs' in values and not 'arcgis' in values and not 'ogc_api' in values:
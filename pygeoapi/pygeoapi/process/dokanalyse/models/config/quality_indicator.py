@@ -1,7 +1,8 @@
-from pydantic import BaseModel, root_validator
+from pydantic import BaseModel, root_validator, validator
 from typing import Optional, Dict
 from .quality_indicator_type import QualityIndicatorType
 from .coverage_wfs import CoverageWfs
+from ...utils.helpers.filter import compile_filter
 
 
 class QualityIndicator(BaseModel):
@@ -14,6 +15,13 @@ class QualityIndicator(BaseModel):
     input_filter: Optional[str] = None
     wfs: Optional[CoverageWfs] = None
 
+    @validator('input_filter')
+    def check_input_filter(cls, value: str) -> str:
+        if value:
+            compile_filter(value)
+
+        return value
+
     @root_validator(pre=False)
     def check_coverage(cls, values: Dict) -> Dict:
         type, wfs = values.get('type'), values.get('wfs')
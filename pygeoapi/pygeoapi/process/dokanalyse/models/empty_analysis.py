@@ -1,7 +1,10 @@
 from uuid import UUID
+from typing import List, Dict, Tuple
+from osgeo import ogr
 from .analysis import Analysis
 from .result_status import ResultStatus
 from .config.dataset_config import DatasetConfig
+from .config.layer import Layer
 from ..services.kartkatalog import get_kartkatalog_metadata
 
 
@@ -15,11 +18,17 @@ class EmptyAnalysis(Analysis):
         self.themes = self.config.themes
         self.run_on_dataset = await get_kartkatalog_metadata(self.config.metadata_id)
 
-    def _add_run_algorithm(self) -> None:
+    def _add_run_algorithm(self, algorithm) -> None:
         raise NotImplementedError
 
-    def _run_queries(self) -> None:
-        return NotImplementedError
+    async def _run_queries(self) -> None:
+        raise NotImplementedError
+
+    async def _query_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, Dict[str, List]]:
+        raise NotImplementedError
 
-    def _set_distance_to_object(self) -> None:
-        return NotImplementedError
+    async def _probe_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def _get_layer_name(self, layer: Layer) -> str:
+        raise NotImplementedError
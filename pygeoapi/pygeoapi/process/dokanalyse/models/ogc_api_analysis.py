@@ -1,109 +1,104 @@
 import json
-from sys import maxsize
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from uuid import UUID
 from pydash import get
 from osgeo import ogr
 from .analysis import Analysis
-from .result_status import ResultStatus
 from .config.dataset_config import DatasetConfig
-from ..services.geolett import get_geolett_data
-from ..services.raster_result import get_wms_url, get_cartography_url
-from ..utils.helpers.geometry import create_buffered_geometry, geometry_from_json, transform_geometry
-from ..http_clients.ogc_api import query_ogc_api
+from .config.layer import Layer
+from ..utils.helpers.geometry_context import GeometryContext
+from ..utils.helpers.geometry import geometry_from_json, transform_geometries, get_epsg
+from ..utils.helpers.filter import Filter, compile_filter
+from ..http_clients.ogc_api import query_ogc_api_features, query_ogc_api_hits
+from ..http_clients.capabilities import FILTER_PUSHDOWN, PROPERTY_PROJECTION, OUTPUT_CRS, is_supported, query_with_fallback
+from ..utils.constants import WGS84_EPSG
 
 
 class OgcApiAnalysis(Analysis):
-    def __init__(self, dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int):
-        super().__init__(dataset_id, config, geometry, epsg, orig_epsg, buffer)
+    def __init__(self, dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int, geometry_context: GeometryContext = None):
+        super().__init__(dataset_id, config, geometry, epsg, orig_epsg, buffer, geometry_context)
 
     async def _run_queries(self) -> None:
-        first_layer = self.config.layers[0]
-        geolett_data = await get_geolett_data(first_layer.geolett_id)
-        self._add_run_algorithm(f'query {self.config.ogc_api}')
-
-        for layer in self.config.layers:
-            if layer.filter is not None:
-                self._add_run_algorithm(f'add filter {layer.filter}')
-
-            status_code, api_response = await query_ogc_api(
-                self.config.ogc_api, layer.ogc_api, self.config.geom_field, self.run_on_input_geometry, self.epsg)
-
-            if status_code == 408:
-                self.result_status = ResultStatus.TIMEOUT
-                self._add_run_algorithm(
-                    f'intersects layer {layer.ogc_api} (Timeout)')
-                break
-            elif status_code != 200:
-                self.result_status = ResultStatus.ERROR
-                self._add_run_algorithm(
-                    f'intersects layer {layer.ogc_api} (Error)')
-                break
-
-            if api_response:
-                response = self.__parse_response(api_response)
-
-                if len(response['properties']) > 0:
-                    self._add_run_algorithm(
-                        f'intersects layer {layer.ogc_api} (True)')
-                    geolett_data = await get_geolett_data(layer.geolett_id)
-
-                    self.data = response['properties']
-                    self.geometries = response['geometries']
-                    self.raster_result_map = get_wms_url(
-                        self.config.wms, layer.wms)
-                    self.cartography = await get_cartography_url(
-                        self.config.wms, layer.wms)
-                    self.result_status = layer.result_status
-                    break
-
-                self._add_run_algorithm(
-                    f'intersects layer {layer.ogc_api} (False)')
-
-        self.geolett = geolett_data
-
-    async def _set_distance_to_object(self) -> None:
-        buffered_geom = create_buffered_geometry(
-            self.geometry, 20000, self.epsg)
-        layer = self.config.layers[0]
-
-        _, response = await query_ogc_api(self.config.ogc_api, layer.ogc_api, self.config.geom_field, buffered_geom, self.epsg)
-
-        if response is None:
-            self.distance_to_object = maxsize
-            return
-
-        distances = []
-
-        for feature in response['features']:
-            feature_geom = self.__get_geometry_from_response(feature)
-
-            if feature_geom is not None:
-                distance = round(
-                    self.run_on_input_geometry.Distance(feature_geom))
-                distances.append(distance)
-
-        distances.sort()
-        self._add_run_algorithm('get distance to nearest object')
-
-        if len(distances) == 0:
-            self.distance_to_object = maxsize
-        else:
-            self.distance_to_object = distances[0]
-
-    def __parse_response(self, ogc_api_response: Dict) -> Dict[str, List]:
+        await self._run_layer_queries(self.config.ogc_api)
+
+    async def _query_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, Dict[str, List]]:
+        filter = compile_filter(layer.filter) if layer.filter else None
+        capabilities = [PROPERTY_PROJECTION, OUTPUT_CRS]
+
+        if filter is not None:
+            capabilities.append(FILTER_PUSHDOWN)
+
+        async def query(enabled: List[str]) -> Tuple[int, Dict[str, List]]:
+            client_filter = filter if FILTER_PUSHDOWN not in enabled else None
+            properties = self.__get_property_names(
+                client_filter) if PROPERTY_PROJECTION in enabled else None
+            out_epsg = self.epsg if OUTPUT_CRS in enabled else WGS84_EPSG
+
+            status_code, features = await query_ogc_api_features(
+                self.config.ogc_api, layer.ogc_api, self.config.geom_field, geometry, self.epsg,
+                lambda page: self.__parse_page(page, client_filter), out_epsg,
+                filter=filter if client_filter is None else None, properties=properties, context=self.geometry_context,
+                page_size=self.config.page_size)
+
+            return self.__create_response(status_code, features)
+
+        return await query_with_fallback(self.config.ogc_api, capabilities, query)
+
+    async def _probe_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, int]:
+        filter = compile_filter(layer.filter) if layer.filter else None
+
+        if filter is not None and not is_supported(self.config.ogc_api, FILTER_PUSHDOWN):
+            filter = None
+
+        return await query_ogc_api_hits(
+            self.config.ogc_api, layer.ogc_api, self.config.geom_field, geometry, self.epsg, filter, context=self.geometry_context)
+
+    def _get_layer_name(self, layer: Layer) -> str:
+        return layer.ogc_api
+
+    def __get_property_names(self, filter: Filter) -> List[str]:
+        property_names: List[str] = []
+
+        for mapping in self.config.properties or []:
+            name = mapping.split('.')[0]
+
+            if name not in property_names:
+                property_names.append(name)
+
+        if filter is not None:
+            property_names.extend(
+                prop for prop in filter.properties if prop not in property_names)
+
+        return property_names
+
+    def __create_response(self, status_code: int, features: List[Tuple[Dict, ogr.Geometry]]) -> Tuple[int, Dict[str, List]]:
+        if status_code != 200 or features is None:
+            return status_code, None
+
         data = {
-            'properties': [],
-            'geometries': []
+            'properties': [props for props, _ in features],
+            'geometries': [geometry for _, geometry in features]
         }
 
-        for feature in ogc_api_response['features']:
-            data['properties'].append(self.__map_properties(
+        return status_code, data
+
+    def __parse_page(self, ogc_api_response: Dict, filter: Filter) -> List[Tuple[Dict, ogr.Geometry]]:
+        properties = []
+        geometries = []
+
+        for feature in ogc_api_response.get('features', []):
+            if filter is not None and not filter.evaluate(feature['properties']):
+                continue
+
+            properties.append(self.__map_properties(
                 feature, self.config.properties))
-            data['geometries'].append(
+            geometries.append(
                 self.__get_geometry_from_response(feature))
 
-        return data
+        src_epsg = get_epsg(ogc_api_response)
+        geometries = transform_geometries(geometries, src_epsg, self.epsg)
+
+        return list(zip(properties, geometries))
 
     def __map_properties(self, feature: Dict, mappings: List[str]) -> Dict:
         props = {}
@@ -117,6 +112,5 @@ class OgcApiAnalysis(Analysis):
 
     def __get_geometry_from_response(self, feature: Dict) -> ogr.Geometry:
         json_str = json.dumps(feature['geometry'])
-        geometry = geometry_from_json(json_str)
 
-        return transform_geometry(geometry, 4326, 25833)
+        return geometry_from_json(json_str)
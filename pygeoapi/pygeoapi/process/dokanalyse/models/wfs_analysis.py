@@ -1,158 +1,106 @@
-from sys import maxsize
-from io import BytesIO
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from osgeo import ogr
 from lxml import etree as ET
 from uuid import UUID
 from .analysis import Analysis
-from .result_status import ResultStatus
 from .config.dataset_config import DatasetConfig
 from .config.layer import Layer
-from ..services.geolett import get_geolett_data
-from ..services.raster_result import get_wms_url, get_cartography_url
-from ..utils.helpers.common import parse_string, evaluate_condition, xpath_select_one
-from ..utils.helpers.geometry import create_buffered_geometry, geometry_from_gml
-from ..http_clients.wfs import query_wfs
+from ..utils.helpers.geometry_context import GeometryContext
+from ..utils.helpers.common import parse_string
+from ..utils.helpers.filter import Filter, compile_filter
+from ..utils.helpers.gml import geometry_from_gml_element, get_member_extractor
+from ..http_clients.wfs import query_wfs_members, query_wfs_hits
+from ..http_clients.capabilities import FILTER_PUSHDOWN, PROPERTY_PROJECTION, is_supported, query_with_fallback
 
 
 class WfsAnalysis(Analysis):
-    def __init__(self, dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int):
-        super().__init__(dataset_id, config, geometry, epsg, orig_epsg, buffer)
+    def __init__(self, dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int, geometry_context: GeometryContext = None):
+        super().__init__(dataset_id, config, geometry, epsg, orig_epsg, buffer, geometry_context)
 
     async def _run_queries(self) -> None:
-        first_layer = self.config.layers[0]
-        geolett_data = await get_geolett_data(first_layer.geolett_id)
-        self._add_run_algorithm(f'query {self.config.wfs}')
+        await self._run_layer_queries(self.config.wfs)
 
-        for layer in self.config.layers:
-            if layer.filter is not None:
-                self._add_run_algorithm(f'add filter {layer.filter}')
+    async def _query_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, Dict[str, List]]:
+        filter = compile_filter(layer.filter) if layer.filter else None
+        capabilities = [PROPERTY_PROJECTION]
 
-            status_code, api_response = await query_wfs(
-                self.config.wfs, layer.wfs, self.config.geom_field, self.run_on_input_geometry, self.epsg)
+        if filter is not None:
+            capabilities.append(FILTER_PUSHDOWN)
 
-            if status_code == 408:
-                self.result_status = ResultStatus.TIMEOUT
-                self._add_run_algorithm(f'intersects layer {layer.wfs} (Timeout)')
-                break
-            elif status_code != 200:
-                self.result_status = ResultStatus.ERROR
-                self._add_run_algorithm(f'intersects layer {layer.wfs} (Error)')
-                break
+        async def query(enabled: List[str]) -> Tuple[int, List[Tuple[Dict, ogr.Geometry]]]:
+            client_filter = filter if FILTER_PUSHDOWN not in enabled else None
+            property_names = self.__get_property_names(
+                client_filter) if PROPERTY_PROJECTION in enabled else None
 
-            if api_response:
-                response = self.__parse_response(api_response, layer)
+            return await query_wfs_members(
+                self.config.wfs, layer.wfs, self.config.geom_field, geometry, self.epsg,
+                lambda member: self.__map_member(member, client_filter),
+                filter if client_filter is None else None, property_names, context=self.geometry_context,
+                page_size=self.config.page_size, sort_by=self.config.sort_by)
 
-                if len(response['properties']) > 0:
-                    self._add_run_algorithm(f'intersects layer {layer.wfs} (True)')
-                    geolett_data = await get_geolett_data(layer.geolett_id)
+        status_code, members = await query_with_fallback(self.config.wfs, capabilities, query)
 
-                    self.geometries = response['geometries']
-                    self.data = response['properties']
-                    self.raster_result_map = get_wms_url(
-                        self.config.wms, layer.wms)
-                    self.cartography = await get_cartography_url(
-                        self.config.wms, layer.wms)
-                    self.result_status = layer.result_status
-                    break
+        return self.__create_response(status_code, members)
 
-                self._add_run_algorithm(f'intersects layer {layer.wfs} (False)')            
+    async def _probe_layer(self, layer: Layer, geometry: ogr.Geometry) -> Tuple[int, int]:
+        filter = compile_filter(layer.filter) if layer.filter else None
 
-        self.geolett = geolett_data
+        if filter is not None and not is_supported(self.config.wfs, FILTER_PUSHDOWN):
+            filter = None
 
-    async def _set_distance_to_object(self) -> None:
-        buffered_geom = create_buffered_geometry(
-            self.geometry, 20000, self.epsg)
-        layer = self.config.layers[0]
+        return await query_wfs_hits(
+            self.config.wfs, layer.wfs, self.config.geom_field, geometry, self.epsg, filter, context=self.geometry_context)
 
-        _, response = await query_wfs(self.config.wfs, layer.wfs, self.config.geom_field, buffered_geom, self.epsg)
+    def _get_layer_name(self, layer: Layer) -> str:
+        return layer.wfs
 
-        if response is None:
-            self.distance_to_object = maxsize
-            return
+    def __create_response(self, status_code: int, members: List[Tuple[Dict, ogr.Geometry]]) -> Tuple[int, Dict[str, List]]:
+        if status_code != 200 or members is None:
+            return status_code, None
 
-        source = BytesIO(response.encode('utf-8'))
-        context = ET.iterparse(source, huge_tree=True)
-        distances = []
-
-        for _, elem in context:
-            localname = ET.QName(elem).localname
-
-            if localname != self.config.geom_field:
-                continue
-
-            geom_elem = xpath_select_one(elem, './*')
-
-            if geom_elem is None:
-                continue
-
-            gml_str = ET.tostring(geom_elem, encoding='unicode')
-            feature_geom = geometry_from_gml(gml_str)
-
-            if feature_geom:
-                distance = round(
-                    self.run_on_input_geometry.Distance(feature_geom))
-                distances.append(distance)
+        data = {
+            'properties': [props for props, _ in members],
+            'geometries': [geometry for _, geometry in members]
+        }
 
-        distances.sort()
-        self._add_run_algorithm('get distance to nearest object')
+        return status_code, data
 
-        if len(distances) == 0:
-            self.distance_to_object = maxsize
-        else:
-            self.distance_to_object = distances[0]
+    def __get_property_names(self, filter: Filter) -> List[str]:
+        property_names = list(self.config.properties or [])
 
-    def __parse_response(self, wfs_response: str, layer: Dict) -> Dict[str, List]:
-        data = {
-            'properties': [],
-            'geometries': []
-        }
+        if filter is not None:
+            property_names.extend(
+                prop for prop in filter.properties if prop not in property_names)
 
-        source = BytesIO(wfs_response.encode('utf-8'))
-        context = ET.iterparse(source, huge_tree=True)
+        return property_names + [self.config.geom_field]
 
-        for _, elem in context:
-            localname = ET.QName(elem).localname
+    def __map_member(self, member: ET._Element, filter: Filter) -> Tuple[Dict, ogr.Geometry]:
+        properties = tuple(self.config.properties or [])
 
-            if localname != 'member':
-                continue
+        if filter is not None:
+            properties += tuple(prop for prop in filter.properties if prop not in properties)
 
-            props = self.__map_properties(elem)
+        extractor = get_member_extractor(properties, self.config.geom_field)
+        values, geom_elem = extractor.extract(member)
 
-            if self.__filter_member(props, layer):
-                data['properties'].append(props)
-                data['geometries'].append(
-                    self.__get_geometry_from_response(elem))
+        if filter is not None and not filter.evaluate({key: parse_string(value) for key, value in values.items()}):
+            return None
 
-        return data
+        props = self.__map_properties(values)
 
-    def __filter_member(self, props: Dict, layer: Layer) -> bool:
-        if not layer.filter:
-            return True
+        geometry = geometry_from_gml_element(
+            geom_elem) if geom_elem is not None else None
 
-        return evaluate_condition(layer.filter, props)
+        return props, geometry
 
-    def __map_properties(self, member: ET._Element) -> Dict:
+    def __map_properties(self, values: Dict[str, str]) -> Dict:
         props = {}
 
         for mapping in self.config.properties:
-            path = f'.//*[local-name() = "{mapping}"]/text()'
-            value = xpath_select_one(member, path)
+            value = values.get(mapping)
 
             if value:
                 prop_name = mapping
                 props[prop_name] = parse_string(value)
 
         return props
-
-    def __get_geometry_from_response(self, member: ET._Element) -> ogr.Geometry:
-        geom_field = self.config.geom_field
-        path = f'.//*[local-name() = "{geom_field}"]/*'
-        geom_elem = xpath_select_one(member, path)
-
-        if geom_elem is None:
-            return None
-
-        gml_str = ET.tostring(geom_elem, encoding='unicode')
-
-        return geometry_from_gml(gml_str)
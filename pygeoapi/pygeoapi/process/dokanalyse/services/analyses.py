@@ -10,17 +10,70 @@ from .dataset import get_dataset_ids, get_dataset_type
 from .fact_sheet import create_fact_sheet
 from .municipality import get_municipality
 from ..services.config import get_dataset_config
+from ..services.result_cache import get_result_cache_stats
 from ..services.blob_storage import create_container, upload_image
+from ..http_clients.resilience import CircuitState, get_host_health
+from ..http_clients.wfs_planner import WfsQueryPlanner, set_wfs_query_planner
 from ..utils.helpers.geometry import create_input_geometry, get_epsg
+from ..utils.helpers.geometry_context import GeometryContext
+from ..utils.helpers.deadline import set_deadline, get_deadline
 from ..models.config import DatasetConfig
-from ..models import Analysis, ArcGisAnalysis, OgcApiAnalysis, WfsAnalysis, EmptyAnalysis, AnalysisResponse, ResultStatus
+from ..models import Analysis, ArcGisAnalysis, OgcApiAnalysis, WfsAnalysis, EmptyAnalysis, AnalysisResponse, ResultStatus, FactSheet
 from ..utils.constants import DEFAULT_EPSG
 from ..utils.correlation_id_middleware import get_correlation_id
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def run(data: Dict, sio_client: SimpleClient) -> AnalysisResponse:
+class _Timeline:
+    def __init__(self):
+        self.start = time.time()
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, start: float, end: float) -> None:
+        span = self.spans.get(name)
+
+        if span is None:
+            self.spans[name] = [start, end]
+        else:
+            span[0] = min(span[0], start)
+            span[1] = max(span[1], end)
+
+    def __str__(self) -> str:
+        spans = [f'{name} {round(start - self.start, 2)}-{round(end - self.start, 2)} sec.' for name, (start, end) in self.spans.items()]
+        spans.append(f'total {round(time.time() - self.start, 2)} sec.')
+
+        return ', '.join(spans)
+
+
+class _ImageUploader:
+    def __init__(self, timeline: _Timeline):
+        self.timeline = timeline
+        self.__container: asyncio.Task[str] = None
+
+    async def upload(self, image: bytes) -> str:
+        start = time.time()
+
+        if self.__container is None:
+            self.__container = asyncio.create_task(self.__create_container())
+
+        container_name = await asyncio.shield(self.__container)
+        url = await upload_image(image, container_name, f'{str(uuid4())}.png')
+        self.timeline.add('uploads', start, time.time())
+
+        return url
+
+    async def __create_container(self) -> str:
+        container_name = str(uuid4())
+        await create_container(container_name)
+
+        return container_name
+
+
+async def run(data: Dict, sio_client: SimpleClient, deadline: float = None) -> AnalysisResponse:
+    set_deadline(deadline)
+    wfs_planner = WfsQueryPlanner()
+    set_wfs_query_planner(wfs_planner)
     geo_json = data.get('inputGeometry')
     geometry = create_input_geometry(geo_json)
     orig_epsg = get_epsg(geo_json)
@@ -29,9 +82,15 @@ async def run(data: Dict, sio_client: SimpleClient) -> AnalysisResponse:
     include_guidance = data.get('includeGuidance', False)
     include_quality_measurement = data.get('includeQualityMeasurement', False)
     include_facts = data.get('includeFacts', True)
+    geometry_context = GeometryContext(geometry, DEFAULT_EPSG, buffer)
+    timeline = _Timeline()
+
     municipality_number, municipality_name = await get_municipality(geometry, DEFAULT_EPSG)
+    timeline.add('municipality', timeline.start, time.time())
 
+    start = time.time()
     datasets = await get_dataset_ids(data, municipality_number)
+    timeline.add('datasets', start, time.time())
     correlation_id = get_correlation_id()
 
     if datasets and correlation_id and sio_client:
@@ -40,37 +99,75 @@ async def run(data: Dict, sio_client: SimpleClient) -> AnalysisResponse:
         sio_client.emit('datasets_counted_api', {'count': len(
             to_analyze), 'recipient': correlation_id})
 
+    uploader = _ImageUploader(timeline)
     tasks: List[asyncio.Task] = []
+    fact_sheet_task: asyncio.Task = None
 
     async with asyncio.TaskGroup() as tg:
         for dataset_id, should_analyze in datasets.items():
             task = tg.create_task(_run_analysis(
                 dataset_id, should_analyze, geometry, DEFAULT_EPSG, orig_epsg, buffer,
-                context, include_guidance, include_quality_measurement, sio_client))
+                geometry_context, context, include_guidance, include_quality_measurement, sio_client, uploader, timeline))
             tasks.append(task)
 
-    fact_sheet = None
+        if include_facts:
+            if correlation_id and sio_client:
+                sio_client.emit('create_fact_sheet_api', {
+                                'recipient': correlation_id})
 
-    if include_facts:
-        if correlation_id and sio_client:
-            sio_client.emit('create_fact_sheet_api', {
-                            'recipient': correlation_id})
+            fact_sheet_task = tg.create_task(_create_fact_sheet(
+                geometry_context, orig_epsg, uploader, timeline))
 
-        fact_sheet = await create_fact_sheet(geometry, orig_epsg, buffer)
+    fact_sheet = fact_sheet_task.result() if fact_sheet_task is not None else None
 
     response = AnalysisResponse.create(
-        geo_json, geometry, DEFAULT_EPSG, orig_epsg, buffer, fact_sheet, municipality_number, municipality_name)
+        geo_json, geometry_context, orig_epsg, fact_sheet, municipality_number, municipality_name)
 
     for task in tasks:
         response.result_list.append(task.result())
 
-    await _upload_binaries(response)
+    cache_stats = get_result_cache_stats()
+
+    # autopep8: off
+    _LOGGER.info(f'Result cache: {cache_stats["hits"]} hits ({cache_stats["disk_hits"]} from disk), {cache_stats["misses"]} misses, {cache_stats["size"]} entries')
+    _LOGGER.info(f'WFS planner: {wfs_planner.queries} layer queries sent in {wfs_planner.requests} requests')
+    _LOGGER.info(f'Timeline: {timeline}')
+    # autopep8: on
+
+    _log_host_health()
 
     return response.to_dict()
 
 
+def _log_host_health() -> None:
+    host_health = get_host_health()
+    unhealthy = [f'{host} ({health["circuit"]}, limit {health["limit"]})' for host, health in host_health.items()
+                 if health['circuit'] != CircuitState.CLOSED]
+
+    if len(unhealthy) > 0:
+        _LOGGER.warning(f'Backend health: {len(unhealthy)} of {len(host_health)} hosts failing: {", ".join(unhealthy)}')
+    else:
+        _LOGGER.info(f'Backend health: {len(host_health)} hosts, all circuits closed')
+
+
+async def _create_fact_sheet(geometry_context: GeometryContext, orig_epsg: int, uploader: _ImageUploader, timeline: _Timeline) -> FactSheet:
+    start = time.time()
+
+    try:
+        async with asyncio.timeout_at(get_deadline()):
+            fact_sheet = await create_fact_sheet(geometry_context, orig_epsg, uploader.upload)
+    except TimeoutError:
+        _LOGGER.warning('Fact sheet: Deadline exceeded')
+        fact_sheet = None
+
+    timeline.add('fact sheet', start, time.time())
+
+    return fact_sheet
+
+
 async def _run_analysis(dataset_id: UUID, should_analyze: bool, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int,
-                        context: str, include_guidance: bool, include_quality_measurement: bool, sio_client: SimpleClient) -> Analysis:
+                        geometry_context: GeometryContext, context: str, include_guidance: bool, include_quality_measurement: bool, sio_client: SimpleClient,
+                        uploader: _ImageUploader, timeline: _Timeline) -> Analysis:
     config = get_dataset_config(dataset_id)
 
     if config is None:
@@ -86,10 +183,16 @@ async def _run_analysis(dataset_id: UUID, should_analyze: bool, geometry: ogr.Ge
     correlation_id = get_correlation_id()
 
     analysis = _create_analysis(
-        dataset_id, config, geometry, epsg, orig_epsg, buffer)
+        dataset_id, config, geometry, epsg, orig_epsg, buffer, geometry_context)
 
     try:
-        await analysis.run(context, include_guidance, include_quality_measurement)
+        async with asyncio.timeout_at(get_deadline()):
+            await analysis.run(context, include_guidance, include_quality_measurement)
+    except TimeoutError:
+        _LOGGER.warning(f'Dataset analysis timed out: {dataset_id} - {config.name}')
+        analysis.run_algorithm.append('deadline exceeded')
+        await analysis.set_default_data()
+        analysis.result_status = ResultStatus.TIMEOUT
     except Exception:
         err = traceback.format_exc()
         _LOGGER.error(err)
@@ -97,11 +200,15 @@ async def _run_analysis(dataset_id: UUID, should_analyze: bool, geometry: ogr.Ge
         analysis.result_status = ResultStatus.ERROR
 
     end = time.time()
+    timeline.add('analyses', start, end)
 
     # autopep8: off
     _LOGGER.info(f'Dataset analyzed: {dataset_id} - {config.name}: {round(end - start, 2)} sec.')
     # autopep8: on
 
+    if analysis.raster_result_image_bytes:
+        analysis.raster_result_image = await uploader.upload(analysis.raster_result_image_bytes)
+
     if correlation_id and sio_client:
         sio_client.emit('dataset_analyzed_api', {
             'dataset': str(dataset_id), 'recipient': correlation_id})
@@ -109,61 +216,18 @@ async def _run_analysis(dataset_id: UUID, should_analyze: bool, geometry: ogr.Ge
     return analysis
 
 
-def _create_analysis(dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int) -> Analysis:
+def _create_analysis(dataset_id: UUID, config: DatasetConfig, geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: int, geometry_context: GeometryContext) -> Analysis:
     dataset_type = get_dataset_type(config)
 
     match dataset_type:
         case 'arcgis':
-            return ArcGisAnalysis(dataset_id, config, geometry, epsg, orig_epsg, buffer)
+            return ArcGisAnalysis(dataset_id, config, geometry, epsg, orig_epsg, buffer, geometry_context)
         case 'ogc_api':
-            return OgcApiAnalysis(dataset_id, config, geometry, epsg, orig_epsg, buffer)
+            return OgcApiAnalysis(dataset_id, config, geometry, epsg, orig_epsg, buffer, geometry_context)
         case 'wfs':
-            return WfsAnalysis(dataset_id, config, geometry, epsg, orig_epsg, buffer)
+            return WfsAnalysis(dataset_id, config, geometry, epsg, orig_epsg, buffer, geometry_context)
         case _:
             return None
 
 
-async def _upload_binaries(response: AnalysisResponse):
-    map_images: Dict[str, bytes] = {}
-
-    if response.fact_sheet and response.fact_sheet.raster_result_image_bytes:
-        map_images['fact_sheet'] = response.fact_sheet.raster_result_image_bytes
-
-    for analysis in response.result_list:
-        if analysis.raster_result_image_bytes:
-            map_images[str(analysis.dataset_id)
-                       ] = analysis.raster_result_image_bytes
-
-    if not map_images:
-        return
-
-    container_name = str(uuid4())
-    await create_container(container_name)
-
-    tasks: List[asyncio.Task[str]] = []
-
-    async with asyncio.TaskGroup() as tg:
-        for key, value in map_images.items():
-            blob_name = f'{str(uuid4())}.png'
-            task = tg.create_task(upload_image(
-                value, container_name, blob_name), name=key)
-            tasks.append(task)
-
-    for task in tasks:
-        task_name = task.get_name()
-
-        if task_name == 'fact_sheet':
-            response.fact_sheet.raster_result_image = task.result()
-            continue
-
-        analysis = _find_analysis(response.result_list, task_name)
-
-        if analysis:
-            analysis.raster_result_image = task.result()
-
-
-def _find_analysis(analyses: List[Analysis], dataset_id: str) -> Analysis:
-    return next((analysis for analysis in analyses if str(analysis.dataset_id) == dataset_id), None)
-
-
 __all__ = ['run']
@@ -1,10 +1,6 @@
-from os import path
-from pathlib import Path
-import json
 from typing import List, Dict
-import aiohttp
-from ..utils.constants import CACHE_DIR
-from ..utils.helpers.common import should_refresh_cache
+from ..http_clients.session import get_session
+from .registry_cache import RegistryCache
 
 _CACHE_DAYS = 7
 
@@ -15,37 +11,15 @@ _CODELISTS = {
 }
 
 
-async def get_codelist(type: str) -> List[Dict] | None:
-    url = _CODELISTS.get(type)
-
-    if url is None:
+async def get_codelist(type: str) -> Dict[str, Dict] | None:
+    if type not in _CODELISTS:
         return None
 
-    file_path = Path(
-        path.join(CACHE_DIR, f'codelists/{type}.json'))
-
-    if not file_path.exists() or should_refresh_cache(file_path, _CACHE_DAYS):
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        codelist = await _get_codelist(url)
-
-        if codelist is None:
-            return None
-
-        json_object = json.dumps(codelist, indent=2)
-
-        with file_path.open('w', encoding='utf-8') as file:
-            file.write(json_object)
-
-        return codelist
-    else:
-        with file_path.open(encoding='utf-8') as file:
-            codelist = json.load(file)
+    return await _cache.get(type)
 
-        return codelist
 
-
-async def _get_codelist(url: str) -> List[Dict]:
-    response = await _fetch_codelist(url)
+async def _get_codelist(type: str) -> List[Dict]:
+    response = await _fetch_codelist(_CODELISTS[type])
 
     if response is None:
         return None
@@ -66,14 +40,22 @@ async def _get_codelist(url: str) -> List[Dict]:
 
 async def _fetch_codelist(url: str) -> Dict:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return None
+        session = get_session()
+
+        async with session.get(url) as response:
+            if response.status != 200:
+                return None
 
-                return await response.json()
+            return await response.json()
     except:
         return None
 
 
+def _index_codelist(codelist: List[Dict]) -> Dict[str, Dict]:
+    return {entry['value']: entry for entry in codelist}
+
+
+_cache = RegistryCache('codelists/{key}.json', _get_codelist,
+                       _CACHE_DAYS, _index_codelist)
+
 __all__ = ['get_codelist']
\ No newline at end of file
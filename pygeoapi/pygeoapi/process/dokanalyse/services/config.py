@@ -1,47 +1,169 @@
+import time
 import logging
+import threading
 import yaml
 from pathlib import Path
 from typing import Dict, List, Tuple
 from uuid import UUID
 from pydantic import ValidationError
-from cachetools import cached, TTLCache
 from ..models.exceptions import DokAnalysisException
-from ..models.config import DatasetConfig, QualityConfig, QualityIndicator
+from ..models.config import DatasetConfig, QualityConfig, QualityIndicator, QualityIndicatorType
 from ..utils.helpers.common import get_env_var
 
 _LOGGER = logging.getLogger(__name__)
 
+_REFRESH_INTERVAL = 30
 
-def get_dataset_configs() -> List[DatasetConfig]:
-    dataset_configs, _ = _load_config()
 
-    return dataset_configs
+class _ConfigFile:
+    def __init__(self, mtime: int, size: int, dataset_configs: List[DatasetConfig], quality_configs: List[QualityConfig]):
+        self.mtime = mtime
+        self.size = size
+        self.dataset_configs = dataset_configs
+        self.quality_configs = quality_configs
+
+
+class _ConfigSnapshot:
+    def __init__(self, files: Dict[Path, _ConfigFile]):
+        self.files = files
+        self.dataset_configs: List[DatasetConfig] = []
+        self.quality_configs: List[QualityConfig] = []
+
+        for file_path in sorted(files.keys()):
+            self.dataset_configs.extend(files[file_path].dataset_configs)
+            self.quality_configs.extend(files[file_path].quality_configs)
+
+        if len(self.dataset_configs) == 0:
+            raise DokAnalysisException(
+                f'Could not create any dataset configurations from the files in "DOKANALYSE_CONFIG_DIR"')
+
+        self.datasets_by_id: Dict[UUID, DatasetConfig] = {}
+        self.dataset_ids_by_theme: Dict[str, List[UUID]] = {}
+
+        for config in self.dataset_configs:
+            self.datasets_by_id.setdefault(config.dataset_id, config)
+
+            for theme in set(theme.lower() for theme in config.themes):
+                self.dataset_ids_by_theme.setdefault(
+                    theme, []).append(config.dataset_id)
+
+        self.default_indicators = self.__get_indicators(None)
+        self.indicators_by_dataset: Dict[UUID, List[QualityIndicator]] = {
+            id: self.__get_indicators(id) for id in self.datasets_by_id.keys()}
+        self.indicators_by_type: Dict[Tuple[UUID, QualityIndicatorType], List[QualityIndicator]] = {}
+
+        for id, indicators in [(None, self.default_indicators), *self.indicators_by_dataset.items()]:
+            for indicator in indicators:
+                self.indicators_by_type.setdefault(
+                    (id, indicator.type), []).append(indicator)
+
+    def __get_indicators(self, dataset_id: UUID) -> List[QualityIndicator]:
+        indicators: List[QualityIndicator] = []
+
+        for config in self.quality_configs:
+            id: UUID = config.dataset_id
+
+            if not id or id == dataset_id:
+                indicators.extend(config.indicators)
+
+        return indicators
+
+
+_snapshot: _ConfigSnapshot = None
+_lock = threading.Lock()
+
+
+def get_dataset_configs() -> List[DatasetConfig]:
+    return _get_snapshot().dataset_configs
 
 
 def get_dataset_config(dataset_id: UUID) -> DatasetConfig:
-    dataset_configs, _ = _load_config()
+    return _get_snapshot().datasets_by_id.get(dataset_id)
+
+
+def get_dataset_ids_by_theme(theme: str) -> List[UUID]:
+    snapshot = _get_snapshot()
 
-    config = next(
-        (conf for conf in dataset_configs if conf.dataset_id == dataset_id), None)
+    if theme is None:
+        return [config.dataset_id for config in snapshot.dataset_configs]
 
-    return config
+    return snapshot.dataset_ids_by_theme.get(theme.lower(), [])
 
 
 def get_quality_indicator_configs(dataset_id: UUID) -> List[QualityIndicator]:
-    _, quality_configs = _load_config()
-    indicators: List[QualityIndicator] = []
+    snapshot = _get_snapshot()
+
+    return list(snapshot.indicators_by_dataset.get(dataset_id, snapshot.default_indicators))
+
+
+def get_quality_indicator_configs_by_type(dataset_id: UUID, type: QualityIndicatorType) -> List[QualityIndicator]:
+    snapshot = _get_snapshot()
+    id = dataset_id if dataset_id in snapshot.indicators_by_dataset else None
 
-    for config in quality_configs:
-        id: UUID = config.dataset_id
+    return list(snapshot.indicators_by_type.get((id, type), []))
 
-        if not id or id == dataset_id:
-            indicators.extend(config.indicators)
 
-    return indicators
+def _get_snapshot() -> _ConfigSnapshot:
+    global _snapshot
 
+    snapshot = _snapshot
 
-@cached(cache=TTLCache(maxsize=1024, ttl=120))
-def _load_config() -> Tuple[List[DatasetConfig], List[QualityConfig]]:
+    if snapshot is not None:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None:
+            _snapshot = _create_snapshot({})
+            threading.Thread(
+                target=_watch_config_dir, name='dokanalyse-config-watcher', daemon=True).start()
+
+        return _snapshot
+
+
+def _watch_config_dir() -> None:
+    while True:
+        time.sleep(_REFRESH_INTERVAL)
+        _refresh_snapshot()
+
+
+def _refresh_snapshot() -> None:
+    global _snapshot
+
+    try:
+        snapshot = _create_snapshot(_snapshot.files)
+
+        if snapshot is not None:
+            _snapshot = snapshot
+    except Exception as err:
+        _LOGGER.error(f'Could not reload the configuration: {err}')
+
+
+def _create_snapshot(current_files: Dict[Path, _ConfigFile]) -> _ConfigSnapshot:
+    files = _get_config_files()
+    config_files: Dict[Path, _ConfigFile] = {}
+    changed = len(files) != len(current_files)
+
+    for file_path in files:
+        stat = file_path.stat()
+        config_file = current_files.get(file_path)
+
+        if config_file is None or config_file.mtime != stat.st_mtime_ns or config_file.size != stat.st_size:
+            dataset_configs, quality_configs = _create_configs(file_path)
+            config_file = _ConfigFile(
+                stat.st_mtime_ns, stat.st_size, dataset_configs, quality_configs)
+            changed = True
+
+        config_files[file_path] = config_file
+
+    if not changed:
+        return None
+
+    _LOGGER.info(f'Configuration loaded from {len(config_files)} files')
+
+    return _ConfigSnapshot(config_files)
+
+
+def _get_config_files() -> List[Path]:
     config_dir = get_env_var('DOKANALYSE_CONFIG_DIR')
 
     if config_dir is None:
@@ -61,35 +183,30 @@ def _load_config() -> Tuple[List[DatasetConfig], List[QualityConfig]]:
         raise DokAnalysisException(
             f'The "DOKANALYSE_CONFIG_DIR" path ({path}) contains no YAML files')
 
-    return _create_configs(files)
+    return files
 
 
-def _create_configs(files: List[Path]) -> Tuple[List[DatasetConfig], List[QualityConfig]]:
+def _create_configs(file_path: Path) -> Tuple[List[DatasetConfig], List[QualityConfig]]:
     dataset_configs: List[DatasetConfig] = []
     quality_configs: List[QualityConfig] = []
 
-    for file_path in files:
-        with open(file_path, 'r') as file:
-            results = yaml.safe_load_all(file)
-            result: dict
-
-            for result in results:
-                type = result.get('type')
+    with open(file_path, 'r') as file:
+        results = yaml.safe_load_all(file)
+        result: dict
 
-                if type == 'dataset':
-                    config = _create_dataset_config(result)
+        for result in results:
+            type = result.get('type')
 
-                    if config is not None:
-                        dataset_configs.append(config)
-                elif type == 'quality':
-                    config = _create_quality_config(result)
+            if type == 'dataset':
+                config = _create_dataset_config(result)
 
-                    if config is not None:
-                        quality_configs.append(config)
+                if config is not None:
+                    dataset_configs.append(config)
+            elif type == 'quality':
+                config = _create_quality_config(result)
 
-    if len(dataset_configs) == 0:
-        raise DokAnalysisException(
-            f'Could not create any dataset configurations from the files in "DOKANALYSE_CONFIG_DIR"')
+                if config is not None:
+                    quality_configs.append(config)
 
     return dataset_configs, quality_configs
 
@@ -115,5 +232,7 @@ def _create_quality_config(data: Dict) -> QualityConfig:
 __all__ = [
     'get_dataset_configs',
     'get_dataset_config',
-    'get_quality_indicator_configs'
+    'get_dataset_ids_by_theme',
+    'get_quality_indicator_configs',
+    'get_quality_indicator_configs_by_type'
 ]
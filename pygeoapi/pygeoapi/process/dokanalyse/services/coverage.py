@@ -1,42 +1,34 @@
-from io import BytesIO
 from typing import List, Tuple
 from lxml import etree as ET
 from osgeo import ogr
 from ..models.config import CoverageWfs
-from ..http_clients.wfs import query_wfs
-from ..utils.helpers.common import xpath_select_one
-from ..utils.helpers.geometry import geometry_from_gml
+from ..http_clients.wfs import query_wfs_members
+from ..utils.helpers.gml import geometry_from_gml_element, get_member_extractor
+from ..utils.helpers.geometry_context import GeometryContext
 
 
-async def get_values_from_wfs(wfs_config: CoverageWfs, geometry: ogr.Geometry, epsg: int) -> Tuple[List[str], float]:
-    _, response = await query_wfs(wfs_config.url, wfs_config.layer, wfs_config.geom_field, geometry, epsg)
+async def get_values_from_wfs(wfs_config: CoverageWfs, geometry: ogr.Geometry, epsg: int, context: GeometryContext = None) -> Tuple[List[str], float]:
+    extractor = get_member_extractor(
+        (wfs_config.property,), wfs_config.geom_field)
 
-    if response is None:
-        return [], 0
-
-    source = BytesIO(response.encode('utf-8'))
-    context = ET.iterparse(source, huge_tree=True)
+    def map_member(member: ET._Element) -> Tuple[str, ogr.Geometry]:
+        values, geom_element = extractor.extract(member)
+        value = values.get(wfs_config.property)
 
-    prop_path = f'.//*[local-name() = "{wfs_config.property}"]/text()'
-    geom_path = f'.//*[local-name() = "{wfs_config.geom_field}"]/*'
-    values: List[str] = []
-    feature_geoms: List[ogr.Geometry] = []
-    hit_area_percent = 0
+        if value != 'ikkeKartlagt' or geom_element is None:
+            return value, None
 
-    for _, elem in context:
-        localname = ET.QName(elem).localname
+        return value, geometry_from_gml_element(geom_element)
 
-        if localname == 'member':
-            value = xpath_select_one(elem, prop_path)
-            values.append(value)
+    _, members = await query_wfs_members(wfs_config.url, wfs_config.layer, wfs_config.geom_field, geometry, epsg, map_member, context=context)
 
-            if value == 'ikkeKartlagt':
-                geom_element = xpath_select_one(elem, geom_path)
-                gml_str = ET.tostring(geom_element, encoding='unicode')
-                feature_geom = geometry_from_gml(gml_str)
+    if members is None:
+        return [], 0
 
-                if feature_geom:
-                    feature_geoms.append(feature_geom)
+    values: List[str] = [value for value, _ in members]
+    feature_geoms: List[ogr.Geometry] = [
+        feature_geom for _, feature_geom in members if feature_geom]
+    hit_area_percent = 0
 
     if len(feature_geoms) > 0:
         hit_area_percent = _get_hit_area_percent(geometry, feature_geoms)
@@ -1,13 +1,9 @@
-from os import path
-from pathlib import Path
-import json
 from uuid import UUID
 from typing import List, Dict, Literal
-import aiohttp
 from ..models.config import DatasetConfig
-from ..services.config import get_dataset_configs
-from ..utils.helpers.common import should_refresh_cache
-from ..utils.constants import CACHE_DIR
+from ..services.config import get_dataset_ids_by_theme
+from ..http_clients.session import get_session
+from .registry_cache import RegistryCache
 
 _API_BASE_URL = 'https://register.geonorge.no/api/det-offentlige-kartgrunnlaget-kommunalt.json?municipality='
 _CACHE_DAYS = 7
@@ -32,7 +28,7 @@ async def get_dataset_ids(data: dict, municipality_number: str) -> Dict[UUID, bo
     else:
         kartgrunnlag = []
 
-    dataset_ids = _get_datasets_by_theme(data.get('theme'))
+    dataset_ids = get_dataset_ids_by_theme(data.get('theme'))
     datasets: Dict[UUID, bool] = {}
 
     for id in dataset_ids:
@@ -43,47 +39,20 @@ async def get_dataset_ids(data: dict, municipality_number: str) -> Dict[UUID, bo
     return datasets
 
 
-def _get_datasets_by_theme(theme: str) -> List[UUID]:
-    dataset_configs = get_dataset_configs()
-    dataset_ids = []
-
-    for config in dataset_configs:
-        themes = list(map(lambda theme: theme.lower(), config.themes))
-
-        if theme is None or theme.lower() in themes:
-            dataset_ids.append(config.dataset_id)
-
-    return dataset_ids
-
-
 async def _get_kartgrunnlag(municipality_number: str) -> List[str]:
     if municipality_number is None:
         return []
 
-    file_path = Path(path.join(
-        CACHE_DIR, 'dok-datasets', f'{municipality_number}.json'))
-
-    if not file_path.exists() or should_refresh_cache(file_path, _CACHE_DAYS):
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        dataset_ids = await _fetch_dataset_ids(municipality_number)
-        json_object = json.dumps(dataset_ids, indent=2)
+    dataset_ids = await _cache.get(municipality_number)
 
-        with file_path.open('w', encoding='utf-8') as file:
-            file.write(json_object)
-
-        return dataset_ids
-    else:
-        with file_path.open(encoding='utf-8') as file:
-            dataset_ids = json.load(file)
-
-        return dataset_ids
+    return dataset_ids if dataset_ids is not None else []
 
 
 async def _fetch_dataset_ids(municipality_number: str) -> List[str]:
     response = await _fetch_kartgrunnlag(municipality_number)
 
     if response is None:
-        return []
+        return None
 
     contained_items: List[Dict] = response.get('containeditems', [])
     datasets: List[str] = []
@@ -101,14 +70,17 @@ async def _fetch_kartgrunnlag(municipality_number: str) -> dict:
     try:
         url = _API_BASE_URL + municipality_number
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return None
+        session = get_session()
+
+        async with session.get(url) as response:
+            if response.status != 200:
+                return None
 
-                return await response.json()
+            return await response.json()
     except:
         return None
 
 
+_cache = RegistryCache('dok-datasets/{key}.json', _fetch_dataset_ids, _CACHE_DAYS)
+
 __all__ = ['get_dataset_type',    'get_dataset_ids']
@@ -1,11 +1,7 @@
-from os import path
-import json
 from uuid import UUID
-from pathlib import Path
 from typing import List, Dict, Tuple
-import aiohttp
-from ..utils.helpers.common import should_refresh_cache
-from ..utils.constants import CACHE_DIR
+from ..http_clients.session import get_session
+from .registry_cache import RegistryCache
 
 _API_URL = 'https://register.geonorge.no/api/dok-statusregisteret.json'
 
@@ -28,40 +24,25 @@ _VALUE_MAPPINGS = {
 
 
 async def get_dok_status_for_dataset(dataset_id: UUID) -> Dict:
-    dok_status_all = await get_dok_status()
+    dok_status = await _cache.get()
 
-    for dok_status in dok_status_all:
-        if dok_status.get('dataset_id') == str(dataset_id):
-            return dok_status
+    if dok_status is None:
+        return None
 
-    return None
+    return dok_status.get(str(dataset_id))
 
 
 async def get_dok_status() -> List[Dict]:
-    file_path = Path(
-        path.join(CACHE_DIR, 'dok-status.json'))
-
-    if not file_path.exists() or should_refresh_cache(file_path, _CACHE_DAYS):
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        dok_status = await _get_dok_status()
-        json_object = json.dumps(dok_status, indent=2)
-
-        with file_path.open('w', encoding='utf-8') as file:
-            file.write(json_object)
+    dok_status = await _cache.get()
 
-        return dok_status
-    else:
-        with file_path.open(encoding='utf-8') as file:
-            dok_status = json.load(file)
+    return list(dok_status.values()) if dok_status is not None else []
 
-        return dok_status
 
-
-async def _get_dok_status() -> List[Dict]:
+async def _get_dok_status(_: str = None) -> List[Dict]:
     response = await _fetch_dok_status()
 
     if response is None:
-        return []
+        return None
 
     contained_items: List[Dict] = response.get('containeditems', [])
     datasets: List[Dict] = []
@@ -91,12 +72,13 @@ async def _get_dok_status() -> List[Dict]:
 
 async def _fetch_dok_status() -> Dict:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(_API_URL) as response:
-                if response.status != 200:
-                    return None
+        session = get_session()
 
-                return await response.json()
+        async with session.get(_API_URL) as response:
+            if response.status != 200:
+                return None
+
+            return await response.json()
     except:
         return None
 
@@ -116,4 +98,11 @@ def _get_relevant_categories(item) -> List[Tuple]:
     return categories
 
 
+def _index_dok_status(dok_status: List[Dict]) -> Dict[str, Dict]:
+    return {entry.get('dataset_id'): entry for entry in dok_status}
+
+
+_cache = RegistryCache('dok-status.json', _get_dok_status,
+                       _CACHE_DAYS, _index_dok_status)
+
 __all__ = ['get_dok_status_for_dataset', 'get_dok_status']
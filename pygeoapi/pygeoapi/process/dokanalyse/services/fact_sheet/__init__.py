@@ -1,53 +1,56 @@
-from typing import List
+from typing import List, Tuple, Callable, Awaitable
 from asyncio import Task, TaskGroup
-from osgeo import ogr
 from .area_types import get_area_types
 from .buildings import get_buildings
 from .roads import get_roads
-from ...utils.helpers.geometry import create_buffered_geometry
+from ...utils.helpers.geometry_context import GeometryContext
 from ...utils.helpers.map_image import create_payload_for_fact_sheet
-from ...utils.constants import DEFAULT_EPSG
 from ...models.fact_sheet import FactSheet
 from ...services.map_image import create_map_image
 
 
-async def create_fact_sheet(geometry: ogr.Geometry, orig_epsg: int, buffer: int) -> FactSheet:
+async def create_fact_sheet(context: GeometryContext, orig_epsg: int, upload_image: Callable[[bytes], Awaitable[str]] = None) -> FactSheet:
     fact_sheet = FactSheet()
-    tasks = await _run_tasks(geometry, orig_epsg, buffer)
+    tasks = await _run_tasks(context, orig_epsg, upload_image)
 
     for task in tasks:
         if task.get_name() == 'raster_result':
-            fact_sheet.raster_result_image_bytes = task.result()
+            fact_sheet.raster_result_image_bytes, fact_sheet.raster_result_image = task.result()
         else:
             fact_sheet.fact_list.append(task.result())
 
     return fact_sheet
 
 
-async def _run_tasks(geometry: ogr.Geometry, orig_epsg: int, buffer: int) -> List[Task]:
-    input_geom = create_buffered_geometry(geometry, buffer, DEFAULT_EPSG)
+async def _run_tasks(context: GeometryContext, orig_epsg: int, upload_image: Callable[[bytes], Awaitable[str]]) -> List[Task]:
+    input_geom = context.input_geometry
+    epsg = context.epsg
+    buffer = context.buffer
     tasks: List[Task]
 
     async with TaskGroup() as tg:
         tasks = [
             tg.create_task(get_area_types(
-                input_geom, DEFAULT_EPSG, orig_epsg, buffer)),
+                input_geom, epsg, orig_epsg, buffer)),
             tg.create_task(get_buildings(
-                input_geom, DEFAULT_EPSG, orig_epsg, buffer)),
+                input_geom, epsg, orig_epsg, buffer)),
             # tg.create_task(get_roads(
-            #     input_geom, DEFAULT_EPSG, orig_epsg, buffer)),
+            #     input_geom, epsg, orig_epsg, buffer)),
             tg.create_task(_create_raster_result(
-                geometry, buffer), name='raster_result')
+                context, upload_image), name='raster_result')
         ]
 
     return tasks
 
 
-async def _create_raster_result(geometry: ogr.Geometry, buffer: int):
-    payload = create_payload_for_fact_sheet(geometry, buffer)
+async def _create_raster_result(context: GeometryContext, upload_image: Callable[[bytes], Awaitable[str]]) -> Tuple[bytes, str]:
+    payload = create_payload_for_fact_sheet(context)
     _, image = await create_map_image(payload)
 
-    return image
+    if not image or upload_image is None:
+        return image, None
+
+    return image, await upload_image(image)
 
 
 __all__ = ['create_fact_sheet']
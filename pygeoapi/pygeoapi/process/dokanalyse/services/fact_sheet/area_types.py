@@ -61,10 +61,9 @@ async def _map_area_types(area_types: Dict) -> Dict:
     codelist = await get_codelist('arealressurs_arealtype')
     mapped = []
 
-    for entry in codelist:
+    for value, entry in codelist.items():
         label = entry['label']
-        area: float = next((value for key, value in area_types.items()
-                            if key == entry['value']), None)
+        area: float = area_types.get(value)
         data = {'areaType': label}
 
         if area is not None:
@@ -28,7 +28,7 @@ async def get_roads(geometry: ogr.Geometry, epsg: int, orig_epsg: int, buffer: i
 
 async def _get_data(geometry: ogr.Geometry, epsg: int) -> List[Dict]:
     start = time.time()
-    status, response = await query_ogc_api(_API_BASE_URL, _LAYER_NAME, 'senterlinje', geometry, epsg, epsg, _TIMEOUT)
+    status, response = await query_ogc_api(_API_BASE_URL, _LAYER_NAME, 'senterlinje', geometry, epsg, epsg, timeout=_TIMEOUT)
     end = time.time()
 
     if response is None:
@@ -59,8 +59,7 @@ async def _map_response(response: Dict) -> List[Dict]:
                 'vegsystem', {}).get('vegkategori')
 
             if road_category is not None:
-                entry = next(
-                    (rc for rc in road_categories if rc['value'] == road_category), {})
+                entry = road_categories.get(road_category, {})
                 road_type = entry.get('label', road_type)
 
         if road_type in road_types:
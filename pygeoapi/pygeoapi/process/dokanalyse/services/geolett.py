@@ -1,13 +1,14 @@
 from os import path
 from uuid import UUID
-from typing import Dict
+from typing import List, Dict
+from functools import lru_cache
 import json
-import aiohttp
-from async_lru import alru_cache
+from ..http_clients.session import get_session
+from .registry_cache import RegistryCache
 
 _GEOLETT_API_URL = 'https://register.geonorge.no/geolett/api'
 _LOCAL_GEOLETT_IDS = ['0c5dc043-e5b3-4349-8587-9b464d013aaa']
-_CACHE_TTL = 86400 * 7
+_CACHE_DAYS = 7
 
 
 async def get_geolett_data(id: UUID) -> Dict:
@@ -15,36 +16,42 @@ async def get_geolett_data(id: UUID) -> Dict:
         return None
 
     if id in _LOCAL_GEOLETT_IDS:
-        geolett = _fetch_local_geolett_data()
+        geolett = _get_local_geolett_data()
     else:
-        geolett = await _fetch_geolett_data()
+        geolett = await _cache.get() or {}
 
-    result = list(filter(lambda item: item['id'] == str(id), geolett))
+    return geolett.get(str(id))
 
-    return result[0] if len(result) > 0 else None
 
-
-@alru_cache(maxsize=32, ttl=_CACHE_TTL)
-async def _fetch_geolett_data() -> Dict:
+async def _fetch_geolett_data(_: str = None) -> List[Dict]:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(_GEOLETT_API_URL) as response:
-                if response.status != 200:
-                    return None
+        session = get_session()
+
+        async with session.get(_GEOLETT_API_URL) as response:
+            if response.status != 200:
+                return None
 
-                return await response.json()
+            return await response.json()
     except:
         return None
 
 
-def _fetch_local_geolett_data() -> Dict:
+@lru_cache(maxsize=1)
+def _get_local_geolett_data() -> Dict[str, Dict]:
     dir_path = path.dirname(path.realpath(__file__))
 
     file_path = path.join(
         path.dirname(dir_path), 'resources/geolett.local.json')
 
     with open(file_path, 'r') as file:
-        return json.load(file)
+        return _index_geolett_data(json.load(file))
+
+
+def _index_geolett_data(geolett: List[Dict]) -> Dict[str, Dict]:
+    return {item['id']: item for item in geolett}
+
 
+_cache = RegistryCache('geolett.json', _fetch_geolett_data,
+                       _CACHE_DAYS, _index_geolett_data)
 
 __all__ = ['get_geolett_data']
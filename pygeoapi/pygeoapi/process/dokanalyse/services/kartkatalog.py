@@ -1,12 +1,8 @@
-from os import path
-import json
-from pathlib import Path
 from uuid import UUID
 from typing import Dict
-import aiohttp
 from ..models.metadata import Metadata
-from ..utils.helpers.common import should_refresh_cache
-from ..utils.constants import CACHE_DIR
+from ..http_clients.session import get_session
+from .registry_cache import RegistryCache
 
 _API_BASE_URL = 'https://kartkatalog.geonorge.no/api/getdata'
 _CACHE_DAYS = 2
@@ -15,40 +11,19 @@ async def get_kartkatalog_metadata(metadata_id: UUID) -> Metadata:
     if metadata_id is None:
         return None
 
-    metadata = await _get_kartkatalog_metadata(metadata_id)
+    return await _cache.get(str(metadata_id))
 
-    if metadata is None:
-        return None
-
-    return Metadata.from_dict(metadata)
-
-
-async def _get_kartkatalog_metadata(metadata_id: UUID) -> Dict:
-    file_path = Path(
-        path.join(CACHE_DIR, f'kartkatalog/{metadata_id}.json'))
-
-    if not file_path.exists() or should_refresh_cache(file_path, _CACHE_DAYS):
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        response = await _fetch_kartkatalog_metadata(metadata_id)
 
-        if response is None:
-            return None
+async def _fetch_metadata(metadata_id: str) -> Dict:
+    response = await _fetch_kartkatalog_metadata(metadata_id)
 
-        metadata = _map_response(metadata_id, response)
-        json_object = json.dumps(metadata, indent=2)
-
-        with file_path.open('w', encoding='utf-8') as file:
-            file.write(json_object)
-
-        return metadata
-    else:
-        with file_path.open(encoding='utf-8') as file:
-            metadata = json.load(file)
+    if response is None:
+        return None
 
-        return metadata
+    return _map_response(metadata_id, response)
 
 
-def _map_response(metadata_id: UUID, response: Dict) -> Dict:
+def _map_response(metadata_id: str, response: Dict) -> Dict:
     title = response.get('NorwegianTitle')
     description = response.get('Abstract')
     owner = response.get('ContactOwner', {}).get('Organization')
@@ -65,18 +40,22 @@ def _map_response(metadata_id: UUID, response: Dict) -> Dict:
     }
 
 
-async def _fetch_kartkatalog_metadata(metadata_id: UUID) -> Dict:
+async def _fetch_kartkatalog_metadata(metadata_id: str) -> Dict:
     try:
-        url = f'{_API_BASE_URL}/{str(metadata_id)}'
+        url = f'{_API_BASE_URL}/{metadata_id}'
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return None
+        session = get_session()
 
-                return await response.json()
+        async with session.get(url) as response:
+            if response.status != 200:
+                return None
+
+            return await response.json()
     except:
         return None
 
 
+_cache = RegistryCache('kartkatalog/{key}.json', _fetch_metadata,
+                       _CACHE_DAYS, Metadata.from_dict)
+
 __all__ = ['get_kartkatalog_metadata']
@@ -1,9 +1,10 @@
 import logging
 from typing import Tuple
-import aiohttp
 import asyncio
 from ..models.map_image_payload import MapImagePayload
 from ..utils.constants import MAP_IMAGE_API_URL
+from ..http_clients.session import get_session
+from ..utils.helpers.deadline import get_timeout
 
 _LOGGER = logging.getLogger(__name__)
 _TIMEOUT = 30
@@ -11,16 +12,22 @@ _TIMEOUT = 30
 
 async def create_map_image(payload: MapImagePayload) -> Tuple[int, bytes]:
     data = payload.to_dict()
+    timeout = get_timeout(_TIMEOUT)
+
+    if timeout <= 0:
+        _LOGGER.error(f'Could not generate map image (status 408)')
+        return 408, None
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(MAP_IMAGE_API_URL, json=data, timeout=_TIMEOUT) as response:
-                if response.status != 200:
-                    _LOGGER.error(
-                        f'Could not generate map image (status {response.status})')
-                    return response.status, None
-
-                return 200, await response.read()
+        session = get_session()
+
+        async with session.post(MAP_IMAGE_API_URL, json=data, timeout=timeout) as response:
+            if response.status != 200:
+                _LOGGER.error(
+                    f'Could not generate map image (status {response.status})')
+                return response.status, None
+
+            return 200, await response.read()
     except asyncio.TimeoutError:
         _LOGGER.error(f'Could not generate map image (status 408)')
         return 408, None
@@ -1,8 +1,9 @@
 from typing import List, Dict, Tuple
-import aiohttp
 from lxml import etree as ET
 from osgeo import ogr, osr
 from ..http_clients.wfs import query_wfs
+from ..http_clients.session import get_session
+from ..utils.helpers.deadline import get_timeout
 
 _WFS_URL = 'https://wfs.geonorge.no/skwms1/wfs.administrative_enheter'
 
@@ -49,17 +50,18 @@ async def _fetch_municipality(x: float, y: float, epsg: int) -> Tuple[str, str]:
     try:
         url = f'https://api.kartverket.no/kommuneinfo/v1/punkt?nord={y}&ost={x}&koordsys={epsg}&filtrer=kommunenummer,kommunenavn'
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=5) as response:
-                if response.status != 200:
-                    return None
+        session = get_session()
 
-                json: Dict = await response.json()
+        async with session.get(url, timeout=get_timeout(5)) as response:
+            if response.status != 200:
+                return None
 
-                municipality_number = json.get('kommunenummer', None)
-                municipality_name = json.get('kommunenavn', None)
+            json: Dict = await response.json()
 
-                return municipality_number, municipality_name
+            municipality_number = json.get('kommunenummer', None)
+            municipality_name = json.get('kommunenavn', None)
+
+            return municipality_number, municipality_name
     except:
         return None
 
@@ -5,10 +5,11 @@ from ..coverage import get_values_from_wfs
 from ..codelist import get_codelist
 from ...models.quality_measurement import QualityMeasurement
 from ...models.config.quality_indicator import QualityIndicator
+from ...utils.helpers.geometry_context import GeometryContext
 
 
-async def get_coverage_quality(quality_indicator: QualityIndicator, geometry: ogr.Geometry, epsg: int) -> Tuple[List[QualityMeasurement], str, bool]:
-    quality_data, has_coverage = await _get_coverage_quality_data(quality_indicator, geometry, epsg)
+async def get_coverage_quality(quality_indicator: QualityIndicator, geometry: ogr.Geometry, epsg: int, context: GeometryContext = None) -> Tuple[List[QualityMeasurement], str, bool]:
+    quality_data, has_coverage = await _get_coverage_quality_data(quality_indicator, geometry, epsg, context)
 
     if quality_data is None:
         return [], None, False
@@ -24,8 +25,8 @@ async def get_coverage_quality(quality_indicator: QualityIndicator, geometry: og
     return measurements, warning, has_coverage
 
 
-async def _get_coverage_quality_data(quality_indicator: QualityIndicator, geometry: ogr.Geometry, epsg: int) -> Tuple[Dict[str, any], bool]:
-    values, hit_area_percent = await _get_values_from_web_service(quality_indicator, geometry, epsg)
+async def _get_coverage_quality_data(quality_indicator: QualityIndicator, geometry: ogr.Geometry, epsg: int, context: GeometryContext) -> Tuple[Dict[str, any], bool]:
+    values, hit_area_percent = await _get_values_from_web_service(quality_indicator, geometry, epsg, context)
 
     if len(values) == 0:
         return None, False
@@ -54,9 +55,9 @@ async def _get_coverage_quality_data(quality_indicator: QualityIndicator, geomet
     return measurement, _has_coverage(values)
 
 
-async def _get_values_from_web_service(quality_indicator: QualityIndicator, geometry: ogr.Geometry, epsg: int) -> Tuple[List[str], float]:
+async def _get_values_from_web_service(quality_indicator: QualityIndicator, geometry: ogr.Geometry, epsg: int, context: GeometryContext) -> Tuple[List[str], float]:
     if quality_indicator.wfs is not None:
-        return await get_values_from_wfs(quality_indicator.wfs, geometry, epsg)
+        return await get_values_from_wfs(quality_indicator.wfs, geometry, epsg, context)
 
     # TODO: Add support for ArcGIS and OGC Features API
 
@@ -90,12 +91,11 @@ def _has_coverage(values: List[str]) -> bool:
     return True
 
 
-def _get_label_from_codelist(value: str, codelist: List[Dict]) -> str:
-    if codelist is None or len(codelist) == 0:
+def _get_label_from_codelist(value: str, codelist: Dict[str, Dict]) -> str:
+    if codelist is None:
         return None
 
-    result = next(
-        (entry for entry in codelist if entry['value'] == value), None)
+    result = codelist.get(value)
 
     return result.get('label') if result is not None else None
 
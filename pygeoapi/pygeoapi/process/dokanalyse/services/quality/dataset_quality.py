@@ -2,7 +2,7 @@ from typing import List, Dict
 from uuid import UUID
 from . import get_threshold_values
 from ..dok_status import get_dok_status_for_dataset
-from ...utils.helpers.common import evaluate_condition
+from ...utils.helpers.filter import compile_filter
 from ...models.quality_measurement import QualityMeasurement
 from ...models.config.quality_indicator import QualityIndicator
 from ...models.config.quality_indicator_type import QualityIndicatorType
@@ -78,7 +78,7 @@ def _get_dataset_quality_warning_text(value: any, quality_indicator: QualityIndi
     input_filter = quality_indicator.input_filter
 
     if input_filter is not None:
-        result = evaluate_condition(input_filter, data)
+        result = compile_filter(input_filter).evaluate(data)
 
         if not result:
             return None
@@ -2,8 +2,8 @@ import base64
 from io import BytesIO
 from typing import List
 import asyncio
-import aiohttp
 from PIL import Image
+from ...http_clients.session import get_session
 
 
 async def create_legend(urls) -> str:
@@ -42,12 +42,13 @@ def _merge_images(img_data: List[bytes]) -> str:
 
 async def _fetch_image(url) -> bytes:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return None
+        session = get_session()
 
-                return await response.read()
+        async with session.get(url) as response:
+            if response.status != 200:
+                return None
+
+            return await response.read()
     except:
         return None
 
@@ -0,0 +1,127 @@
+import os
+import time
+import json
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Callable, Awaitable, Dict
+from ..utils.constants import CACHE_DIR
+
+_LOGGER = logging.getLogger(__name__)
+
+_RETRY_INTERVAL = 300
+
+
+class _CacheEntry:
+    def __init__(self, value: Any, fetched: float):
+        self.value = value
+        self.fetched = fetched
+        self.attempted = fetched
+
+
+class RegistryCache:
+    def __init__(self, file_path: str, fetch: Callable[[str], Awaitable[Any]], cache_days: int, index: Callable[[Any], Any] = None):
+        self.file_path = file_path
+        self.fetch = fetch
+        self.index = index
+        self.max_age = cache_days * 86400
+        self.__entries: Dict[str, _CacheEntry] = {}
+        self.__refreshes: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str = None) -> Any:
+        entry = self.__entries.get(key) or self.__read_from_disk(key)
+
+        if entry is None:
+            return await asyncio.shield(self.__get_refresh_task(key))
+
+        if self.__is_stale(entry):
+            self.__get_refresh_task(key)
+
+        return entry.value
+
+    def __is_stale(self, entry: _CacheEntry) -> bool:
+        now = time.time()
+
+        return now - entry.fetched > self.max_age and now - entry.attempted > _RETRY_INTERVAL
+
+    def __get_refresh_task(self, key: str) -> asyncio.Task:
+        task = self.__refreshes.get(key)
+
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self.__refresh(key))
+            self.__refreshes[key] = task
+
+        return task
+
+    async def __refresh(self, key: str) -> Any:
+        try:
+            value = await self.fetch(key)
+        except Exception as err:
+            _LOGGER.error(err)
+            value = None
+        finally:
+            if self.__refreshes.get(key) is asyncio.current_task():
+                del self.__refreshes[key]
+
+        entry = self.__entries.get(key)
+
+        if value is None:
+            if entry is None:
+                return None
+
+            entry.attempted = time.time()
+            _LOGGER.warning(
+                f'Could not refresh {self.__get_path(key)}, keeping the cached value')
+
+            return entry.value
+
+        entry = self.__create_entry(value, time.time())
+        self.__entries[key] = entry
+        self.__write_to_disk(key, value)
+
+        return entry.value
+
+    def __create_entry(self, value: Any, fetched: float) -> _CacheEntry:
+        if self.index is not None:
+            value = self.index(value)
+
+        return _CacheEntry(value, fetched)
+
+    def __get_path(self, key: str) -> Path:
+        return Path(os.path.join(CACHE_DIR, self.file_path.format(key=key)))
+
+    def __read_from_disk(self, key: str) -> _CacheEntry:
+        file_path = self.__get_path(key)
+
+        try:
+            with file_path.open(encoding='utf-8') as file:
+                value = json.load(file)
+
+            fetched = file_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            _LOGGER.warning(f'Could not read {file_path}: {err}')
+            return None
+
+        entry = self.__create_entry(value, fetched)
+        self.__entries[key] = entry
+
+        return entry
+
+    def __write_to_disk(self, key: str, value: Any) -> None:
+        file_path = self.__get_path(key)
+        tmp_path = file_path.with_suffix(f'.{os.getpid()}.tmp')
+
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with tmp_path.open('w', encoding='utf-8') as file:
+                json.dump(value, file, indent=2)
+
+            os.replace(tmp_path, file_path)
+        except Exception as err:
+            _LOGGER.warning(f'Could not write {file_path}: {err}')
+
+
+__all__ = ['RegistryCache']
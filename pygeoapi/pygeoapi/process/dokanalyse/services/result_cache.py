@@ -0,0 +1,150 @@
+import os
+import time
+import pickle
+import hashlib
+import logging
+from os import path
+from pathlib import Path
+from typing import List, Dict, Tuple
+import shapely
+from osgeo import ogr
+from cachetools import TLRUCache
+from ..utils.helpers.geometry import geometry_to_shapely
+from ..utils.helpers.geometry_context import GeometryContext
+from ..utils.constants import CACHE_DIR, RESULT_CACHE_DISK, WGS84_EPSG
+
+_LOGGER = logging.getLogger(__name__)
+
+_MAX_BYTES = 128 * 1024 * 1024
+_DISK_CACHE_DIR = Path(path.join(CACHE_DIR, 'results'))
+
+_cache = TLRUCache(maxsize=_MAX_BYTES, ttu=lambda _, value, now: value[0], getsizeof=lambda value: value[2])
+
+_stats = {
+    'hits': 0,
+    'disk_hits': 0,
+    'misses': 0
+}
+
+
+def create_cache_key(url: str, layer: str, filter: str, geometry: ogr.Geometry, epsg: int, context: GeometryContext = None) -> str:
+    geometry_hash = _get_geometry_hash(geometry, epsg, context)
+    key = f'{url}|{layer}|{filter}|{geometry_hash}|{epsg}'
+
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def get_cached_result(key: str) -> Dict[str, List]:
+    entry = _cache.get(key)
+
+    if entry is not None:
+        _stats['hits'] += 1
+        return _deserialize(entry[1])
+
+    if RESULT_CACHE_DISK:
+        entry = _read_from_disk(key)
+
+        if entry is not None:
+            if entry[2] <= _MAX_BYTES:
+                _cache[key] = entry
+
+            _stats['hits'] += 1
+            _stats['disk_hits'] += 1
+            return _deserialize(entry[1])
+
+    _stats['misses'] += 1
+
+    return None
+
+
+def set_cached_result(key: str, result: Dict[str, List], ttl: int) -> None:
+    if not ttl or ttl <= 0:
+        return
+
+    payload = _serialize(result)
+    entry = (time.monotonic() + ttl, payload, _get_size(payload))
+
+    if entry[2] > _MAX_BYTES:
+        return
+
+    _cache[key] = entry
+
+    if RESULT_CACHE_DISK:
+        _write_to_disk(key, entry[1], time.time() + ttl)
+
+
+def get_result_cache_stats() -> Dict[str, int]:
+    return {
+        **_stats,
+        'size': len(_cache),
+        'bytes': _cache.currsize
+    }
+
+
+def _get_geometry_hash(geometry: ogr.Geometry, epsg: int, context: GeometryContext) -> str:
+    grid_size = 1e-7 if epsg == WGS84_EPSG else 0.01
+    geom = context.to_shapely(geometry) if context is not None else geometry_to_shapely(geometry)
+    geom = shapely.normalize(shapely.set_precision(geom, grid_size))
+
+    return hashlib.sha256(shapely.to_wkb(geom)).hexdigest()
+
+
+def _serialize(result: Dict[str, List]) -> Dict[str, List]:
+    return {
+        'properties': result['properties'],
+        'geometries': [bytes(geom.ExportToIsoWkb()) if geom is not None else None for geom in result['geometries']]
+    }
+
+
+def _get_size(payload: Dict[str, List]) -> int:
+    geometries_size = sum(len(wkb) for wkb in payload['geometries'] if wkb is not None)
+
+    return geometries_size + len(pickle.dumps(payload['properties']))
+
+
+def _deserialize(payload: Dict[str, List]) -> Dict[str, List]:
+    return {
+        'properties': [props.copy() for props in payload['properties']],
+        'geometries': [ogr.CreateGeometryFromWkb(wkb) if wkb is not None else None for wkb in payload['geometries']]
+    }
+
+
+def _read_from_disk(key: str) -> Tuple[float, Dict[str, List]]:
+    file_path = _DISK_CACHE_DIR.joinpath(f'{key}.pickle')
+
+    if not file_path.exists():
+        return None
+
+    try:
+        with file_path.open('rb') as file:
+            expires, payload = pickle.load(file)
+    except Exception as err:
+        _LOGGER.warning(f'Could not read cached result {key}: {err}')
+        return None
+
+    remaining = expires - time.time()
+
+    if remaining <= 0:
+        file_path.unlink(missing_ok=True)
+        return None
+
+    return time.monotonic() + remaining, payload, _get_size(payload)
+
+
+def _write_to_disk(key: str, payload: Dict[str, List], expires: float) -> None:
+    file_path = _DISK_CACHE_DIR.joinpath(f'{key}.pickle')
+    tmp_path = file_path.with_suffix(f'.{os.getpid()}.tmp')
+
+    try:
+        _DISK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+        with tmp_path.open('wb') as file:
+            pickle.dump((expires, payload), file)
+
+        os.replace(tmp_path, file_path)
+    except Exception as err:
+        _LOGGER.warning(f'Could not write cached result {key}: {err}')
+
+
+__all__ = ['create_cache_key', 'get_cached_result',
+           'set_cached_result', 'get_result_cache_stats']
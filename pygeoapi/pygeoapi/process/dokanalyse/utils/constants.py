@@ -8,5 +8,8 @@ AR5_FGDB_PATH: Final[str] = getenv('AR5_FGDB_PATH')
 SOCKET_IO_SRV_URL: Final[str] = getenv('SOCKET_IO_SRV_URL')
 BLOB_STORAGE_CONN_STR: Final[str] = getenv('BLOB_STORAGE_CONN_STR')
 MAP_IMAGE_API_URL: Final[str] = getenv('MAP_IMAGE_API_URL')
+REQUEST_TIMEOUT: Final[int] = int(getenv('REQUEST_TIMEOUT', '60'))
+PAGE_SIZE: Final[int] = int(getenv('PAGE_SIZE', '1000'))
+RESULT_CACHE_DISK: Final[bool] = getenv('RESULT_CACHE_DISK', 'false').lower() == 'true'
 DEFAULT_EPSG: Final[int] = 25833
 WGS84_EPSG: Final[int] = 4326
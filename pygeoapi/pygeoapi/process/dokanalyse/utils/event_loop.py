@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import threading
+from typing import Coroutine, Any
+
+_LOGGER = logging.getLogger(__name__)
+_SHUTDOWN_TIMEOUT = 10
+
+_loop: asyncio.AbstractEventLoop = None
+_lock = threading.Lock()
+
+
+def run_coroutine(coro: Coroutine) -> Any:
+    loop = _get_event_loop()
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+
+    return future.result()
+
+
+def stop_event_loop(cleanup: Coroutine = None) -> None:
+    global _loop
+
+    with _lock:
+        loop = _loop
+        _loop = None
+
+    if loop is None:
+        if cleanup is not None:
+            cleanup.close()
+        return
+
+    if cleanup is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(
+                cleanup, loop).result(_SHUTDOWN_TIMEOUT)
+        except Exception as err:
+            _LOGGER.error(err)
+
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_run_event_loop, args=(_loop,), name='dokanalyse-event-loop', daemon=True)
+            thread.start()
+
+        return _loop
+
+
+def _run_event_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+
+
+__all__ = ['run_coroutine', 'stop_event_loop']
@@ -3,6 +3,7 @@ from os import environ
 from typing import List
 from datetime import datetime, timezone
 from lxml import etree as ET
+from .filter import compile_filter
 from ...models.exceptions import DokAnalysisException
 
 
@@ -85,27 +86,7 @@ def xpath_select_one(element: ET._Element, path: str) -> any:
 
 
 def evaluate_condition(condition: str, data: dict[str, any]) -> bool:
-    parsed_condition = _parse_condition(condition)
-    result = eval(parsed_condition, data.copy())
-
-    if isinstance(result, (bool)):
-        return result
-
-    raise Exception
-
-
-def _parse_condition(condition: str) -> str:
-    regex = r'(?<!=|>|<)\s*=\s*(?!=)'
-    condition = re.sub(regex, ' == ', condition, 0, re.MULTILINE)
-
-    return _replace_all(
-        condition, {' AND ': ' and ', ' OR ': ' or ', ' IN ': ' in ', ' NOT ': ' not '})
-
-
-def _replace_all(text: str, replacements: dict) -> str:
-    for i, j in replacements.items():
-        text = text.replace(i, j)
-    return text
+    return compile_filter(condition).evaluate(data)
 
 
 __all__ = [
@@ -0,0 +1,33 @@
+import time
+from contextvars import ContextVar
+
+_deadline_ctx_var: ContextVar[float] = ContextVar('deadline', default=None)
+
+
+def set_deadline(deadline: float) -> None:
+    _deadline_ctx_var.set(deadline)
+
+
+def get_deadline() -> float:
+    return _deadline_ctx_var.get()
+
+
+def get_remaining_time() -> float:
+    deadline = _deadline_ctx_var.get()
+
+    if deadline is None:
+        return None
+
+    return max(deadline - time.monotonic(), 0)
+
+
+def get_timeout(timeout: float) -> float:
+    remaining = get_remaining_time()
+
+    if remaining is None:
+        return timeout
+
+    return min(timeout, remaining)
+
+
+__all__ = ['set_deadline', 'get_deadline', 'get_remaining_time', 'get_timeout']
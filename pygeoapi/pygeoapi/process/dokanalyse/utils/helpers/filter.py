@@ -0,0 +1,368 @@
+import re
+import operator
+from xml.sax.saxutils import escape
+from functools import lru_cache
+from typing import List, Dict, Tuple, Callable, Any
+
+_TOKEN_REGEX = re.compile(r'''
+    \s*(?:
+        (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")|
+        (?P<number>-?\d+(?:\.\d+)?)|
+        (?P<operator><>|!=|==|<=|>=|=|<|>)|
+        (?P<punctuation>[()\[\],])|
+        (?P<name>[A-Za-z_ÆØÅæøå][\wÆØÅæøå.]*)
+    )''', re.VERBOSE)
+
+_KEYWORDS = ['AND', 'OR', 'NOT', 'IN']
+
+_FES_COMPARISONS = {
+    '=': 'PropertyIsEqualTo',
+    '!=': 'PropertyIsNotEqualTo',
+    '<': 'PropertyIsLessThan',
+    '<=': 'PropertyIsLessThanOrEqualTo',
+    '>': 'PropertyIsGreaterThan',
+    '>=': 'PropertyIsGreaterThanOrEqualTo'
+}
+
+_CQL2_IDENTIFIER_REGEX = re.compile(r'^[A-Za-z_][\w.]*$')
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+
+class Comparison:
+    def __init__(self, property: str, operator: str, value: Any):
+        self.property = property
+        self.operator = '=' if operator == '==' else '!=' if operator == '<>' else operator
+        self.value = value
+
+    def compile(self) -> Callable[[Dict], bool]:
+        prop, value, compare = self.property, self.value, _COMPARISONS[self.operator]
+        is_equality = self.operator in ['=', '!=']
+
+        def predicate(data: Dict) -> bool:
+            prop_value = data.get(prop)
+
+            if prop_value is None and not is_equality:
+                return False
+
+            try:
+                return compare(prop_value, value)
+            except TypeError:
+                return False
+
+        return predicate
+
+    def to_fes(self) -> str:
+        if self.value is None:
+            is_null = f'<fes:PropertyIsNull>{_fes_property(self.property)}</fes:PropertyIsNull>'
+            return is_null if self.operator == '=' else f'<fes:Not>{is_null}</fes:Not>'
+
+        element = _FES_COMPARISONS[self.operator]
+
+        return f'<fes:{element}>{_fes_property(self.property)}{_fes_literal(self.value)}</fes:{element}>'
+
+    def to_cql2(self) -> str:
+        if self.value is None:
+            is_null = f'{_cql2_property(self.property)} IS NULL'
+            return is_null if self.operator == '=' else f'NOT ({is_null})'
+
+        operator = '<>' if self.operator == '!=' else self.operator
+
+        return f'{_cql2_property(self.property)} {operator} {_cql2_literal(self.value)}'
+
+
+class InList:
+    def __init__(self, property: str, values: List[Any], negated: bool = False):
+        self.property = property
+        self.values = values
+        self.negated = negated
+
+    def compile(self) -> Callable[[Dict], bool]:
+        prop, values, negated = self.property, frozenset(self.values), self.negated
+
+        return lambda data: (data.get(prop) in values) != negated
+
+    def to_fes(self) -> str:
+        comparisons = [Comparison(self.property, '=', value).to_fes()
+                       for value in self.values]
+        fes = comparisons[0] if len(comparisons) == 1 else f'<fes:Or>{"".join(comparisons)}</fes:Or>'
+
+        return f'<fes:Not>{fes}</fes:Not>' if self.negated else fes
+
+    def to_cql2(self) -> str:
+        values = ', '.join(_cql2_literal(value) for value in self.values)
+        cql2 = f'{_cql2_property(self.property)} IN ({values})'
+
+        return f'NOT ({cql2})' if self.negated else cql2
+
+
+class And:
+    def __init__(self, operands: List):
+        self.operands = operands
+
+    def compile(self) -> Callable[[Dict], bool]:
+        predicates = [operand.compile() for operand in self.operands]
+
+        return lambda data: all(predicate(data) for predicate in predicates)
+
+    def to_fes(self) -> str:
+        return f'<fes:And>{"".join(operand.to_fes() for operand in self.operands)}</fes:And>'
+
+    def to_cql2(self) -> str:
+        return ' AND '.join(f'({operand.to_cql2()})' for operand in self.operands)
+
+
+class Or:
+    def __init__(self, operands: List):
+        self.operands = operands
+
+    def compile(self) -> Callable[[Dict], bool]:
+        predicates = [operand.compile() for operand in self.operands]
+
+        return lambda data: any(predicate(data) for predicate in predicates)
+
+    def to_fes(self) -> str:
+        return f'<fes:Or>{"".join(operand.to_fes() for operand in self.operands)}</fes:Or>'
+
+    def to_cql2(self) -> str:
+        return ' OR '.join(f'({operand.to_cql2()})' for operand in self.operands)
+
+
+class Not:
+    def __init__(self, operand):
+        self.operand = operand
+
+    def compile(self) -> Callable[[Dict], bool]:
+        predicate = self.operand.compile()
+
+        return lambda data: not predicate(data)
+
+    def to_fes(self) -> str:
+        return f'<fes:Not>{self.operand.to_fes()}</fes:Not>'
+
+    def to_cql2(self) -> str:
+        return f'NOT ({self.operand.to_cql2()})'
+
+
+class Filter:
+    def __init__(self, text: str, expression):
+        self.text = text
+        self.expression = expression
+        self.properties = _get_properties(expression)
+        self.__predicate = expression.compile()
+
+    def to_fes(self) -> str:
+        return self.expression.to_fes()
+
+    def to_cql2(self) -> str:
+        return self.expression.to_cql2()
+
+    def evaluate(self, data: Dict[str, Any]) -> bool:
+        return self.__predicate(data)
+
+
+@lru_cache(maxsize=1024)
+def compile_filter(text: str) -> Filter:
+    tokens = _tokenize(text)
+    parser = _Parser(tokens, text)
+    expression = parser.parse()
+
+    return Filter(text, expression)
+
+
+class _Parser:
+    def __init__(self, tokens: List[tuple], text: str):
+        self.tokens = tokens
+        self.text = text
+        self.pos = 0
+
+    def parse(self):
+        expression = self.__parse_or()
+
+        if self.pos != len(self.tokens):
+            self.__error()
+
+        return expression
+
+    def __parse_or(self):
+        operands = [self.__parse_and()]
+
+        while self.__accept('keyword', 'OR'):
+            operands.append(self.__parse_and())
+
+        return operands[0] if len(operands) == 1 else Or(operands)
+
+    def __parse_and(self):
+        operands = [self.__parse_not()]
+
+        while self.__accept('keyword', 'AND'):
+            operands.append(self.__parse_not())
+
+        return operands[0] if len(operands) == 1 else And(operands)
+
+    def __parse_not(self):
+        if self.__accept('keyword', 'NOT'):
+            return Not(self.__parse_not())
+
+        return self.__parse_predicate()
+
+    def __parse_predicate(self):
+        if self.__accept('punctuation', '('):
+            expression = self.__parse_or()
+            self.__expect('punctuation', ')')
+            return expression
+
+        property = self.__expect('name')
+
+        if self.__accept('keyword', 'NOT'):
+            self.__expect('keyword', 'IN')
+            return InList(property, self.__parse_list(), True)
+
+        if self.__accept('keyword', 'IN'):
+            return InList(property, self.__parse_list())
+
+        operator = self.__expect('operator')
+
+        return Comparison(property, operator, self.__parse_literal())
+
+    def __parse_list(self) -> List[Any]:
+        closing = ']' if self.__accept('punctuation', '[') else None
+
+        if closing is None:
+            self.__expect('punctuation', '(')
+            closing = ')'
+
+        values = [self.__parse_literal()]
+
+        while self.__accept('punctuation', ','):
+            values.append(self.__parse_literal())
+
+        self.__expect('punctuation', closing)
+
+        return values
+
+    def __parse_literal(self) -> Any:
+        kind, value = self.__peek()
+
+        if kind not in ['string', 'number', 'literal']:
+            self.__error()
+
+        self.pos += 1
+
+        return value
+
+    def __peek(self) -> tuple:
+        if self.pos >= len(self.tokens):
+            return None, None
+
+        return self.tokens[self.pos]
+
+    def __accept(self, kind: str, value: str = None) -> bool:
+        token_kind, token_value = self.__peek()
+
+        if token_kind == kind and (value is None or token_value == value):
+            self.pos += 1
+            return True
+
+        return False
+
+    def __expect(self, kind: str, value: str = None) -> Any:
+        token_kind, token_value = self.__peek()
+
+        if token_kind != kind or (value is not None and token_value != value):
+            self.__error()
+
+        self.pos += 1
+
+        return token_value
+
+    def __error(self) -> None:
+        raise ValueError(f'Invalid filter: "{self.text}"')
+
+
+def _get_properties(expression) -> Tuple[str]:
+    if isinstance(expression, (Comparison, InList)):
+        return (expression.property,)
+
+    operands = [expression.operand] if isinstance(
+        expression, Not) else expression.operands
+    properties: List[str] = []
+
+    for operand in operands:
+        properties.extend(prop for prop in _get_properties(
+            operand) if prop not in properties)
+
+    return tuple(properties)
+
+
+def _fes_property(property: str) -> str:
+    return f'<fes:ValueReference>{escape(property)}</fes:ValueReference>'
+
+
+def _fes_literal(value: Any) -> str:
+    if isinstance(value, bool):
+        value = str(value).lower()
+
+    return f'<fes:Literal>{escape(str(value))}</fes:Literal>'
+
+
+def _cql2_property(property: str) -> str:
+    if _CQL2_IDENTIFIER_REGEX.match(property):
+        return property
+
+    return '"' + property.replace('"', '""') + '"'
+
+
+def _cql2_literal(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+
+    return str(value)
+
+
+def _tokenize(text: str) -> List[tuple]:
+    tokens: List[tuple] = []
+    pos = 0
+    text = text.rstrip()
+
+    while pos < len(text):
+        match = _TOKEN_REGEX.match(text, pos)
+
+        if match is None or match.end() == pos:
+            raise ValueError(f'Invalid filter: "{text}"')
+
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+
+        if kind == 'string':
+            quote = value[0]
+            tokens.append(('string', value[1:-1].replace(quote * 2, quote)))
+        elif kind == 'number':
+            tokens.append(
+                ('number', float(value) if '.' in value else int(value)))
+        elif kind == 'name' and value.upper() in _KEYWORDS:
+            tokens.append(('keyword', value.upper()))
+        elif kind == 'name' and value in ['True', 'False', 'None']:
+            tokens.append(
+                ('literal', {'True': True, 'False': False, 'None': None}[value]))
+        else:
+            tokens.append((kind, value))
+
+    return tokens
+
+
+__all__ = ['Filter', 'Comparison', 'InList',
+           'And', 'Or', 'Not', 'compile_filter']
@@ -1,14 +1,19 @@
 import json
+import threading
+import numpy as np
 from typing import Dict, List
 from osgeo import ogr, osr
 from math import pi
 from re import search
+import shapely
 from shapely import wkt
 from shapely.wkt import dumps
 from ..constants import DEFAULT_EPSG, WGS84_EPSG
 
 _EARTH_RADIUS = 6371008.8
 
+_transformations = threading.local()
+
 
 def geometry_from_gml(gml_str: str) -> ogr.Geometry:
     try:
@@ -53,6 +58,59 @@ def geometry_to_arcgis_geom(geometry: ogr.Geometry, epsg: int) -> str:
     return json.dumps(arcgis_geom)
 
 
+def geometry_to_shapely(geometry: ogr.Geometry) -> shapely.Geometry:
+    return shapely.from_wkb(bytes(geometry.ExportToIsoWkb()))
+
+
+def geometry_from_esri_json(esri_json: Dict) -> ogr.Geometry:
+    if esri_json is None:
+        return None
+
+    if 'rings' in esri_json:
+        geometry = _polygon_from_esri_rings(esri_json['rings'])
+    elif 'paths' in esri_json:
+        paths = esri_json['paths']
+        geometry = shapely.LineString(paths[0]) if len(paths) == 1 else shapely.MultiLineString(paths)
+    elif 'points' in esri_json:
+        geometry = shapely.MultiPoint(esri_json['points'])
+    elif 'x' in esri_json and 'y' in esri_json:
+        geometry = shapely.Point(esri_json['x'], esri_json['y'])
+    else:
+        return None
+
+    try:
+        return ogr.CreateGeometryFromWkb(shapely.to_wkb(geometry))
+    except:
+        return None
+
+
+def _polygon_from_esri_rings(rings: List[List]) -> shapely.Geometry:
+    shells: List[shapely.LinearRing] = []
+    holes: List[shapely.LinearRing] = []
+
+    for coords in rings:
+        ring = shapely.LinearRing(coords)
+
+        if ring.is_ccw:
+            holes.append(ring)
+        else:
+            shells.append(ring)
+
+    polygons = [shapely.Polygon(shell) for shell in shells]
+    interiors: List[List[shapely.LinearRing]] = [[] for _ in shells]
+
+    for hole in holes:
+        point = shapely.Point(hole.coords[0])
+        index = next((i for i, polygon in enumerate(polygons) if polygon.covers(point)), None)
+
+        if index is not None:
+            interiors[index].append(hole)
+
+    polygons = [shapely.Polygon(shell, interiors[i]) for i, shell in enumerate(shells)]
+
+    return polygons[0] if len(polygons) == 1 else shapely.MultiPolygon(polygons)
+
+
 def create_input_geometry(geo_json: Dict) -> ogr.Geometry:
     epsg = get_epsg(geo_json)
     geometry = ogr.CreateGeometryFromJson(str(geo_json))
@@ -92,18 +150,60 @@ def create_feature(geometry: ogr.Geometry, properties: Dict = {}) -> Dict:
 
 
 def transform_geometry(geometry: ogr.Geometry, src_epsg: int, dest_epsg: int) -> ogr.Geometry:
+    transform = get_coordinate_transformation(src_epsg, dest_epsg)
+    clone: ogr.Geometry = geometry.Clone()
+    clone.Transform(transform)
+
+    return clone
+
+
+def transform_geometries(geometries: List[ogr.Geometry], src_epsg: int, dest_epsg: int) -> List[ogr.Geometry]:
+    indices = [i for i, geometry in enumerate(geometries) if geometry is not None]
+
+    if src_epsg == dest_epsg or len(indices) == 0:
+        return list(geometries)
+
+    transform = get_coordinate_transformation(src_epsg, dest_epsg)
+    shapely_geoms = [geometry_to_shapely(geometries[i]) for i in indices]
+
+    def transform_coords(coords: np.ndarray) -> np.ndarray:
+        return np.array(transform.TransformPoints(coords))[:, :2]
+
+    transformed_geoms = shapely.transform(shapely_geoms, transform_coords)
+    result: List[ogr.Geometry] = list(geometries)
+
+    for i, wkb in zip(indices, shapely.to_wkb(transformed_geoms)):
+        result[i] = ogr.CreateGeometryFromWkb(wkb)
+
+    return result
+
+
+def get_coordinate_transformation(src_epsg: int, dest_epsg: int, axis_strategy: int = osr.OAMS_TRADITIONAL_GIS_ORDER) -> osr.CoordinateTransformation:
+    transformations: Dict = getattr(_transformations, 'cache', None)
+
+    if transformations is None:
+        transformations = _transformations.cache = {}
+
+    key = (src_epsg, dest_epsg, axis_strategy)
+    transformation = transformations.get(key)
+
+    if transformation is None:
+        transformation = _create_coordinate_transformation(
+            src_epsg, dest_epsg, axis_strategy)
+        transformations[key] = transformation
+
+    return transformation
+
+
+def _create_coordinate_transformation(src_epsg: int, dest_epsg: int, axis_strategy: int) -> osr.CoordinateTransformation:
     source = osr.SpatialReference()
     source.ImportFromEPSG(src_epsg)
-    source.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    source.SetAxisMappingStrategy(axis_strategy)
 
     target = osr.SpatialReference()
     target.ImportFromEPSG(dest_epsg)
 
-    transform = osr.CoordinateTransformation(source, target)
-    clone: ogr.Geometry = geometry.Clone()
-    clone.Transform(transform)
-
-    return clone
+    return osr.CoordinateTransformation(source, target)
 
 
 def length_to_degrees(distance: float) -> float:
@@ -166,10 +266,15 @@ __all__ = [
     'geometry_from_json',
     'geometry_to_wkt',
     'geometry_to_arcgis_geom',
+    'geometry_to_shapely',
+    'geometry_from_esri_json',
     'create_input_geometry',
     'create_buffered_geometry',
     'create_feature_collection',
-    'create_feature'
+    'create_feature',
+    'transform_geometry',
+    'transform_geometries',
+    'get_coordinate_transformation',
     'length_to_degrees',
     'create_run_on_input_geometry_json',
     'get_epsg',
@@ -0,0 +1,114 @@
+import json
+from typing import Dict, Tuple, Callable, Any
+from osgeo import ogr
+from .geometry import create_buffered_geometry, create_run_on_input_geometry_json, geometry_to_wkt, geometry_to_arcgis_geom, geometry_to_shapely, transform_geometry
+
+
+class GeometryContext:
+    def __init__(self, geometry: ogr.Geometry, epsg: int, buffer: int):
+        self.__geometry = geometry
+        self.__epsg = epsg
+        self.__buffer = buffer or 0
+        self.__buffered: Dict[int, ogr.Geometry] = {0: geometry}
+        self.__owned: Dict[int, ogr.Geometry] = {id(geometry): geometry}
+        self.__encodings: Dict[Tuple, Any] = {}
+
+    @property
+    def geometry(self) -> ogr.Geometry:
+        return self.__geometry
+
+    @property
+    def epsg(self) -> int:
+        return self.__epsg
+
+    @property
+    def buffer(self) -> int:
+        return self.__buffer
+
+    @property
+    def input_geometry(self) -> ogr.Geometry:
+        return self.get_buffered(self.__buffer)
+
+    def get_buffered(self, distance: int) -> ogr.Geometry:
+        geometry = self.__buffered.get(distance)
+
+        if geometry is None:
+            geometry = create_buffered_geometry(
+                self.__geometry, distance, self.__epsg)
+            self.__buffered[distance] = geometry
+            self.__owned[id(geometry)] = geometry
+
+        return geometry
+
+    def get_envelope(self, geometry: ogr.Geometry) -> Tuple[float, float, float, float]:
+        return self.__encode(geometry, 'envelope', self.__epsg, lambda: geometry.GetEnvelope())
+
+    def get_area(self, geometry: ogr.Geometry) -> float:
+        return self.__encode(geometry, 'area', self.__epsg, lambda: geometry.GetArea())
+
+    def transform(self, geometry: ogr.Geometry, epsg: int) -> ogr.Geometry:
+        if epsg == self.__epsg:
+            return geometry
+
+        transformed = self.__encode(
+            geometry, 'transform', epsg, lambda: transform_geometry(geometry, self.__epsg, epsg))
+        self.__owned[id(transformed)] = transformed
+
+        return transformed
+
+    def to_gml(self, geometry: ogr.Geometry) -> str:
+        return self.__encode(geometry, 'gml', None, lambda: geometry.ExportToGML(['FORMAT=GML3']))
+
+    def to_wkt(self, geometry: ogr.Geometry, epsg: int) -> str:
+        return self.__encode(geometry, 'wkt', epsg, lambda: geometry_to_wkt(geometry, epsg))
+
+    def to_arcgis_geom(self, geometry: ogr.Geometry, epsg: int) -> str:
+        return self.__encode(geometry, 'arcgis', epsg, lambda: geometry_to_arcgis_geom(geometry, epsg))
+
+    def to_geojson(self, geometry: ogr.Geometry, orig_epsg: int) -> Dict:
+        # Each caller gets its own dict, as the GeoJSON is added to the response and may be modified
+        geojson = self.__encode(geometry, 'geojson', orig_epsg, lambda: json.dumps(
+            create_run_on_input_geometry_json(geometry, self.__epsg, orig_epsg)))
+
+        return json.loads(geojson)
+
+    def to_shapely(self, geometry: ogr.Geometry) -> Any:
+        return self.__encode(geometry, 'shapely', None, lambda: geometry_to_shapely(geometry))
+
+    def to_wkb(self, geometry: ogr.Geometry) -> bytes:
+        return self.__encode(geometry, 'wkb', None, lambda: bytes(geometry.ExportToWkb()))
+
+    def __encode(self, geometry: ogr.Geometry, format: str, epsg: int, encoder: Callable[[], Any]) -> Any:
+        if self.__owned.get(id(geometry)) is not geometry:
+            return encoder()
+
+        key = (id(geometry), format, epsg)
+
+        if key not in self.__encodings:
+            self.__encodings[key] = encoder()
+
+        return self.__encodings[key]
+
+
+def to_gml(geometry: ogr.Geometry, context: GeometryContext = None) -> str:
+    if context is not None:
+        return context.to_gml(geometry)
+
+    return geometry.ExportToGML(['FORMAT=GML3'])
+
+
+def to_wkt(geometry: ogr.Geometry, epsg: int, context: GeometryContext = None) -> str:
+    if context is not None:
+        return context.to_wkt(geometry, epsg)
+
+    return geometry_to_wkt(geometry, epsg)
+
+
+def to_arcgis_geom(geometry: ogr.Geometry, epsg: int, context: GeometryContext = None) -> str:
+    if context is not None:
+        return context.to_arcgis_geom(geometry, epsg)
+
+    return geometry_to_arcgis_geom(geometry, epsg)
+
+
+__all__ = ['GeometryContext', 'to_gml', 'to_wkt', 'to_arcgis_geom']
@@ -0,0 +1,306 @@
+import struct
+from functools import lru_cache
+from typing import List, Dict, Tuple
+import numpy as np
+from lxml import etree as ET
+from osgeo import ogr, osr
+from .geometry import geometry_from_gml
+
+_GEOGRAPHIC_EPSG_CODES = ['4326', '4258']
+
+_WKB_POINT = 1
+_WKB_LINE_STRING = 2
+_WKB_POLYGON = 3
+_WKB_MULTI_POINT = 4
+_WKB_MULTI_LINE_STRING = 5
+_WKB_MULTI_POLYGON = 6
+_WKB_25D = 0x80000000
+
+
+def geometry_from_gml_element(element: ET._Element) -> ogr.Geometry:
+    wkb = _element_to_wkb(element)
+
+    if wkb is None:
+        gml_str = ET.tostring(element, encoding='unicode')
+        return geometry_from_gml(gml_str)
+
+    try:
+        geometry = ogr.CreateGeometryFromWkb(wkb)
+    except:
+        return None
+
+    # The OGR GML reader attaches the srsName, so TransformTo and EPSG lookups depend on it
+    spatial_ref = _get_spatial_reference(element.get('srsName'))
+
+    if geometry is not None and spatial_ref is not None:
+        geometry.AssignSpatialReference(spatial_ref)
+
+    return geometry
+
+
+def geometries_from_gml_elements(elements: List[ET._Element]) -> List[ogr.Geometry]:
+    return [geometry_from_gml_element(element) if element is not None else None for element in elements]
+
+
+class MemberExtractor:
+    def __init__(self, properties: Tuple[str], geom_field: str):
+        self.properties = frozenset(properties)
+        self.geom_field = geom_field
+
+    def extract(self, member: ET._Element) -> Tuple[Dict[str, str], ET._Element]:
+        values: Dict[str, str] = {}
+        geom_elem: ET._Element = None
+        geom_found = self.geom_field is None
+        remaining = len(self.properties)
+        stack = list(reversed(member))
+
+        while stack:
+            element = stack.pop()
+            localname = _localname(element)
+
+            if localname is None:
+                continue
+
+            if not geom_found and localname == self.geom_field:
+                geom_elem = next(
+                    (child for child in element if _localname(child)), None)
+                geom_found = True
+                continue
+
+            if localname in self.properties and localname not in values and element.text is not None:
+                values[localname] = element.text
+                remaining -= 1
+
+            if remaining == 0 and geom_found:
+                break
+
+            stack.extend(reversed(element))
+
+        return values, geom_elem
+
+
+@lru_cache(maxsize=256)
+def get_member_extractor(properties: Tuple[str], geom_field: str) -> MemberExtractor:
+    return MemberExtractor(properties, geom_field)
+
+
+def _element_to_wkb(element: ET._Element) -> bytes:
+    if _is_geographic(element):
+        return None
+
+    dim = int(element.get('srsDimension', 2))
+
+    try:
+        return _to_wkb(element, dim)
+    except ValueError:
+        return None
+
+
+def _to_wkb(element: ET._Element, dim: int) -> bytes:
+    match _localname(element):
+        case 'Point':
+            return _point_to_wkb(element, dim)
+        case 'LineString' | 'Curve':
+            return _line_string_to_wkb(element, dim)
+        case 'Polygon' | 'Surface':
+            return _polygon_to_wkb(element, dim)
+        case 'MultiPoint':
+            return _multi_to_wkb(element, dim, _WKB_MULTI_POINT, _point_to_wkb)
+        case 'MultiCurve' | 'MultiLineString':
+            return _multi_to_wkb(element, dim, _WKB_MULTI_LINE_STRING, _line_string_to_wkb)
+        case 'MultiSurface' | 'MultiPolygon':
+            return _multi_to_wkb(element, dim, _WKB_MULTI_POLYGON, _polygon_to_wkb)
+        case _:
+            return None
+
+
+def _point_to_wkb(element: ET._Element, dim: int) -> bytes:
+    if _localname(element) != 'Point':
+        raise ValueError
+
+    coords = _read_coordinates(element, dim)
+
+    if len(coords) != 1:
+        raise ValueError
+
+    return _wkb_header(_WKB_POINT, coords) + coords.tobytes()
+
+
+def _line_string_to_wkb(element: ET._Element, dim: int) -> bytes:
+    localname = _localname(element)
+
+    if localname == 'LineString':
+        coords = _read_coordinates(element, dim)
+    elif localname == 'Curve':
+        coords = _read_curve_coordinates(element, dim)
+    else:
+        raise ValueError
+
+    return _wkb_header(_WKB_LINE_STRING, coords) + struct.pack('<I', len(coords)) + coords.tobytes()
+
+
+def _polygon_to_wkb(element: ET._Element, dim: int) -> bytes:
+    localname = _localname(element)
+
+    if localname == 'Surface':
+        patches = _get_children(_get_child(element, 'patches'), 'PolygonPatch')
+
+        if len(patches) != 1:
+            raise ValueError
+
+        element = patches[0]
+    elif localname != 'Polygon':
+        raise ValueError
+
+    rings = []
+
+    for boundary in _get_children(element, 'exterior') + _get_children(element, 'interior'):
+        linear_ring = _get_child(boundary, 'LinearRing')
+        rings.append(_read_coordinates(linear_ring, dim))
+
+    if len(rings) == 0 or len(set(ring.shape[1] for ring in rings)) > 1:
+        raise ValueError
+
+    parts = [_wkb_header(_WKB_POLYGON, rings[0]), struct.pack('<I', len(rings))]
+
+    for ring in rings:
+        parts.append(struct.pack('<I', len(ring)))
+        parts.append(ring.tobytes())
+
+    return b''.join(parts)
+
+
+def _multi_to_wkb(element: ET._Element, dim: int, wkb_type: int, member_to_wkb) -> bytes:
+    geometries = []
+
+    for child in element:
+        localname = _localname(child)
+
+        if localname is None:
+            continue
+
+        if localname.endswith('Member') or localname.endswith('Members'):
+            geometries.extend(
+                grandchild for grandchild in child if _localname(grandchild))
+
+    parts = [member_to_wkb(geometry, dim) for geometry in geometries]
+    flags = set(struct.unpack_from('<I', part, 1)[0] & _WKB_25D for part in parts)
+
+    if len(flags) > 1:
+        raise ValueError
+
+    if _WKB_25D in flags:
+        wkb_type |= _WKB_25D
+
+    header = struct.pack('<BII', 1, wkb_type, len(parts))
+
+    return header + b''.join(parts)
+
+
+def _read_curve_coordinates(element: ET._Element, dim: int) -> np.ndarray:
+    segments = _get_child(element, 'segments')
+    coords = []
+
+    for segment in segments:
+        localname = _localname(segment)
+
+        if localname is None:
+            continue
+
+        if localname != 'LineStringSegment':
+            raise ValueError
+
+        segment_coords = _read_coordinates(segment, dim)
+
+        if len(coords) > 0 and np.array_equal(coords[-1][-1], segment_coords[0]):
+            segment_coords = segment_coords[1:]
+
+        coords.append(segment_coords)
+
+    if len(coords) == 0:
+        raise ValueError
+
+    return np.concatenate(coords)
+
+
+def _read_coordinates(element: ET._Element, dim: int) -> np.ndarray:
+    pos_list = _get_child(element, 'posList', False)
+
+    if pos_list is not None:
+        dim = int(pos_list.get('srsDimension', dim))
+        text = pos_list.text or ''
+    else:
+        positions = _get_children(element, 'pos')
+
+        if len(positions) == 0:
+            raise ValueError
+
+        text = ' '.join(position.text or '' for position in positions)
+
+    coords = np.array(text.split(), dtype='<f8')
+
+    if dim not in (2, 3) or coords.size == 0 or coords.size % dim != 0:
+        raise ValueError
+
+    return coords.reshape(-1, dim)
+
+
+def _wkb_header(wkb_type: int, coords: np.ndarray) -> bytes:
+    if coords.shape[1] == 3:
+        wkb_type |= _WKB_25D
+
+    return struct.pack('<BI', 1, wkb_type)
+
+
+def _get_child(element: ET._Element, localname: str, required: bool = True) -> ET._Element:
+    if element is not None:
+        for child in element:
+            if _localname(child) == localname:
+                return child
+
+    if required:
+        raise ValueError
+
+    return None
+
+
+def _get_children(element: ET._Element, localname: str) -> List[ET._Element]:
+    return [child for child in element if _localname(child) == localname]
+
+
+def _localname(element: ET._Element) -> str:
+    tag = element.tag
+
+    if not isinstance(tag, str):
+        return None
+
+    return tag.rpartition('}')[2]
+
+
+@lru_cache(maxsize=32)
+def _get_spatial_reference(srs_name: str) -> osr.SpatialReference:
+    if not srs_name:
+        return None
+
+    spatial_ref = osr.SpatialReference()
+
+    try:
+        if spatial_ref.SetFromUserInput(srs_name) != 0:
+            return None
+    except:
+        return None
+
+    return spatial_ref
+
+
+def _is_geographic(element: ET._Element) -> bool:
+    srs_name: str = element.get('srsName')
+
+    if srs_name is None:
+        return False
+
+    return any(srs_name.endswith(f':{code}') or srs_name.endswith(f'/{code}') for code in _GEOGRAPHIC_EPSG_CODES)
+
+
+__all__ = ['geometry_from_gml_element', 'geometries_from_gml_elements',
+           'MemberExtractor', 'get_member_extractor']
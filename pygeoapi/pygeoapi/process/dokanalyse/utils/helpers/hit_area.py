@@ -0,0 +1,70 @@
+from typing import List
+import numpy as np
+import shapely
+from osgeo import ogr
+from .geometry import geometry_to_shapely
+from .geometry_context import GeometryContext
+from ...models.config.hit_area_method import HitAreaMethod
+
+
+def get_hit_area(geometry: ogr.Geometry, feature_geometries: List[ogr.Geometry], method: HitAreaMethod = HitAreaMethod.OGR, context: GeometryContext = None) -> float:
+    feature_geometries = [
+        geom for geom in feature_geometries if geom is not None]
+
+    if len(feature_geometries) == 0:
+        return 0
+
+    match method:
+        case HitAreaMethod.BATCHED:
+            return _get_hit_area_batched(geometry, feature_geometries, False, context)
+        case HitAreaMethod.UNION:
+            return _get_hit_area_batched(geometry, feature_geometries, True, context)
+        case _:
+            return _get_hit_area_ogr(geometry, feature_geometries)
+
+
+def _get_hit_area_ogr(geometry: ogr.Geometry, feature_geometries: List[ogr.Geometry]) -> float:
+    hit_area: float = 0
+
+    for feature_geom in feature_geometries:
+        intersection: ogr.Geometry = geometry.Intersection(feature_geom)
+
+        if intersection is None:
+            continue
+
+        geom_type = intersection.GetGeometryType()
+
+        if geom_type == ogr.wkbPolygon or geom_type == ogr.wkbMultiPolygon:
+            hit_area += intersection.GetArea()
+
+    return hit_area
+
+
+def _get_hit_area_batched(geometry: ogr.Geometry, feature_geometries: List[ogr.Geometry], union: bool, context: GeometryContext) -> float:
+    input_geom = context.to_shapely(geometry) if context is not None else geometry_to_shapely(geometry)
+    feature_geoms = np.array([geometry_to_shapely(geom) for geom in feature_geometries])
+
+    shapely.prepare(input_geom)
+    candidates = feature_geoms[_intersects_bbox(input_geom, feature_geoms)]
+    candidates = candidates[shapely.intersects(input_geom, candidates)]
+
+    if candidates.size == 0:
+        return 0
+
+    if union:
+        candidates = np.array([shapely.unary_union(candidates)])
+
+    intersections = shapely.intersection(input_geom, candidates)
+
+    # Unlike the OGR method, the polygon parts of GeometryCollection intersections are counted
+    return float(shapely.area(intersections).sum())
+
+
+def _intersects_bbox(input_geom: shapely.Geometry, feature_geoms: np.ndarray) -> np.ndarray:
+    min_x, min_y, max_x, max_y = shapely.bounds(input_geom)
+    bounds = shapely.bounds(feature_geoms)
+
+    return (bounds[:, 0] <= max_x) & (bounds[:, 2] >= min_x) & (bounds[:, 1] <= max_y) & (bounds[:, 3] >= min_y)
+
+
+__all__ = ['get_hit_area']
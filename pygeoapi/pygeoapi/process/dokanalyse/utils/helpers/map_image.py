@@ -1,23 +1,16 @@
-from osgeo import ogr
-from .geometry import create_feature, create_feature_collection, create_buffered_geometry
-from ..constants import DEFAULT_EPSG
+from typing import Dict
+from .geometry import create_feature, create_feature_collection
+from .geometry_context import GeometryContext
 from ...models.map_image_payload import MapImagePayload
 
 
-def create_payload_for_analysis(geometry: ogr.Geometry, buffer: int, wms_url: str) -> MapImagePayload:
+def create_payload_for_analysis(context: GeometryContext, wms_url: str) -> MapImagePayload:
     wmts = {
         'url': 'https://cache.kartverket.no/v1/wmts/1.0.0/WMTSCapabilities.xml',
         'layer': 'topograatone'
     }
 
-    features = [create_feature(geometry)]
-
-    if buffer > 0:
-        buffered_geometry = create_buffered_geometry(
-            geometry, buffer, DEFAULT_EPSG)
-        features.append(create_feature(buffered_geometry, {'buffer': True}))
-
-    feature_collection = create_feature_collection(features, DEFAULT_EPSG)
+    feature_collection = _create_feature_collection(context)
 
     styling = [
         {
@@ -40,20 +33,13 @@ def create_payload_for_analysis(geometry: ogr.Geometry, buffer: int, wms_url: st
     return MapImagePayload(1280, 720, wmts, [wms_url], feature_collection, styling)
 
 
-def create_payload_for_fact_sheet(geometry: ogr.Geometry, buffer: int) -> MapImagePayload:
+def create_payload_for_fact_sheet(context: GeometryContext) -> MapImagePayload:
     wmts = {
         'url': 'https://cache.kartverket.no/v1/wmts/1.0.0/WMTSCapabilities.xml',
         'layer': 'topo'
     }
 
-    features = [create_feature(geometry)]
-
-    if buffer > 0:
-        buffered_geometry = create_buffered_geometry(
-            geometry, buffer, DEFAULT_EPSG)
-        features.append(create_feature(buffered_geometry, {'buffer': True}))
-
-    feature_collection = create_feature_collection(features, DEFAULT_EPSG)
+    feature_collection = _create_feature_collection(context)
 
     styling = [
         {
@@ -76,4 +62,14 @@ def create_payload_for_fact_sheet(geometry: ogr.Geometry, buffer: int) -> MapIma
     return MapImagePayload(1280, 548, wmts, None, feature_collection, styling)
 
 
+def _create_feature_collection(context: GeometryContext) -> Dict:
+    features = [create_feature(context.geometry)]
+
+    if context.buffer > 0:
+        features.append(create_feature(
+            context.input_geometry, {'buffer': True}))
+
+    return create_feature_collection(features, context.epsg)
+
+
 __all__ = ['create_payload_for_analysis', 'create_payload_for_fact_sheet']
\ No newline at end of file
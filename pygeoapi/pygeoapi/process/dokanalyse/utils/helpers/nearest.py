@@ -0,0 +1,24 @@
+from typing import List
+import numpy as np
+from shapely import STRtree
+from osgeo import ogr
+from .geometry import geometry_to_shapely
+from .geometry_context import GeometryContext
+
+
+def get_distance_to_nearest(geometry: ogr.Geometry, feature_geometries: List[ogr.Geometry], context: GeometryContext = None) -> float:
+    feature_geoms = [geometry_to_shapely(geom)
+                     for geom in feature_geometries if geom is not None]
+
+    if len(feature_geoms) == 0:
+        return None
+
+    input_geom = context.to_shapely(geometry) if context is not None else geometry_to_shapely(geometry)
+    tree = STRtree(feature_geoms)
+    _, distances = tree.query_nearest(
+        input_geom, return_distance=True, all_matches=False)
+
+    return float(np.min(distances))
+
+
+__all__ = ['get_distance_to_nearest']
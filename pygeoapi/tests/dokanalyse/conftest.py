@@ -0,0 +1,4 @@
+import os
+import tempfile
+
+os.environ.setdefault('APP_FILES_DIR', tempfile.mkdtemp(prefix='dokanalyse-'))
@@ -0,0 +1,138 @@
+import re
+import pytest
+from pygeoapi.process.dokanalyse.utils.helpers.filter import Comparison, InList, And, Or, Not, compile_filter
+
+
+def _evaluate_with_eval(condition, data):
+    # The regex and eval() evaluation the filters were originally run with
+    condition = re.sub(r'(?<!=|>|<)\s*=\s*(?!=)', ' == ', condition)
+
+    for old, new in {' AND ': ' and ', ' OR ': ' or ', ' IN ': ' in ', ' NOT ': ' not '}.items():
+        condition = condition.replace(old, new)
+
+    return eval(condition, data.copy())
+
+
+_CONDITIONS = [
+    "kode = 1",
+    "kode == 1",
+    "kode >= 2",
+    "kode < 2",
+    "kode IN [1, 3]",
+    "kode NOT IN [1, 3]",
+    "navn IN ['Oslo', 'Bergen']",
+    "navn = 'Oslo' OR kode = 3 AND aktiv = True",
+    "(navn = 'Oslo' OR kode = 3) AND aktiv = True",
+    "aktiv = False OR kode IN (2, 3)",
+    "navn = \"Oslo\"",
+    "andel > 0.5"
+]
+
+_DATA = [
+    {'kode': 1, 'navn': 'Oslo', 'aktiv': True, 'andel': 0.25},
+    {'kode': 2, 'navn': 'Bergen', 'aktiv': False, 'andel': 0.75},
+    {'kode': 3, 'navn': 'Tromsø', 'aktiv': True, 'andel': 0.5}
+]
+
+
+@pytest.mark.parametrize('condition', _CONDITIONS)
+def test_evaluate_matches_eval(condition):
+    filter = compile_filter(condition)
+
+    for data in _DATA:
+        assert filter.evaluate(data) == _evaluate_with_eval(condition, data)
+
+
+def test_not_equal():
+    # The eval() evaluation rewrote != into "! ==" and failed
+    assert compile_filter("kode != 1").evaluate({'kode': 2})
+    assert compile_filter("kode <> 1").evaluate({'kode': 2})
+    assert not compile_filter("kode != 1").evaluate({'kode': 1})
+
+
+def test_in_list_does_not_coerce_types():
+    assert compile_filter("kode IN [1, 2]").evaluate({'kode': 1})
+    assert not compile_filter("kode IN [1, 2]").evaluate({'kode': '1'})
+    assert compile_filter("kode IN ['1', '2']").evaluate({'kode': '1'})
+    assert not compile_filter("kode IN ['1', '2']").evaluate({'kode': 1})
+    assert compile_filter("kode NOT IN ['1', '2']").evaluate({'kode': 1})
+
+
+def test_precedence():
+    expression = compile_filter("a = 1 OR b = 2 AND NOT c = 3").expression
+
+    assert isinstance(expression, Or)
+    assert isinstance(expression.operands[0], Comparison)
+    assert isinstance(expression.operands[1], And)
+    assert isinstance(expression.operands[1].operands[1], Not)
+
+    expression = compile_filter("(a = 1 OR b = 2) AND c = 3").expression
+
+    assert isinstance(expression, And)
+    assert isinstance(expression.operands[0], Or)
+
+
+def test_not_binds_to_the_nearest_predicate():
+    filter = compile_filter("NOT a = 1 AND b = 2")
+
+    assert filter.evaluate({'a': 2, 'b': 2})
+    assert not filter.evaluate({'a': 1, 'b': 2})
+    assert not filter.evaluate({'a': 2, 'b': 3})
+
+
+def test_quoting():
+    assert compile_filter("navn = 'Hans'' hus'").expression.value == "Hans' hus"
+    assert compile_filter('navn = "Si ""hei"""').expression.value == 'Si "hei"'
+    assert compile_filter("navn = 'a AND b'").evaluate({'navn': 'a AND b'})
+
+
+def test_literals():
+    assert compile_filter("a = True").expression.value is True
+    assert compile_filter("a = None").expression.value is None
+    assert compile_filter("a = -1.5").expression.value == -1.5
+    assert isinstance(compile_filter("a IN [1, 'x']").expression, InList)
+
+
+def test_missing_property():
+    assert not compile_filter("kode = 1").evaluate({})
+    assert compile_filter("kode != 1").evaluate({})
+    assert not compile_filter("kode > 1").evaluate({})
+    assert not compile_filter("kode > 1").evaluate({'kode': 'x'})
+
+
+def test_properties():
+    assert compile_filter("a = 1 AND (b = 2 OR a IN [3])").properties == ('a', 'b')
+
+
+@pytest.mark.parametrize('condition', ["", "kode =", "kode = 1 AND", "(kode = 1", "kode IN [1", "kode ~ 1", "kode = 1 kode"])
+def test_invalid_filters(condition):
+    with pytest.raises(ValueError):
+        compile_filter(condition)
+
+
+def test_to_fes():
+    assert compile_filter("kode = 1").to_fes() == \
+        '<fes:PropertyIsEqualTo><fes:ValueReference>kode</fes:ValueReference><fes:Literal>1</fes:Literal></fes:PropertyIsEqualTo>'
+
+    assert compile_filter("navn <> 'A & B'").to_fes() == \
+        '<fes:PropertyIsNotEqualTo><fes:ValueReference>navn</fes:ValueReference><fes:Literal>A &amp; B</fes:Literal></fes:PropertyIsNotEqualTo>'
+
+    assert compile_filter("aktiv = True AND kode NOT IN [1, 2]").to_fes() == (
+        '<fes:And>'
+        '<fes:PropertyIsEqualTo><fes:ValueReference>aktiv</fes:ValueReference><fes:Literal>true</fes:Literal></fes:PropertyIsEqualTo>'
+        '<fes:Not><fes:Or>'
+        '<fes:PropertyIsEqualTo><fes:ValueReference>kode</fes:ValueReference><fes:Literal>1</fes:Literal></fes:PropertyIsEqualTo>'
+        '<fes:PropertyIsEqualTo><fes:ValueReference>kode</fes:ValueReference><fes:Literal>2</fes:Literal></fes:PropertyIsEqualTo>'
+        '</fes:Or></fes:Not>'
+        '</fes:And>')
+
+    assert compile_filter("kode != None").to_fes() == \
+        '<fes:Not><fes:PropertyIsNull><fes:ValueReference>kode</fes:ValueReference></fes:PropertyIsNull></fes:Not>'
+
+
+def test_to_cql2():
+    assert compile_filter("kode = 1").to_cql2() == 'kode = 1'
+    assert compile_filter("navn != 'Hans'' hus'").to_cql2() == "navn <> 'Hans'' hus'"
+    assert compile_filter("a = 1 OR b = 2 AND NOT c = True").to_cql2() == '(a = 1) OR ((b = 2) AND (NOT (c = TRUE)))'
+    assert compile_filter("kode NOT IN ['a', 'b']").to_cql2() == "NOT (kode IN ('a', 'b'))"
+    assert compile_filter("kode = None").to_cql2() == 'kode IS NULL'
@@ -0,0 +1,138 @@
+import pytest
+from lxml import etree as ET
+from shapely import wkb
+from pygeoapi.process.dokanalyse.utils.helpers.gml import geometry_from_gml_element, get_member_extractor, _element_to_wkb
+from pygeoapi.process.dokanalyse.utils.helpers.geometry import geometry_from_gml
+
+_NAMESPACES = 'xmlns:gml="http://www.opengis.net/gml/3.2"'
+_SRS_NAME = 'http://www.opengis.net/def/crs/EPSG/0/25833'
+
+_GEOMETRIES = {
+    'point': f'<gml:Point {_NAMESPACES} srsName="{_SRS_NAME}"><gml:pos>10 20</gml:pos></gml:Point>',
+    'point_3d': f'<gml:Point {_NAMESPACES} srsName="{_SRS_NAME}" srsDimension="3"><gml:pos>10 20 30</gml:pos></gml:Point>',
+    'line_string': f'<gml:LineString {_NAMESPACES} srsName="{_SRS_NAME}"><gml:posList>0 0 10 0 10 10</gml:posList></gml:LineString>',
+    'curve': (
+        f'<gml:Curve {_NAMESPACES} srsName="{_SRS_NAME}"><gml:segments>'
+        '<gml:LineStringSegment><gml:posList>0 0 10 0</gml:posList></gml:LineStringSegment>'
+        '<gml:LineStringSegment><gml:posList>10 0 10 10</gml:posList></gml:LineStringSegment>'
+        '</gml:segments></gml:Curve>'),
+    'polygon': (
+        f'<gml:Polygon {_NAMESPACES} srsName="{_SRS_NAME}">'
+        '<gml:exterior><gml:LinearRing><gml:posList>0 0 10 0 10 10 0 10 0 0</gml:posList></gml:LinearRing></gml:exterior>'
+        '<gml:interior><gml:LinearRing><gml:posList>2 2 4 2 4 4 2 4 2 2</gml:posList></gml:LinearRing></gml:interior>'
+        '</gml:Polygon>'),
+    'surface': (
+        f'<gml:Surface {_NAMESPACES} srsName="{_SRS_NAME}"><gml:patches><gml:PolygonPatch>'
+        '<gml:exterior><gml:LinearRing><gml:pos>0 0</gml:pos><gml:pos>10 0</gml:pos><gml:pos>10 10</gml:pos><gml:pos>0 0</gml:pos></gml:LinearRing></gml:exterior>'
+        '</gml:PolygonPatch></gml:patches></gml:Surface>'),
+    'multi_surface': (
+        f'<gml:MultiSurface {_NAMESPACES} srsName="{_SRS_NAME}">'
+        '<gml:surfaceMember><gml:Polygon><gml:exterior><gml:LinearRing><gml:posList>0 0 1 0 1 1 0 0</gml:posList></gml:LinearRing></gml:exterior></gml:Polygon></gml:surfaceMember>'
+        '<gml:surfaceMember><gml:Polygon><gml:exterior><gml:LinearRing><gml:posList>5 5 6 5 6 6 5 5</gml:posList></gml:LinearRing></gml:exterior></gml:Polygon></gml:surfaceMember>'
+        '</gml:MultiSurface>'),
+    'multi_curve': (
+        f'<gml:MultiCurve {_NAMESPACES} srsName="{_SRS_NAME}">'
+        '<gml:curveMember><gml:LineString><gml:posList>0 0 1 1</gml:posList></gml:LineString></gml:curveMember>'
+        '<gml:curveMember><gml:LineString><gml:posList>2 2 3 3</gml:posList></gml:LineString></gml:curveMember>'
+        '</gml:MultiCurve>'),
+    'multi_point': (
+        f'<gml:MultiPoint {_NAMESPACES} srsName="{_SRS_NAME}">'
+        '<gml:pointMembers><gml:Point><gml:pos>1 2</gml:pos></gml:Point><gml:Point><gml:pos>3 4</gml:pos></gml:Point></gml:pointMembers>'
+        '</gml:MultiPoint>')
+}
+
+_EXPECTED_WKT = {
+    'point': 'POINT (10 20)',
+    'point_3d': 'POINT Z (10 20 30)',
+    'line_string': 'LINESTRING (0 0, 10 0, 10 10)',
+    'curve': 'LINESTRING (0 0, 10 0, 10 10)',
+    'polygon': 'POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0), (2 2, 4 2, 4 4, 2 4, 2 2))',
+    'surface': 'POLYGON ((0 0, 10 0, 10 10, 0 0))',
+    'multi_surface': 'MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))',
+    'multi_curve': 'MULTILINESTRING ((0 0, 1 1), (2 2, 3 3))',
+    'multi_point': 'MULTIPOINT ((1 2), (3 4))'
+}
+
+
+@pytest.mark.parametrize('name', _GEOMETRIES.keys())
+def test_element_to_wkb(name):
+    element = ET.fromstring(_GEOMETRIES[name])
+
+    assert wkb.loads(_element_to_wkb(element)).wkt == _EXPECTED_WKT[name]
+
+
+@pytest.mark.parametrize('gml_str', [
+    f'<gml:Point {_NAMESPACES} srsName="urn:ogc:def:crs:EPSG::4326"><gml:pos>60 10</gml:pos></gml:Point>',
+    f'<gml:Point {_NAMESPACES}><gml:pos>10 20 30</gml:pos></gml:Point>',
+    f'<gml:LineString {_NAMESPACES}><gml:posList>0 0 10</gml:posList></gml:LineString>',
+    f'<gml:OrientableSurface {_NAMESPACES}/>',
+    (
+        f'<gml:Curve {_NAMESPACES}><gml:segments>'
+        '<gml:Arc><gml:posList>0 0 1 1 2 0</gml:posList></gml:Arc>'
+        '</gml:segments></gml:Curve>')
+])
+def test_unsupported_elements_fall_back_to_ogr(gml_str):
+    assert _element_to_wkb(ET.fromstring(gml_str)) is None
+
+
+@pytest.mark.parametrize('name', _GEOMETRIES.keys())
+def test_geometry_matches_ogr(name):
+    element = ET.fromstring(_GEOMETRIES[name])
+    geometry = geometry_from_gml_element(element)
+    expected = geometry_from_gml(_GEOMETRIES[name])
+
+    assert geometry.Equals(expected)
+    assert geometry.GetSpatialReference().GetAuthorityCode(None) == '25833'
+
+
+def test_geographic_geometry_is_read_by_ogr():
+    gml_str = f'<gml:Point {_NAMESPACES} srsName="urn:ogc:def:crs:EPSG::4326"><gml:pos>60 10</gml:pos></gml:Point>'
+    geometry = geometry_from_gml_element(ET.fromstring(gml_str))
+
+    assert geometry.Equals(geometry_from_gml(gml_str))
+
+
+def _member(content):
+    return ET.fromstring(
+        f'<wfs:member xmlns:wfs="http://www.opengis.net/wfs/2.0" xmlns:app="http://skjema.geonorge.no/app" {_NAMESPACES}><app:Feature>{content}</app:Feature></wfs:member>')
+
+
+def test_member_extractor():
+    member = _member(
+        '<app:navn>Oslo</app:navn>'
+        '<app:info><app:kode>1</app:kode></app:info>'
+        f'<app:område>{_GEOMETRIES["point"]}</app:område>'
+        '<app:ukjent>x</app:ukjent>')
+
+    values, geom_elem = get_member_extractor(('navn', 'kode'), 'område').extract(member)
+
+    assert values == {'navn': 'Oslo', 'kode': '1'}
+    assert ET.QName(geom_elem).localname == 'Point'
+
+
+def test_member_extractor_keeps_first_value_and_skips_geometry_content():
+    member = _member(
+        f'<app:område>{_GEOMETRIES["point"]}</app:område>'
+        '<app:navn>Første</app:navn>'
+        '<app:navn>Andre</app:navn>'
+        '<app:tom/>')
+
+    values, _ = get_member_extractor(('navn', 'pos', 'tom'), 'område').extract(member)
+
+    assert values == {'navn': 'Første'}
+
+
+def test_member_extractor_without_geometry():
+    values, geom_elem = get_member_extractor(('navn',), 'område').extract(_member('<app:navn>Oslo</app:navn>'))
+
+    assert values == {'navn': 'Oslo'}
+    assert geom_elem is None
+
+    values, geom_elem = get_member_extractor(('navn',), None).extract(_member('<app:navn>Oslo</app:navn>'))
+
+    assert values == {'navn': 'Oslo'}
+    assert geom_elem is None
+
+
+def test_get_member_extractor_is_cached():
+    assert get_member_extractor(('a', 'b'), 'geom') is get_member_extractor(('a', 'b'), 'geom')
@@ -0,0 +1,48 @@
+from pygeoapi.process.dokanalyse.http_clients.ogc_api import _add_content_crs
+from pygeoapi.process.dokanalyse.utils.helpers.geometry import get_epsg
+
+
+def _feature_collection():
+    return {'type': 'FeatureCollection', 'features': []}
+
+
+def test_missing_content_crs_defaults_to_crs84():
+    json = _feature_collection()
+    _add_content_crs(json, None, 'https://ogc.example.com/no-header', 25833)
+
+    assert get_epsg(json) == 4326
+
+
+def test_content_crs_header_sets_source_crs():
+    json = _feature_collection()
+    _add_content_crs(json, '<http://www.opengis.net/def/crs/EPSG/0/25832>', 'https://ogc.example.com/header', 25833)
+
+    assert get_epsg(json) == 25832
+
+
+def test_content_crs_header_overrides_crs_member():
+    json = _feature_collection()
+    json['crs'] = {'type': 'name', 'properties': {'name': 'urn:ogc:def:crs:EPSG::25833'}}
+    _add_content_crs(json, '<http://www.opengis.net/def/crs/OGC/1.3/CRS84>', 'https://ogc.example.com/crs84', 25833)
+
+    assert get_epsg(json) == 4326
+
+
+def test_crs_member_is_kept_without_header():
+    json = _feature_collection()
+    json['crs'] = {'type': 'name', 'properties': {'name': 'urn:ogc:def:crs:EPSG::25832'}}
+    _add_content_crs(json, None, 'https://ogc.example.com/member', 25833)
+
+    assert get_epsg(json) == 25832
+
+
+def test_missing_content_crs_uses_output_crs_once_confirmed():
+    url = 'https://ogc.example.com/confirmed'
+
+    json = _feature_collection()
+    _add_content_crs(json, '<http://www.opengis.net/def/crs/EPSG/0/25833>', url, 25833)
+
+    json = _feature_collection()
+    _add_content_crs(json, None, url, 25833)
+
+    assert get_epsg(json) == 25833
@@ -0,0 +1,109 @@
+import asyncio
+from pygeoapi.process.dokanalyse.http_clients import pagination, wfs
+from pygeoapi.process.dokanalyse.http_clients.pagination import Page, fetch_pages
+
+
+def _fetch_from(features, page_size, number_matched=None, seekable=False, ignore_offset=False):
+    offsets = []
+
+    async def fetch_page(offset):
+        offsets.append(offset)
+        start = 0 if offset is None or ignore_offset else offset
+        items = features[start:start + page_size]
+        next = start + len(items) if start + len(items) < len(features) else None
+        key = items[0] if items else None
+
+        return 200, Page(items, number_matched=number_matched, next=next, seekable=seekable, key=key)
+
+    return fetch_page, offsets
+
+
+def test_fetch_pages_sequentially():
+    fetch_page, offsets = _fetch_from(list(range(25)), 10)
+    status_code, items = asyncio.run(fetch_pages(fetch_page))
+
+    assert status_code == 200
+    assert items == list(range(25))
+    assert offsets == [None, 10, 20]
+
+
+def test_fetch_pages_concurrently_by_offset():
+    fetch_page, offsets = _fetch_from(list(range(25)), 10, number_matched=25, seekable=True)
+    status_code, items = asyncio.run(fetch_pages(fetch_page))
+
+    assert status_code == 200
+    assert items == list(range(25))
+    assert sorted(offsets[1:]) == [10, 20]
+
+
+def test_repeated_page_stops_paging():
+    fetch_page, offsets = _fetch_from(list(range(25)), 10, ignore_offset=True)
+    status_code, items = asyncio.run(fetch_pages(fetch_page))
+
+    assert status_code == 200
+    assert items == list(range(10))
+    assert offsets == [None, 10]
+
+
+def test_repeated_page_with_known_count_is_incomplete():
+    fetch_page, offsets = _fetch_from(list(range(25)), 10, number_matched=25, ignore_offset=True)
+    assert asyncio.run(fetch_pages(fetch_page)) == (206, None)
+    assert offsets == [None, 10]
+
+    fetch_page, _ = _fetch_from(list(range(25)), 10, number_matched=25, seekable=True, ignore_offset=True)
+    assert asyncio.run(fetch_pages(fetch_page)) == (206, None)
+
+
+def test_rejected_page_is_incomplete():
+    async def fetch_page(offset):
+        if offset is None:
+            return 200, Page([1, 2], next=2)
+
+        return 400, None
+
+    assert asyncio.run(fetch_pages(fetch_page)) == (206, None)
+
+
+def test_page_limit_is_incomplete(monkeypatch):
+    monkeypatch.setattr(pagination, '_MAX_PAGES', 3)
+    fetch_page, _ = _fetch_from(list(range(50)), 10)
+
+    assert asyncio.run(fetch_pages(fetch_page)) == (206, None)
+
+
+def _stream_from(features, server_limit, monkeypatch):
+    bodies = []
+
+    async def stream_wfs(url, xml_body, map_member, timeout):
+        body = xml_body.decode('utf-8')
+        bodies.append(body)
+        start = int(body.split('startIndex="')[1].split('"')[0]) if 'startIndex=' in body else 0
+        count = int(body.split('count="')[1].split('"')[0]) if 'count=' in body else server_limit
+        items = features[start:start + min(count, server_limit)]
+
+        return 200, Page(items, key=items[0] if items else None)
+
+    monkeypatch.setattr(wfs, '_stream_wfs', stream_wfs)
+
+    return bodies
+
+
+def test_wfs_sends_no_paging_parameters_when_first_page_is_not_full(monkeypatch):
+    bodies = _stream_from(list(range(5)), 100, monkeypatch)
+    status_code, items = asyncio.run(wfs._stream_wfs_pages(
+        'https://wfs.example.com', '<wfs:Query/>', None, 10, False, 30))
+
+    assert (status_code, items) == (200, list(range(5)))
+    assert len(bodies) == 1
+    assert 'count=' not in bodies[0] and 'startIndex=' not in bodies[0]
+
+
+def test_wfs_pages_with_size_of_first_page(monkeypatch):
+    bodies = _stream_from(list(range(25)), 10, monkeypatch)
+    status_code, items = asyncio.run(wfs._stream_wfs_pages(
+        'https://wfs.example.com', '<wfs:Query/>', None, 10, False, 30))
+
+    assert (status_code, items) == (200, list(range(25)))
+    assert 'count=' not in bodies[0]
+    assert 'count="10" startIndex="10"' in bodies[1]
+    assert 'count="10" startIndex="20"' in bodies[2]
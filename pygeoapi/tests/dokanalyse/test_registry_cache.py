@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+import pytest
+from pygeoapi.process.dokanalyse.services import registry_cache
+from pygeoapi.process.dokanalyse.services.registry_cache import RegistryCache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry_cache, 'CACHE_DIR', str(tmp_path))
+
+    return tmp_path
+
+
+class _Registry:
+    def __init__(self, *values):
+        self.values = list(values)
+        self.calls = 0
+
+    async def fetch(self, key):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        value = self.values.pop(0)
+
+        if isinstance(value, Exception):
+            raise value
+
+        return value
+
+
+def test_miss_is_fetched_once_and_written_to_disk(cache_dir):
+    registry = _Registry({'name': 'Arealbruk'})
+    cache = RegistryCache('datasets/{key}.json', registry.fetch, 1)
+
+    async def get():
+        return await asyncio.gather(cache.get('a'), cache.get('a'))
+
+    assert asyncio.run(get()) == [{'name': 'Arealbruk'}, {'name': 'Arealbruk'}]
+    assert registry.calls == 1
+    assert (cache_dir / 'datasets' / 'a.json').exists()
+
+
+def test_cached_file_is_used_after_restart():
+    asyncio.run(RegistryCache('{key}.json', _Registry(1).fetch, 1).get('a'))
+    registry = _Registry(2)
+
+    assert asyncio.run(RegistryCache('{key}.json', registry.fetch, 1).get('a')) == 1
+    assert registry.calls == 0
+
+
+def test_stale_value_is_returned_while_refreshing(cache_dir, monkeypatch):
+    monkeypatch.setattr(registry_cache, '_RETRY_INTERVAL', -1)
+    registry = _Registry(2)
+    cache = RegistryCache('{key}.json', registry.fetch, 1)
+
+    (cache_dir / 'a.json').write_text('1')
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(cache_dir / 'a.json', (two_days_ago, two_days_ago))
+
+    async def get():
+        stale = await cache.get('a')
+        await asyncio.sleep(0.05)
+
+        return stale, await cache.get('a')
+
+    assert asyncio.run(get()) == (1, 2)
+    assert registry.calls == 1
+
+
+def test_failed_refresh_keeps_value_until_retry_interval(cache_dir):
+    registry = _Registry(Exception('Service unavailable'), 2)
+    cache = RegistryCache('{key}.json', registry.fetch, 1)
+
+    (cache_dir / 'a.json').write_text('1')
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(cache_dir / 'a.json', (two_days_ago, two_days_ago))
+
+    async def get():
+        values = []
+
+        for _ in range(3):
+            values.append(await cache.get('a'))
+            await asyncio.sleep(0.05)
+
+        return values
+
+    assert asyncio.run(get()) == [1, 1, 1]
+    assert registry.calls == 1
+
+
+def test_failed_fetch_without_cached_value():
+    cache = RegistryCache('{key}.json', _Registry(Exception('Service unavailable')).fetch, 1)
+
+    assert asyncio.run(cache.get('a')) is None
+
+
+def test_index_is_applied_to_fetched_and_cached_values():
+    def index(value):
+        return {item['id']: item for item in value}
+
+    value = [{'id': 'a'}, {'id': 'b'}]
+
+    assert asyncio.run(RegistryCache('{key}.json', _Registry(value).fetch, 1, index).get('x')) == {'a': {'id': 'a'}, 'b': {'id': 'b'}}
+    assert asyncio.run(RegistryCache('{key}.json', _Registry().fetch, 1, index).get('x')) == {'a': {'id': 'a'}, 'b': {'id': 'b'}}
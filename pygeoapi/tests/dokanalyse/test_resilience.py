@@ -0,0 +1,164 @@
+import time
+import asyncio
+from pygeoapi.process.dokanalyse.http_clients import resilience
+from pygeoapi.process.dokanalyse.http_clients.resilience import CircuitState, _HostState, send_request, mark_response_received, get_host_health
+from pygeoapi.process.dokanalyse.utils.helpers.deadline import set_deadline
+
+
+def _respond(status_code, delay=0):
+    calls = []
+
+    async def request(timeout):
+        calls.append(timeout)
+        await asyncio.sleep(delay)
+
+        return status_code, 'response' if status_code == 200 else None
+
+    return request, calls
+
+
+def test_limit_increases_additively_on_success():
+    host = _HostState('aimd.example.com')
+    host.record(200, 0.1)
+    host.record(200, 0.1)
+
+    assert host.limit == resilience._INITIAL_LIMIT + 1 / resilience._INITIAL_LIMIT
+
+    for _ in range(1000):
+        host.record(200, 0.1)
+
+    assert host.limit == resilience._MAX_LIMIT
+
+
+def test_limit_decreases_multiplicatively_on_failure():
+    host = _HostState('aimd.example.com')
+    host.record(503, 0.1)
+
+    assert host.limit == resilience._INITIAL_LIMIT * resilience._BACKOFF_RATIO
+
+    host.record(408, 0.1)
+    host.record(500, 0.1)
+    host.record(500, 0.1)
+
+    assert host.limit == resilience._MIN_LIMIT
+
+
+def test_limit_decreases_on_latency_spike():
+    host = _HostState('aimd.example.com')
+    host.record(200, 0.1)
+    host.record(200, 1.0)
+
+    assert host.limit == resilience._INITIAL_LIMIT * resilience._LATENCY_BACKOFF_RATIO
+
+
+def test_client_errors_are_not_failures():
+    host = _HostState('aimd.example.com')
+
+    for _ in range(resilience._FAILURE_THRESHOLD):
+        host.record(404, 0.1)
+
+    assert host.circuit == CircuitState.CLOSED
+    assert host.failures == 0
+
+
+def test_requests_in_flight_are_limited():
+    url = 'https://limit.example.com/wfs'
+    in_flight = []
+    peak = []
+
+    async def request(timeout):
+        in_flight.append(None)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+
+        return 200, None
+
+    async def send_all():
+        resilience._get_host_state(url).limit = 2
+        return await asyncio.gather(*[send_request(url, 30, request) for _ in range(6)])
+
+    assert asyncio.run(send_all()) == [(200, None)] * 6
+    assert max(peak) == 2
+
+
+def test_circuit_opens_after_consecutive_failures():
+    url = 'https://breaker.example.com/wfs'
+    failing, failed_calls = _respond(503)
+
+    for _ in range(resilience._FAILURE_THRESHOLD):
+        assert asyncio.run(send_request(url, 30, failing)) == (503, None)
+
+    request, calls = _respond(200)
+
+    assert asyncio.run(send_request(url, 30, request)) == (503, None)
+    assert len(failed_calls) == resilience._FAILURE_THRESHOLD
+    assert len(calls) == 0
+
+    health = get_host_health()['breaker.example.com']
+
+    assert health['circuit'] == 'open'
+    assert health['rejected'] == 1
+
+
+def test_half_open_circuit_closes_on_success_and_reopens_on_failure():
+    url = 'https://half-open.example.com/wfs'
+    host = resilience._get_host_state(url)
+    failing, _ = _respond(500)
+
+    for _ in range(resilience._FAILURE_THRESHOLD):
+        asyncio.run(send_request(url, 30, failing))
+
+    host.opened_at -= resilience._COOL_DOWN
+
+    assert asyncio.run(send_request(url, 30, failing)) == (500, None)
+    assert host.circuit == CircuitState.OPEN
+
+    host.opened_at -= resilience._COOL_DOWN
+    request, calls = _respond(200)
+
+    assert asyncio.run(send_request(url, 30, request)) == (200, 'response')
+    assert host.circuit == CircuitState.CLOSED
+    assert len(calls) == 1
+
+
+def test_deadline_timeouts_are_not_failures():
+    url = 'https://deadline.example.com/wfs'
+
+    async def send():
+        set_deadline(time.monotonic() + 5)
+        request, calls = _respond(408)
+
+        for _ in range(resilience._FAILURE_THRESHOLD):
+            await send_request(url, 30, request)
+
+        return calls
+
+    calls = asyncio.run(send())
+
+    assert all(timeout <= 5 for timeout in calls)
+    assert resilience._get_host_state(url).failures == 0
+
+
+def test_expired_deadline_is_not_sent():
+    async def send():
+        set_deadline(time.monotonic() - 1)
+        request, calls = _respond(200)
+
+        return await send_request('https://expired.example.com/wfs', 30, request), calls
+
+    assert asyncio.run(send()) == ((408, None), [])
+
+
+def test_latency_is_measured_to_response_headers():
+    url = 'https://latency.example.com/wfs'
+
+    async def request(timeout):
+        mark_response_received()
+        await asyncio.sleep(0.1)
+
+        return 200, None
+
+    asyncio.run(send_request(url, 30, request))
+
+    assert resilience._get_host_state(url).latency < 0.05
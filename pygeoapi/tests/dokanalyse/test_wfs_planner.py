@@ -0,0 +1,88 @@
+import asyncio
+from lxml import etree as ET
+from pygeoapi.process.dokanalyse.http_clients.capabilities import MULTI_QUERY, is_supported
+from pygeoapi.process.dokanalyse.http_clients.wfs_planner import WfsQueryPlanner, _plan_batches, _PlannedQuery
+
+
+def _member(type_name, id):
+    return ET.fromstring(
+        f'<wfs:member xmlns:wfs="http://www.opengis.net/wfs/2.0" xmlns:app="http://skjema.geonorge.no/app">'
+        f'<app:{type_name}><app:id>{id}</app:id></app:{type_name}></wfs:member>')
+
+
+def _map_member(member):
+    return member[0][0].text
+
+
+class _FakeServer:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.requests = []
+
+    async def send(self, queries, map_member):
+        self.requests.append(list(queries))
+
+        if len(queries) > 1 and self.status_code != 200:
+            return self.status_code, None
+
+        # The query XML is the type name, each type has two features
+        members = [map_member(_member(type_name, f'{type_name}.{i}')) for type_name in queries for i in range(2)]
+
+        return 200, [member for member in members if member is not None]
+
+
+async def _submit_all(planner, url, server, type_names):
+    return await asyncio.gather(*[
+        planner.submit(url, f'app:{type_name}', type_name, _map_member, server.send) for type_name in type_names])
+
+
+def test_queries_are_sent_in_one_request_and_split_by_type_name():
+    server = _FakeServer()
+    planner = WfsQueryPlanner()
+    results = asyncio.run(_submit_all(planner, 'https://wfs.example.com/split', server, ['Bygning', 'Veg']))
+
+    assert server.requests == [['Bygning', 'Veg']]
+    assert results == [(200, ['Bygning.0', 'Bygning.1']), (200, ['Veg.0', 'Veg.1'])]
+    assert (planner.requests, planner.queries) == (1, 2)
+
+
+def test_queries_for_the_same_type_are_not_combined():
+    server = _FakeServer()
+    results = asyncio.run(_submit_all(WfsQueryPlanner(), 'https://wfs.example.com/same-type', server, ['Bygning', 'Bygning', 'Veg']))
+
+    assert sorted(map(sorted, server.requests)) == [['Bygning'], ['Bygning', 'Veg']]
+    assert all(result == (200, [f'{type_name}.0', f'{type_name}.1']) for result, type_name in zip(results, ['Bygning', 'Bygning', 'Veg']))
+
+
+def test_rejected_request_is_sent_separately_and_disables_multi_query():
+    url = 'https://wfs.example.com/rejected'
+    server = _FakeServer(400)
+    results = asyncio.run(_submit_all(WfsQueryPlanner(), url, server, ['Bygning', 'Veg']))
+
+    assert server.requests == [['Bygning', 'Veg'], ['Bygning'], ['Veg']]
+    assert results == [(200, ['Bygning.0', 'Bygning.1']), (200, ['Veg.0', 'Veg.1'])]
+    assert not is_supported(url, MULTI_QUERY)
+
+    server.requests.clear()
+    asyncio.run(_submit_all(WfsQueryPlanner(), url, server, ['Bygning', 'Veg']))
+
+    assert sorted(server.requests) == [['Bygning'], ['Veg']]
+
+
+def test_truncated_request_is_sent_separately():
+    url = 'https://wfs.example.com/truncated'
+    server = _FakeServer(206)
+    results = asyncio.run(_submit_all(WfsQueryPlanner(), url, server, ['Bygning', 'Veg']))
+
+    assert server.requests == [['Bygning', 'Veg'], ['Bygning'], ['Veg']]
+    assert results == [(200, ['Bygning.0', 'Bygning.1']), (200, ['Veg.0', 'Veg.1'])]
+    assert is_supported(url, MULTI_QUERY)
+
+
+def test_plan_batches_ignores_namespace_prefix():
+    async def plan():
+        queries = [_PlannedQuery(type_name, type_name, None, None) for type_name in ['app:Bygning', 'Bygning', 'app:Veg']]
+
+        return [[query.query_xml for query in batch] for batch in _plan_batches(queries)]
+
+    assert asyncio.run(plan()) == [['app:Bygning', 'app:Veg'], ['Bygning']]